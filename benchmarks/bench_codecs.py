@@ -0,0 +1,46 @@
+"""
+Payload size and encode/decode time per codec.
+
+Encodes a list of 1,000 client records with every available codec: the
+stdlib json module, orjson and msgspec for JSON, msgpack and cbor2 for
+binary payloads. Codecs whose library is not installed are skipped.
+
+Run with ``python -m benchmarks.bench_codecs``.
+"""
+from timeit import repeat
+
+from lunnaris.codec import CborCodec, MsgPackCodec, MsgspecBackend, OrjsonBackend, StdlibJson
+
+
+def payload(size: int = 1_000) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"client {i}",
+            "age": 20 + i % 50,
+            "active": i % 2 == 0,
+            "score": i / 7,
+            "tags": ["a", "b", "c"],
+        }
+        for i in range(size)
+    ]
+
+
+def main(number: int = 50):
+    data = payload()
+    print(f"{'codec':10} {'bytes':>9} {'encode':>10} {'decode':>10}")
+    for factory in (StdlibJson, OrjsonBackend, MsgspecBackend, MsgPackCodec, CborCodec):
+        try:
+            codec = factory()
+        except ImportError:
+            print(f"{factory.name:10} not installed")
+            continue
+
+        encoded = codec.dumps(data)
+        encode = min(repeat(lambda: codec.dumps(data), number=number, repeat=5)) / number
+        decode = min(repeat(lambda: codec.loads(encoded), number=number, repeat=5)) / number
+        print(f"{codec.name:10} {len(encoded):9} {encode * 1e3:8.2f}ms {decode * 1e3:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Per-request cost of binding handler arguments.
+
+Compares the reflection based binding (``inspect.signature`` on every call)
+with the precompiled binding plan built by ``RequestHandler.compile``.
+
+Run with ``python -m benchmarks.bench_handler``.
+"""
+from inspect import signature
+from timeit import repeat
+
+from lunnaris.handler import get, get_handler
+from lunnaris.request import ITypeMapper, ParamMapper, Query, QueryParam, Request
+
+
+def reflection_kwargs(callback, request: Request) -> dict:
+    kwargs = {}
+    for name, param in signature(callback).parameters.items():
+        if issubclass(param.annotation, Request):
+            kwargs[name] = request
+        elif isinstance(param.default, ITypeMapper):
+            if param.annotation != param.empty:
+                kwargs[name] = param.default.map(request, param.annotation)
+        elif isinstance(param.default, ParamMapper):
+            if param.annotation != param.empty:
+                kwargs[name] = param.default.map(request, param.annotation, name)
+        else:
+            arg = param.default
+            if name in request.params:
+                arg = request.params[name]
+                if param.annotation != param.empty:
+                    arg = param.annotation(arg)
+            kwargs[name] = arg
+    return kwargs
+
+
+@get("/items/{id}")
+def endpoint(req: Request, id: int, q: dict = Query(), page: int = QueryParam(1)):
+    return id
+
+
+def main(number: int = 20_000):
+    handler = get_handler(endpoint)
+    handler.compile()
+    request = Request(
+        "GET", "/items/7", query={"page": "2", "sort": "asc"}, params={"id": "7"}
+    )
+
+    assert reflection_kwargs(endpoint, request) == handler._process_callback_kwargs(request)
+
+    before = min(repeat(lambda: reflection_kwargs(endpoint, request), number=number, repeat=5))
+    after = min(repeat(lambda: handler._process_callback_kwargs(request), number=number, repeat=5))
+
+    print(f"reflection: {before / number * 1e6:8.2f} us/request")
+    print(f"plan:       {after / number * 1e6:8.2f} us/request")
+    print(f"speedup:    {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-request cost of building a `Request` from an ASGI scope.
+
+Compares eagerly decoding every header and the query string (the previous
+`read_request`) with `Request.from_scope`, which decodes them on first
+access, for a handler that reads nothing and one that reads one header,
+and the query parser against `urllib.parse.parse_qsl`.
+
+Run with ``python -m benchmarks.bench_request``.
+"""
+from timeit import repeat
+from urllib.parse import parse_qsl
+
+from lunnaris.query import parse_query_string
+from lunnaris.request import Request
+
+SCOPE = {
+    "type": "http",
+    "method": "GET",
+    "path": "/items/42",
+    "query_string": b"page=2&size=50&sort=name",
+    "headers": [
+        (b"host", b"localhost:8000"),
+        (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/120.0"),
+        (b"accept", b"application/json, text/plain, */*"),
+        (b"accept-language", b"en-US,en;q=0.5"),
+        (b"accept-encoding", b"gzip, deflate, br"),
+        (b"connection", b"keep-alive"),
+        (b"cookie", b"session=abc123; theme=dark"),
+        (b"cache-control", b"no-cache"),
+        (b"authorization", b"Bearer eyJhbGciOiJIUzI1NiJ9"),
+        (b"x-request-id", b"4f1c2a9e-8d41-4b8e-9c2f-0e5d6b7a8c9d"),
+    ],
+}
+
+QUERY = "page=2&size=50&sort=name&tag=a&tag=b&q=caf%C3%A9+au+lait"
+
+
+def eager() -> Request:
+    return Request(
+        method=SCOPE["method"],
+        path=SCOPE["path"],
+        headers={k.decode(): v.decode() for k, v in SCOPE["headers"]},
+        query=parse_query_string(SCOPE["query_string"]),
+    )
+
+
+def lazy() -> Request:
+    return Request.from_scope(SCOPE)
+
+
+def main(number: int = 100_000):
+    cases = {
+        "eager": eager,
+        "lazy": lazy,
+        "eager + header": lambda: eager().headers.get("accept"),
+        "lazy + header": lambda: lazy().headers.get("accept"),
+        "parse_qsl": lambda: parse_qsl(QUERY, keep_blank_values=True),
+        "parse_query": lambda: parse_query_string(QUERY),
+    }
+    for name, case in cases.items():
+        best = min(repeat(case, number=number, repeat=5)) / number
+        print(f"{name + ':':16}{best * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Route resolution cost against a 1,000 route table.
+
+Half of the routes are static (``/service{i}/items``) and half have a
+parameter (``/service{i}/items/{id}``). Each case is resolved through the
+bare trie walk, through ``RouteMatcher.match`` and through a matcher with
+the dynamic resolution LRU cache enabled.
+
+Run with ``python -m benchmarks.bench_routing``.
+"""
+from timeit import repeat
+
+from lunnaris.handler import RequestHandler
+from lunnaris.routes import RouteMatcher
+
+ROUTES = 500
+
+
+def build(cache_size: int = 0) -> RouteMatcher:
+    router = RouteMatcher(cache_size=cache_size)
+    for i in range(ROUTES):
+        router.add_route(RequestHandler(f"/service{i}/items", "GET", lambda: None))
+        router.add_route(RequestHandler(f"/service{i}/items/{{id}}", "GET", lambda: None))
+    return router
+
+
+def measure(func, number: int) -> float:
+    return min(repeat(func, number=number, repeat=7)) / number * 1e9
+
+
+def main(number: int = 100_000):
+    router = build()
+    cached = build(cache_size=1024)
+    static_path = f"/service{ROUTES - 1}/items"
+    dynamic_path = f"/service{ROUTES - 1}/items/42"
+
+    print(f"{'case':10} {'trie':>10} {'match':>10} {'cached':>10}  (ns/lookup)")
+    for name, path in (("static", static_path), ("dynamic", dynamic_path)):
+        trie = measure(lambda: router._resolve(path.strip("/")), number)
+        match = measure(lambda: router.match(path, "GET"), number)
+        lru = measure(lambda: cached.match(path, "GET"), number)
+        print(f"{name:10} {trie:10.0f} {match:10.0f} {lru:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Serialization cost of large mixed lists.
+
+Serializes 10,000 elements mixing dataclass rows, dicts, a type with a
+registered callback and a type handled by an extended serializer, with a
+dozen unrelated serializers registered. Compares the full per-element
+lookup with the per-type dispatch cache.
+
+A second case compares ``dataclasses.asdict`` with the generated per-class
+encoders on nested dataclass rows.
+
+Run with ``python -m benchmarks.bench_serializer``.
+"""
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from timeit import repeat
+
+from lunnaris.encoders import dataclass_encoder
+from lunnaris.serializer import Serializer
+
+
+@dataclass
+class Row:
+    id: int
+    name: str
+
+
+@dataclass
+class Address:
+    city: str
+    zip: str
+
+
+@dataclass
+class Client:
+    id: int
+    name: str
+    age: int
+    address: Address
+    created: datetime
+
+
+class Money:
+    def __init__(self, cents: int):
+        self.cents = cents
+
+
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+
+
+class PointSerializer:
+    def match(self, obj):
+        return isinstance(obj, Point)
+
+    def serialize(self, obj):
+        return {"x": obj.x, "y": obj.y}
+
+
+def build() -> Serializer:
+    serializer = Serializer()
+    for i in range(12):
+        serializer.add_serializer(type(f"Unused{i}", (), {}), str)
+    serializer.add_serializer(Money, lambda m: f"{m.cents / 100:.2f}")
+    serializer.add_object_serializer(PointSerializer())
+    return serializer
+
+
+def main(size: int = 10_000, number: int = 10):
+    serializer = build()
+    rows = [
+        [Row(i, "row"), {"id": i}, Money(i), Point(i, i)][i % 4] for i in range(size)
+    ]
+
+    lookup = min(
+        repeat(lambda: [serializer._resolve_single(o) for o in rows], number=number, repeat=5)
+    )
+    cached = min(
+        repeat(lambda: [serializer._serialize_single(o) for o in rows], number=number, repeat=5)
+    )
+    end_to_end = min(repeat(lambda: serializer.serialize(rows), number=number, repeat=5))
+
+    print(f"full lookup:   {lookup / number * 1e3:8.2f} ms per {size} elements")
+    print(f"dispatch:      {cached / number * 1e3:8.2f} ms per {size} elements")
+    print(f"serialize():   {end_to_end / number * 1e3:8.2f} ms per {size} elements")
+
+    clients = [
+        Client(i, "name", 30, Address("city", "0000"), datetime(2024, 1, 1)) for i in range(size)
+    ]
+    encode = dataclass_encoder(Client)
+    deep_copy = min(repeat(lambda: [asdict(c) for c in clients], number=number, repeat=5))
+    compiled = min(repeat(lambda: [encode(c) for c in clients], number=number, repeat=5))
+
+    print(f"asdict:        {deep_copy / number * 1e3:8.2f} ms per {size} nested dataclasses")
+    print(f"encoder:       {compiled / number * 1e3:8.2f} ms per {size} nested dataclasses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Concurrent throughput of I/O bound handlers through the ASGI app.
+
+Fires ``concurrency`` requests at once against a sync handler that blocks
+on ``time.sleep`` inline, the same handler offloaded to the thread pool,
+and an async handler that awaits ``asyncio.sleep`` for the same amount of
+time, and reports requests per second for each.
+
+Run with ``python -m benchmarks.load_async``.
+"""
+import asyncio
+import time
+
+from lunnaris import asgi
+from lunnaris.application import Application
+from lunnaris.handler import get
+
+IO_DELAY = 0.01
+
+
+@get("/sync")
+def blocking():
+    time.sleep(IO_DELAY)
+    return "ok"
+
+
+@get("/offload", run_in_threadpool=True)
+def offloaded():
+    time.sleep(IO_DELAY)
+    return "ok"
+
+
+@get("/async")
+async def non_blocking():
+    await asyncio.sleep(IO_DELAY)
+    return "ok"
+
+
+async def call(app, path: str):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [],
+        "query_string": b"",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, path: str, concurrency: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(call(app, path) for _ in range(concurrency)))
+    return concurrency / (time.perf_counter() - start)
+
+
+def main(concurrency: int = 200):
+    application = Application()
+    application.add_function_handler(blocking)
+    application.add_function_handler(offloaded)
+    application.add_function_handler(non_blocking)
+    app = asgi.create_asgi_app(application)
+
+    for path in ("/sync", "/offload", "/async"):
+        rps = asyncio.run(measure(app, path, concurrency))
+        print(f"{path:9} {rps:10.1f} req/s ({concurrency} concurrent, {IO_DELAY * 1000:.0f} ms I/O)")
+    print(application.executor.metrics())
+    application.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
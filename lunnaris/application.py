@@ -1,14 +1,21 @@
 from types import MappingProxyType
-from typing import Any, Callable, Type
-from .enums import Header
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Type
+from .enums import Header, Method, MimeType, Status
 from .controller import Controller
 from .routes import RouteMatcher
-from .response import Response
+from .response import FileResponse, Response, StreamingResponse
 from .request import Request
 from .handler import RequestHandler, PostMiddleware, PreMiddleware, get_handler
-from .exceptions import HttpException, NotFound
+from .middleware import Middleware, compose, compose_async
+from .exceptions import HttpException, MethodNotAllowed, NotFound
 from .serializer import Serializer
+from .codec import Codec, JsonBackend, negotiate
+from .cache import CacheStore, MemoryStore
+from .compression import Compression, add_vary
+from .conditional import ETag, is_not_modified, not_modified
 from .di import DIContainer
+from .executor import ThreadPool
+from .utils import is_async_callable
 
 
 def exception_handler(e: Exception) -> Response:
@@ -17,7 +24,25 @@ def exception_handler(e: Exception) -> Response:
 
 
 def handle_http_exception(e: HttpException) -> Response:
-    return Response(e.code, str(e), {Header.CONTENT_TYPE: "text/plain"})
+    return Response(
+        e.code, str(e), {Header.CONTENT_TYPE: "text/plain", **(e.headers or {})}
+    )
+
+
+def allowed_methods(methods: dict[str, RequestHandler]) -> str:
+    allow = set(methods)
+    if Method.GET in allow:
+        allow.add(Method.HEAD)
+    allow.add(Method.OPTIONS)
+    return ", ".join(sorted(allow))
+
+
+def without_body(res: Response) -> Response:
+    """Drops the body of a HEAD response, keeping its headers and length."""
+    headers = res.headers.copy()
+    if not isinstance(res, StreamingResponse):
+        headers[Header.CONTENT_LENGTH] = str(len(res.body))
+    return Response(res.status_code, b"", headers)
 
 
 class Application:
@@ -28,19 +53,50 @@ class Application:
         exception_handlers: dict[Type[Exception], Callable[[Exception], Any]] = None,
         pre_middlewares: list[PreMiddleware] = None,
         post_middlewares: list[PostMiddleware] = None,
+        executor: ThreadPool = None,
+        run_in_threadpool: bool = False,
+        max_body_size: int = None,
+        json_backend: JsonBackend = None,
+        stream_threshold: int = None,
+        codecs: list[Codec] = None,
+        compression: Compression = None,
+        etag: ETag = None,
+        cache_store: CacheStore = None,
+        middlewares: list[Middleware] = None,
     ):
         self.router = router or RouteMatcher()
-        self.serializer = serializer or Serializer()
+        self.serializer = serializer or Serializer(json_backend=json_backend)
+        self.json_backend = json_backend or self.serializer.json_backend
+        self.stream_threshold = stream_threshold
+        # Response and body codecs, JSON first as the default
+        self.codecs: tuple[Codec, ...] = (self.json_backend, *(codecs or ()))
+        self.compression = compression
+        # Default ETag policy of GET handlers that don't declare their own
+        self.etag = etag
+        self.cache_store = cache_store or MemoryStore()
         self.pre_middlewares = pre_middlewares or []
         self.post_middlewares = post_middlewares or []
+        # Global middlewares, wrapping routing
+        self.middlewares = list(middlewares or [])
+        self._chain = None
+        self._chain_async = None
         self.exception_handlers = {
             **{
                 HttpException: handle_http_exception,
             },
             **(exception_handlers or {}),
         }
+        self.executor = executor or ThreadPool()
+        self.run_in_threadpool = run_in_threadpool
+        self.max_body_size = max_body_size
         self.container = DIContainer()
+        self.handlers: list[RequestHandler] = []
+        self.frozen = False
         self.__controllers: list[Type[Controller]] = []
+        self.__warmups: list[Callable[["Application"], Any]] = []
+        self.__startup_hooks: list[tuple[Callable, Type | None]] = []
+        self.__shutdown_hooks: list[Callable] = []
+        self.__initialized = False
 
     def add_exception_handler(self, t: Type, callback: Callable):
         self.exception_handlers[t] = callback
@@ -50,42 +106,298 @@ class Application:
             raise ValueError("Invalid controller")
         self.__controllers.append(controller)
 
+    def add_middleware(self, middleware: Middleware):
+        """
+        Adds a global middleware, wrapping routing and every middleware added
+        before it. Usable as a decorator.
+        """
+        if self.frozen:
+            raise RuntimeError("Can't add middlewares to a frozen application")
+        self.middlewares.append(middleware)
+        self._chain = self._chain_async = None
+        return middleware
+
+    def add_warmup(self, callback: Callable[["Application"], Any]):
+        """
+        Registers a callback run with the application once it is frozen, before
+        the first request is served. Callbacks may be coroutine functions.
+        """
+        self.__warmups.append(callback)
+
+    def on_startup(self, callback: Callable = None, provides: Type = None):
+        """
+        Registers a hook run once per worker when the server starts, before the
+        application is frozen. Parameters are resolved from the container like
+        controller constructors, and when `provides` is set the returned value
+        is registered in the container under that key, so pools and clients
+        created here are injected everywhere else. Usable as a decorator.
+        """
+        if callback is None:
+            return lambda callback: self.on_startup(callback, provides)
+        self.__startup_hooks.append((callback, provides))
+        return callback
+
+    def on_shutdown(self, callback: Callable):
+        """
+        Registers a hook run when the server shuts down, in reverse order of
+        registration. Parameters are resolved from the container. Usable as a
+        decorator.
+        """
+        self.__shutdown_hooks.append(callback)
+        return callback
+
     def init(self):
+        if self.__initialized:
+            return
+        self.__initialized = True
+
         for controller_type in self.__controllers:
             instance = self.container.resolve_inners(controller_type)
             for handler in instance.get_handlers():
                 self.add_handler(handler)
-        
+
+    def freeze(self):
+        """
+        Finishes the setup of the application: controllers are resolved, every
+        handler plan and middleware chain is compiled into immutable structures,
+        the route table is frozen and cached dependencies are created. Handlers
+        can't be added afterwards.
+        """
+        if self.frozen:
+            return
+
+        self.init()
+        for handler in self.handlers:
+            handler.freeze()
+            self.compile_route(handler)
+        self.compile_chain()
+        self.router.freeze()
+        self.container.warm()
+        self.frozen = True
+
+    async def startup(self):
+        for callback, provides in self.__startup_hooks:
+            result = self.container.resolve_inners(callback)
+            if is_async_callable(callback):
+                result = await result
+            if provides is not None:
+                self.container.add_instance(provides, result)
+
+        self.freeze()
+        for callback in self.__warmups:
+            result = callback(self)
+            if is_async_callable(callback):
+                await result
+
+    async def shutdown(self):
+        try:
+            for callback in reversed(self.__shutdown_hooks):
+                result = self.container.resolve_inners(callback)
+                if is_async_callable(callback):
+                    await result
+        finally:
+            self.executor.shutdown(wait=False)
 
     def add_handler(self, handler: RequestHandler):
+        """
+        Registers a copy of `handler`, configured and compiled for this
+        application, and returns it. The handler passed in is left as it is,
+        so the same one can be added to several applications.
+        """
+        if self.frozen:
+            raise RuntimeError("Can't add handlers to a frozen application")
+        handler = handler.copy()
         handler.add_pre_middlewares(self.pre_middlewares, "before")
         handler.add_post_middlewares(self.post_middlewares, "after")
+        handler.json_backend = self.json_backend
+        handler.codecs = self.codecs
+        handler.container = self.container
+        if handler.etag is None and handler.method == Method.GET:
+            handler.etag = self.etag
+        if handler.cache is not None:
+            # Negotiated responses depend on the Accept header too
+            handler.cache.bind(
+                self.cache_store, [Header.ACCEPT] if len(self.codecs) > 1 else []
+            )
+        handler.compile()
+        offload = handler.run_in_threadpool
+        if offload is None:
+            offload = self.run_in_threadpool
+        if offload and not handler.is_async:
+            handler.executor = self.executor
+        self.compile_route(handler)
         self.router.add_route(handler)
+        self.handlers.append(handler)
+        return handler
 
     def add_function_handler(self, handler: Callable):
         handler: RequestHandler | None = get_handler(handler, None)
         if handler is None:
             raise ValueError("Invalid handler")
-        self.add_handler(handler)
+        return self.add_handler(handler)
+
+    def compile_route(self, handler: RequestHandler):
+        """
+        Nests the middlewares of the handler around the call of the handler
+        (and its response cache) into `handler.chain` and `handler.chain_async`.
+        """
+        cache = handler.cache if handler.method == Method.GET else None
+        if cache is not None:
+            # Pre-middlewares run before the lookup, so hits go through them too
+            def endpoint(req: Request) -> Response:
+                req = handler.prepare(req)
+                return cache.get_or_compute(
+                    req, lambda: self.call_handler(handler, req, prepared=True)
+                )
+
+            async def endpoint_async(req: Request) -> Response:
+                req = await handler.prepare_async(req)
+                return await cache.get_or_compute_async(
+                    req, lambda: self.call_handler_async(handler, req, prepared=True)
+                )
+        else:
+            def endpoint(req: Request) -> Response:
+                return self.call_handler(handler, req)
+
+            def endpoint_async(req: Request) -> Awaitable[Response]:
+                return self.call_handler_async(handler, req)
+
+        handler.chain = compose(handler.middleware, endpoint)
+        handler.chain_async = compose_async(handler.middleware, endpoint_async, self.executor)
+
+    def compile_chain(self):
+        """Nests the global middlewares around routing."""
+        self._chain = compose(self.middlewares, self.dispatch)
+        self._chain_async = compose_async(self.middlewares, self.dispatch_async, self.executor)
 
     def run(self, req: Request) -> Response:
+        if self._chain is None:
+            self.compile_chain()
         try:
-            match = self.router.match(req.path, req.method)
-            if not match:
-                raise NotFound(f"Path {req.path} not found")
+            res = self._chain(req)
+        except Exception as e:
+            res = self.handle_exception(e)
+        try:
+            return self.finalize_response(req, res)
+        finally:
+            self.teardown(req)
 
-            handler, params = match
-            req.params = MappingProxyType(params)
-            return self.handle_response(handler(req))
+    async def run_async(self, req: Request) -> Response:
+        if self._chain_async is None:
+            self.compile_chain()
+        # Set before the chain, middlewares may read the body already
+        if req.max_body_size is None:
+            req.max_body_size = self.max_body_size
+        try:
+            res = await self._chain_async(req)
+        except Exception as e:
+            res = self.handle_exception(e)
+        return await self.finalize_response_async(req, res)
+
+    def teardown(self, req: Request):
+        """Runs the teardown of the request scoped dependencies of `req`."""
+        scope, req.dependencies = req.dependencies, None
+        if scope is not None:
+            scope.close()
+
+    async def teardown_async(self, req: Request):
+        """
+        Async version of `teardown`. `Application.run_async` leaves it to the
+        caller, so the ASGI layer runs it once the response has been sent.
+        """
+        scope, req.dependencies = req.dependencies, None
+        if scope is not None:
+            await scope.aclose()
+
+    def dispatch(self, req: Request) -> Response:
+        """
+        Innermost layer of the global middlewares: routes the request and
+        runs the chain of the handler, turning errors into responses.
+        """
+        try:
+            routed = self.route(req)
+            if isinstance(routed, Response):
+                return routed
+            return routed.chain(req)
+        except Exception as e:
+            return self.handle_exception(e)
+
+    async def dispatch_async(self, req: Request) -> Response:
+        try:
+            routed = self.route(req)
+            if isinstance(routed, Response):
+                return routed
+            return await routed.chain_async(req)
         except Exception as e:
             return self.handle_exception(e)
 
-    def handle_response(self, response, status=200, headers={}) -> Response:
+    def call_handler(
+        self, handler: RequestHandler, req: Request, prepared: bool = False
+    ) -> Response:
+        """
+        Calls the handler and builds its response. With `prepared`, `req`
+        went through the pre-middlewares of the handler already.
+        """
+        res = self.handle_response(
+            handler.invoke(req) if prepared else handler(req), request=req
+        )
+        if handler.etag is not None:
+            res = handler.etag.apply(res)
+        return res
+
+    async def call_handler_async(
+        self, handler: RequestHandler, req: Request, prepared: bool = False
+    ) -> Response:
+        if handler.buffers_body:
+            await req.read()
+        if prepared:
+            result = await handler.invoke_async(req)
+        else:
+            result = await handler.call_async(req)
+        res = self.handle_response(result, request=req)
+        if handler.etag is not None:
+            res = handler.etag.apply(res)
+        return res
+
+    def route(self, req: Request) -> RequestHandler | Response:
+        """
+        Finds the handler for the request. HEAD falls back to the GET
+        handler and OPTIONS is answered from the method table of the route
+        when it has no handler of its own, so the returned value is either
+        the handler to run or the final response.
+        """
+        resolved = self.router.resolve(req.path)
+        if resolved is None:
+            raise NotFound(f"Path {req.path} not found")
+
+        methods, params = resolved
+        req.params = MappingProxyType(params)
+
+        handler = methods.get(req.method)
+        if handler is not None:
+            return handler
+        if req.method == Method.HEAD and Method.GET in methods:
+            return methods[Method.GET]
+
+        allow = allowed_methods(methods)
+        if req.method == Method.OPTIONS:
+            return Response(
+                204,
+                b"",
+                {Header.ALLOW: allow, Header.ACCESS_CONTROL_ALLOW_METHODS: allow},
+            )
+        raise MethodNotAllowed(
+            f"Method {req.method} not allowed for {req.path}", {Header.ALLOW: allow}
+        )
+
+    def handle_response(
+        self, response, status=200, headers=None, request: Request = None
+    ) -> Response:
         if isinstance(response, Response):
             return response
 
         c_status = status
-        c_headers = headers
+        c_headers = dict(headers or {})
         c_body = response
 
         if isinstance(response, tuple):
@@ -95,9 +407,98 @@ class Application:
                 c_body, c_status, _headers = response
                 c_headers.update(_headers)
 
-        c_body, content_type = self.serializer.serialize(c_body)
-        c_headers[Header.CONTENT_TYPE] = content_type
-        return Response(c_status, c_body, c_headers)
+        codec = None
+        negotiated = request is not None and len(self.codecs) > 1
+        if negotiated:
+            codec = negotiate(request.headers.get(Header.ACCEPT), self.codecs)
+
+        if isinstance(c_body, (Iterator, AsyncIterator)):
+            # Only JSON is encoded incrementally, other codecs get the whole body
+            if codec is None or codec is self.json_backend:
+                if isinstance(c_body, AsyncIterator):
+                    content = self.serializer.aiter_encode(c_body)
+                else:
+                    content = self.serializer.iter_encode(c_body)
+                c_headers[Header.CONTENT_TYPE] = MimeType.JSON
+            else:
+                content = self._encode_collected(c_body, codec)
+                c_headers[Header.CONTENT_TYPE] = codec.media_type
+            res = StreamingResponse(c_status, content, c_headers)
+        elif (
+            isinstance(c_body, list)
+            and self.stream_threshold is not None
+            and len(c_body) >= self.stream_threshold
+            and (codec is None or codec is self.json_backend)
+        ):
+            c_headers[Header.CONTENT_TYPE] = MimeType.JSON
+            res = StreamingResponse(c_status, self.serializer.iter_encode(c_body), c_headers)
+        else:
+            c_body, content_type = self.serializer.encode(c_body, codec)
+            c_headers[Header.CONTENT_TYPE] = content_type
+            res = Response(c_status, c_body, c_headers)
+
+        if negotiated:
+            # Merged with any Vary the handler returned
+            add_vary(res.headers, Header.ACCEPT)
+        return res
+
+    def _encode_collected(
+        self, items: Iterator | AsyncIterator, codec: Codec
+    ) -> Iterator[bytes] | AsyncIterator[bytes]:
+        """
+        Collects an iterator of items and encodes them as a single chunk with
+        `codec`. Sync iterators are collected while the stream is consumed,
+        so in a worker thread when the response is sent through ASGI.
+        """
+        if isinstance(items, AsyncIterator):
+            async def encode_async() -> AsyncIterator[bytes]:
+                yield self.serializer.encode([item async for item in items], codec)[0]
+
+            return encode_async()
+
+        def encode() -> Iterator[bytes]:
+            yield self.serializer.encode(list(items), codec)[0]
+
+        return encode()
+
+    def evaluate_conditions(self, req: Request, res: Response) -> Response:
+        """
+        Answers conditional GET and HEAD requests with a bodyless 304 when
+        the client's validators match the response, and applies `Range` to
+        file responses otherwise.
+        """
+        if req.method not in (Method.GET, Method.HEAD) or res.status_code != Status.OK:
+            return res
+        if is_not_modified(
+            req.headers, res.headers.get(Header.ETAG), res.headers.get(Header.LAST_MODIFIED)
+        ):
+            return not_modified(res.headers)
+        if isinstance(res, FileResponse):
+            res.apply_range(req.headers)
+        return res
+
+    def finalize_response(self, req: Request, res: Response) -> Response:
+        res = self.evaluate_conditions(req, res)
+        if self.compression is not None:
+            if res.status_code == Status.NOT_MODIFIED:
+                # Every 304, from validators or version hooks, goes through here
+                res = self.compression.not_modified(req.headers, res)
+            else:
+                res = self.compression.compress(req.headers, res)
+        if req.method == Method.HEAD:
+            res = without_body(res)
+        return res
+
+    async def finalize_response_async(self, req: Request, res: Response) -> Response:
+        res = self.evaluate_conditions(req, res)
+        if self.compression is not None:
+            if res.status_code == Status.NOT_MODIFIED:
+                res = self.compression.not_modified(req.headers, res)
+            else:
+                res = await self.compression.compress_async(req.headers, res, self.executor)
+        if req.method == Method.HEAD:
+            res = without_body(res)
+        return res
 
     def handle_exception(self, e: Exception) -> Response:
         for t, callback in self.exception_handlers.items():
@@ -1,44 +1,31 @@
+from .query import parse_query_string  # noqa: F401 - re-exported
 from .request import Request
-from .response import Response
-
-
-def parse_query_string(query_string: str) -> dict[str, str]:
-    query: dict[str, str] = {}
-    for v in query_string.decode().split("&"):
-        vals = v.split("=")
-        if len(vals) == 2:
-            key, value = vals
-            query[key] = value
-    
-    return query
+from .executor import ThreadPool
+from .response import FileResponse, Response, StreamingResponse
 
 
 async def read_body(recieve) -> bytes:
-    body = b''
+    chunks = []
     more_body = True
 
     while more_body:
         message = await recieve()
-        body += message.get("body", b"")
+        chunks.append(message.get("body", b""))
         more_body = message.get("more_body", False)
 
-    return body
+    return b"".join(chunks)
 
 
 async def read_request(scope: dict, recieve) -> Request:
     if scope["type"] != "http":
         return
 
-    return Request(
-        method=scope["method"],
-        path=scope["path"],
-        headers={k.decode(): v.decode() for k, v in scope["headers"]},
-        query=parse_query_string(scope["query_string"]),
-        body=await read_body(recieve)
-    )
+    return Request.from_scope(scope, recieve)
 
 
-async def send_response(response: Response, send) -> None:
+async def send_response(
+    response: Response, send, scope: dict = None, executor: ThreadPool = None
+) -> None:
     await send({
         "type": "http.response.start",
         "status": response.status_code,
@@ -48,15 +35,95 @@ async def send_response(response: Response, send) -> None:
         ],
     })
 
+    if isinstance(response, FileResponse):
+        await send_file(response, send, (scope or {}).get("extensions") or {}, executor)
+        return
+
+    if isinstance(response, StreamingResponse):
+        await send_stream(response, send, executor)
+        return
+
     await send({
         "type": "http.response.body",
         "body": response.body,
     })
 
+
+async def send_stream(
+    response: StreamingResponse, send, executor: ThreadPool = None
+) -> None:
+    # Awaiting `send` for every chunk lets the server apply backpressure: the
+    # next chunk is only produced once the previous one has been accepted.
+    async for chunk in response.iter_chunks(executor):
+        await send({
+            "type": "http.response.body",
+            "body": chunk,
+            "more_body": True,
+        })
+
+    await send({
+        "type": "http.response.body",
+        "body": b"",
+        "more_body": False,
+    })
+
+async def send_file(
+    response: FileResponse, send, extensions: dict, executor: ThreadPool = None
+) -> None:
+    if "http.response.pathsend" in extensions and response.range is None:
+        await send({
+            "type": "http.response.pathsend",
+            "path": response.path,
+        })
+        return
+
+    if "http.response.zerocopysend" in extensions and response.count > 0:
+        with open(response.path, "rb") as file:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file,
+                "offset": response.offset,
+                "count": response.count,
+                "more_body": False,
+            })
+        return
+
+    await send_stream(response, send, executor)
+
+
+async def handle_lifespan(app, recieve, send) -> None:
+    while True:
+        message = await recieve()
+        if message["type"] == "lifespan.startup":
+            try:
+                await app.startup()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            try:
+                await app.shutdown()
+            except Exception as e:
+                await send({"type": "lifespan.shutdown.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
 def create_asgi_app(app):
     async def asgi_app(scope, recieve, send):
+        if scope["type"] == "lifespan":
+            await handle_lifespan(app, recieve, send)
+            return
+        if scope["type"] != "http":
+            return
+
         req = await read_request(scope, recieve)
-        res = app.run(req)
-        await send_response(res, send)
+        try:
+            res = await app.run_async(req)
+            await send_response(res, send, scope, app.executor)
+        finally:
+            await app.teardown_async(req)
     
     return asgi_app
\ No newline at end of file
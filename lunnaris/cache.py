@@ -0,0 +1,243 @@
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable, Protocol
+from .enums import Header, Method, Status
+from .request import Request
+from .response import Response, StreamingResponse
+
+
+class CachedResponse:
+    """An encoded response as kept by a cache store."""
+
+    __slots__ = ("status_code", "body", "headers", "size")
+
+    def __init__(self, status_code: int, body: bytes, headers: dict[str, str]):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers.items())
+
+    @classmethod
+    def from_response(cls, response: Response) -> "CachedResponse":
+        return cls(response.status_code, response.body, response.headers.dict())
+
+    def response(self) -> Response:
+        # Later stages (compression, HEAD) may replace headers, so every hit
+        # gets its own copy.
+        return Response(self.status_code, self.body, dict(self.headers))
+
+
+class CacheStore(Protocol):
+    """
+    Storage backend of `ResponseCache`. Stores must be safe to use from
+    several threads; entries are expected to expire `ttl` seconds after
+    being set.
+    """
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        pass
+
+    def set(self, key: Hashable, entry: CachedResponse, ttl: float):
+        pass
+
+    def delete(self, key: Hashable):
+        pass
+
+    def clear(self):
+        pass
+
+
+class MemoryStore:
+    """
+    In-process LRU store bounded both by number of entries and by the total
+    size of the cached bodies and headers.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.__entries: OrderedDict[Hashable, tuple[float, CachedResponse]] = OrderedDict()
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        with self.__lock:
+            item = self.__entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires <= monotonic():
+                self._remove(key)
+                return None
+            self.__entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Hashable, entry: CachedResponse, ttl: float):
+        if entry.size > self.max_bytes:
+            return
+        with self.__lock:
+            if key in self.__entries:
+                self._remove(key)
+            self.__entries[key] = (monotonic() + ttl, entry)
+            self.size += entry.size
+            while len(self.__entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self.__entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def delete(self, key: Hashable):
+        with self.__lock:
+            if key in self.__entries:
+                self._remove(key)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable):
+        _, entry = self.__entries.pop(key)
+        self.size -= entry.size
+
+
+class ResponseCache:
+    """
+    Caches the encoded responses of a GET handler for `ttl` seconds.
+
+    Entries are keyed on the path, the `query` params (all of them when
+    None) and the `headers` the response varies on, or on whatever `key`
+    returns for the request. Only complete 200 responses are stored, unless
+    they are marked `Cache-Control: no-store` or `private`.
+
+    Concurrent misses for the same key are coalesced: the handler runs once
+    and the other requests wait for its response, on a lock in the sync path
+    and on a future in the async one.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        query: list[str] = None,
+        headers: list[str] = None,
+        store: CacheStore = None,
+        key: Callable[[Request], Hashable] = None,
+    ):
+        self.ttl = ttl
+        self.query = tuple(query) if query is not None else None
+        self.headers = tuple(h.lower() for h in headers or ())
+        self.store = store
+        self.key_func = key
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.__locks: dict[Hashable, Lock] = {}
+        self.__pending: dict[Hashable, asyncio.Future] = {}
+        self.__lock = Lock()
+
+    def copy(self) -> "ResponseCache":
+        """An unbound cache with the same settings and no metrics."""
+        return ResponseCache(self.ttl, self.query, self.headers, self.store, self.key_func)
+
+    def bind(self, store: CacheStore, headers: list[str] = ()):
+        """Sets the default store and extra `Vary` headers of the application."""
+        if self.store is None:
+            self.store = store
+        for header in headers:
+            if header.lower() not in self.headers:
+                self.headers += (header.lower(),)
+
+    def key(self, request: Request) -> Hashable:
+        if self.key_func is not None:
+            return self.key_func(request)
+
+        query = request.query
+        if self.query is None:
+            query_key = tuple(sorted(query.multi_items()))
+        else:
+            query_key = tuple(tuple(query.getlist(name)) for name in self.query)
+        headers = request.headers
+        # HEAD shares the entries of GET
+        return (
+            Method.GET,
+            request.path,
+            query_key,
+            tuple(headers.get(name) for name in self.headers),
+        )
+
+    def cacheable(self, response: Response) -> bool:
+        if response.status_code != Status.OK or isinstance(response, StreamingResponse):
+            return False
+        cache_control = response.headers.get(Header.CACHE_CONTROL, "").lower()
+        return "no-store" not in cache_control and "private" not in cache_control
+
+    def _store(self, key: Hashable, response: Response) -> CachedResponse | None:
+        if not self.cacheable(response):
+            return None
+        entry = CachedResponse.from_response(response)
+        self.store.set(key, entry, self.ttl)
+        return entry
+
+    def get_or_compute(self, request: Request, compute: Callable[[], Response]) -> Response:
+        key = self.key(request)
+        entry = self.store.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry.response()
+
+        with self.__lock:
+            lock = self.__locks.get(key)
+            if lock is None:
+                lock = self.__locks[key] = Lock()
+
+        try:
+            with lock:
+                entry = self.store.get(key)
+                if entry is not None:
+                    self.coalesced += 1
+                    return entry.response()
+
+                self.misses += 1
+                response = compute()
+                self._store(key, response)
+                return response
+        finally:
+            with self.__lock:
+                self.__locks.pop(key, None)
+
+    async def get_or_compute_async(
+        self, request: Request, compute: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        key = self.key(request)
+        entry = self.store.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry.response()
+
+        pending = self.__pending.get(key)
+        if pending is not None:
+            entry = await asyncio.shield(pending)
+            if entry is not None:
+                self.coalesced += 1
+                return entry.response()
+            # The response couldn't be shared, so this request runs on its own.
+            return await compute()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[key] = future
+        entry = None
+        try:
+            response = await compute()
+            entry = self._store(key, response)
+            return response
+        finally:
+            # On errors waiters get None and run the handler themselves.
+            future.set_result(entry)
+            del self.__pending[key]
+
+    def metrics(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
@@ -0,0 +1,158 @@
+import json
+from functools import cache, lru_cache
+from typing import Any, Protocol
+from .enums import MimeType
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+
+class Codec(Protocol):
+    name: str
+    media_type: str
+
+    def dumps(self, obj: Any) -> bytes:
+        pass
+
+    def loads(self, data: bytes | str) -> Any:
+        pass
+
+
+class JsonBackend(Codec, Protocol):
+    pass
+
+
+class StdlibJson:
+    name = "json"
+    media_type = MimeType.JSON
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    name = "orjson"
+    media_type = MimeType.JSON
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes | str) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecBackend:
+    name = "msgspec"
+    media_type = MimeType.JSON
+
+    def __init__(self) -> None:
+        if msgspec is None:
+            raise ImportError("msgspec is not installed")
+        self.encoder = msgspec.json.Encoder()
+        self.decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.encoder.encode(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        return self.decoder.decode(data)
+
+
+@cache
+def default_json_backend() -> JsonBackend:
+    """Picks orjson, then msgspec, when installed and the stdlib otherwise."""
+    if orjson is not None:
+        return OrjsonBackend()
+    if msgspec is not None:
+        return MsgspecBackend()
+    return StdlibJson()
+
+
+class MsgPackCodec:
+    name = "msgpack"
+    media_type = MimeType.MSGPACK
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes | str) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class CborCodec:
+    name = "cbor"
+    media_type = MimeType.CBOR
+
+    def __init__(self) -> None:
+        if cbor2 is None:
+            raise ImportError("cbor2 is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        return cbor2.dumps(obj)
+
+    def loads(self, data: bytes | str) -> Any:
+        return cbor2.loads(data)
+
+
+def _parse_accept(accept: str) -> list[tuple[str, float]]:
+    ranges = []
+    for item in accept.split(","):
+        media_type, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = media_type.strip().lower()
+        if media_type and quality > 0:
+            ranges.append((media_type, quality))
+    ranges.sort(key=lambda r: r[1], reverse=True)
+    return ranges
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept: str | None, codecs: tuple[Codec, ...]) -> Codec:
+    """
+    Picks the codec matching the highest quality media range of an `Accept`
+    header. The first codec is the default, used for wildcards and when
+    nothing in the header is supported.
+    """
+    if accept:
+        for media_range, _ in _parse_accept(accept):
+            if media_range in ("*/*", "application/*"):
+                return codecs[0]
+            for codec in codecs:
+                if codec.media_type == media_range:
+                    return codec
+    return codecs[0]
@@ -0,0 +1,320 @@
+import zlib
+from functools import lru_cache
+from typing import AsyncIterator, Protocol
+from .enums import Header, MimeType, Status
+from .exceptions import ServiceUnavailable
+from .executor import ThreadPool
+from .response import FileResponse, Response, StreamingResponse
+from .types import Headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+class StreamCompressor(Protocol):
+    def compress(self, chunk: bytes) -> bytes:
+        """Compresses a chunk and flushes it, so it can be sent right away."""
+
+    def finish(self) -> bytes:
+        pass
+
+
+class Encoder(Protocol):
+    name: str
+    level: int
+
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    def stream(self) -> StreamCompressor:
+        pass
+
+
+class _ZlibStream:
+    def __init__(self, level: int) -> None:
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int = 6) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def stream(self) -> StreamCompressor:
+        return _ZlibStream(self.level)
+
+
+class _BrotliStream:
+    def __init__(self, level: int) -> None:
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self.compressor.process(chunk) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, level: int = 4) -> None:
+        if brotli is None:
+            raise ImportError("brotli is not installed")
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=self.level)
+
+    def stream(self) -> StreamCompressor:
+        return _BrotliStream(self.level)
+
+
+class _ZstdStream:
+    def __init__(self, level: int) -> None:
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self.compressor.compress(chunk) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int = 3) -> None:
+        if zstandard is None:
+            raise ImportError("zstandard is not installed")
+        self.level = level
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def stream(self) -> StreamCompressor:
+        return _ZstdStream(self.level)
+
+
+def available_encoders() -> tuple[Encoder, ...]:
+    """Brotli and zstd when installed, then gzip, in order of preference."""
+    encoders = []
+    if brotli is not None:
+        encoders.append(BrotliEncoder())
+    if zstandard is not None:
+        encoders.append(ZstdEncoder())
+    encoders.append(GzipEncoder())
+    return tuple(encoders)
+
+
+@lru_cache(maxsize=256)
+def select_encoder(
+    accept_encoding: str | None, encoders: tuple[Encoder, ...]
+) -> Encoder | None:
+    """
+    Picks the encoder with the highest quality in an `Accept-Encoding`
+    header, ties going to the first one in `encoders`. Returns None when the
+    client accepts none of them.
+    """
+    if not accept_encoding:
+        return None
+
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    selected, best = None, 0.0
+    for encoder in encoders:
+        quality = qualities.get(encoder.name, wildcard)
+        if quality > best:
+            selected, best = encoder, quality
+    return selected
+
+
+def add_vary(headers: Headers, value: str):
+    vary = headers.get(Header.VARY)
+    if not vary:
+        headers[Header.VARY] = value
+    elif vary != "*" and value.lower() not in (
+        v.strip().lower() for v in vary.split(",")
+    ):
+        headers[Header.VARY] = f"{vary}, {value}"
+
+
+def _weaken_etag(headers: Headers):
+    # Encoded bodies aren't byte-identical to the identity representation
+    etag = headers.get(Header.ETAG)
+    if etag and not etag.startswith("W/"):
+        headers[Header.ETAG] = f"W/{etag}"
+
+
+class Compression:
+    """
+    Compresses response bodies with the best encoding the client accepts.
+
+    Bodies smaller than `minimum_size`, already encoded responses and media
+    types that are compressed already (`skip_types`) are sent as they are.
+    Streaming and file responses are compressed chunk by chunk. On the async
+    path, bodies and chunks of at least `offload_size` bytes are compressed
+    in the application thread pool so the event loop isn't blocked.
+    """
+
+    skip_types = frozenset({
+        MimeType.PNG,
+        MimeType.JPG,
+        MimeType.ICO,
+        MimeType.WOFF,
+        MimeType.WOFF2,
+        "image/gif",
+        "image/webp",
+        "application/gzip",
+        "application/zip",
+        "application/zstd",
+    })
+
+    def __init__(
+        self,
+        encoders: list[Encoder] = None,
+        minimum_size: int = 500,
+        offload_size: int = 256 * 1024,
+        skip_types: set[str] = None,
+    ):
+        self.encoders = tuple(encoders) if encoders else available_encoders()
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        if skip_types is not None:
+            self.skip_types = frozenset(skip_types)
+
+    def compressible(self, response: Response) -> bool:
+        if response.status_code < 200 or response.status_code in (
+            Status.NO_CONTENT,
+            Status.PARTIAL_CONTENT,
+            Status.NOT_MODIFIED,
+        ):
+            return False
+        if Header.CONTENT_ENCODING in response.headers:
+            return False
+
+        content_type = response.headers.get(Header.CONTENT_TYPE, "")
+        if content_type.partition(";")[0].strip().lower() in self.skip_types:
+            return False
+
+        if isinstance(response, FileResponse):
+            return response.range is None and response.size >= self.minimum_size
+        if isinstance(response, StreamingResponse):
+            return True
+        return len(response.body) >= self.minimum_size
+
+    def negotiate(
+        self, request_headers: Headers, response: Response
+    ) -> tuple[Encoder | None, Headers]:
+        """
+        Returns the encoder for the response, if any, and a copy of its
+        headers with `Vary` updated when the body depends on the encoding.
+        """
+        if not self.compressible(response):
+            return None, response.headers
+
+        headers = response.headers.copy()
+        add_vary(headers, Header.ACCEPT_ENCODING)
+        encoder = select_encoder(request_headers.get(Header.ACCEPT_ENCODING), self.encoders)
+        if encoder is not None:
+            headers[Header.CONTENT_ENCODING] = encoder.name
+            for name in (Header.CONTENT_LENGTH, Header.ACCEPT_RANGES):
+                if name in headers:
+                    del headers[name]
+            _weaken_etag(headers)
+        return encoder, headers
+
+    def not_modified(self, request_headers: Headers, response: Response) -> Response:
+        """
+        Gives a 304 the `Vary` and ETag of the encoded 200 it stands for. The
+        body of that 200 isn't at hand, so it is taken as compressible.
+        """
+        add_vary(response.headers, Header.ACCEPT_ENCODING)
+        if select_encoder(request_headers.get(Header.ACCEPT_ENCODING), self.encoders):
+            _weaken_etag(response.headers)
+        return response
+
+    def compress(self, request_headers: Headers, response: Response) -> Response:
+        encoder, headers = self.negotiate(request_headers, response)
+        if encoder is None:
+            response.headers = headers
+            return response
+
+        if isinstance(response, StreamingResponse):
+            return StreamingResponse(
+                response.status_code, self.iter_compressed(encoder, response), headers
+            )
+        return Response(response.status_code, encoder.compress(response.body), headers)
+
+    async def compress_async(
+        self, request_headers: Headers, response: Response, executor: ThreadPool
+    ) -> Response:
+        encoder, headers = self.negotiate(request_headers, response)
+        if encoder is None:
+            response.headers = headers
+            return response
+
+        if isinstance(response, StreamingResponse):
+            return StreamingResponse(
+                response.status_code,
+                self.iter_compressed(encoder, response, executor),
+                headers,
+            )
+        body = await self._run(executor, encoder.compress, response.body)
+        return Response(response.status_code, body, headers)
+
+    async def iter_compressed(
+        self, encoder: Encoder, response: StreamingResponse, executor: ThreadPool = None
+    ) -> AsyncIterator[bytes]:
+        compressor = encoder.stream()
+        async for chunk in response.iter_chunks(executor):
+            if executor is not None:
+                chunk = await self._run(executor, compressor.compress, chunk)
+            else:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+        yield compressor.finish()
+
+    async def _run(self, executor: ThreadPool, compress, data: bytes) -> bytes:
+        if len(data) < self.offload_size:
+            return compress(data)
+        try:
+            return await executor.run(compress, data)
+        except ServiceUnavailable:
+            # The handler already ran, so a full pool shouldn't turn the
+            # response into an error: compress on the loop instead.
+            return compress(data)
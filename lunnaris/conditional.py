@@ -0,0 +1,89 @@
+from email.utils import parsedate_to_datetime
+from hashlib import blake2b
+from typing import Any, Callable
+from .enums import Header, Status
+from .response import Response, StreamingResponse
+from .types import Headers
+
+# Headers a 304 keeps from the response it replaces (RFC 9110, 15.4.5)
+_NOT_MODIFIED_HEADERS = (
+    Header.ETAG,
+    Header.LAST_MODIFIED,
+    Header.VARY,
+    Header.CACHE_CONTROL,
+    Header.EXPIRES,
+    Header.DATE,
+    "content-location",
+)
+
+
+class ETag:
+    """
+    ETag policy of a handler. Without `version`, the tag is a hash of the
+    encoded body, so the handler still runs but unchanged bodies are
+    answered with a bodyless 304. With `version`, a cheap callable whose
+    parameters are bound like the handler's (path params, `Request`,
+    mappers) returns the key the tag is built from, and the handler isn't
+    called at all when the client already has it. A `None` version falls
+    back to the body hash.
+    """
+
+    def __init__(self, weak: bool = True, version: Callable[..., Any] = None):
+        self.weak = weak
+        self.version = version
+
+    def format(self, value: Any) -> str:
+        return f'W/"{value}"' if self.weak else f'"{value}"'
+
+    def apply(self, response: Response) -> Response:
+        if (
+            response.status_code == Status.OK
+            and not isinstance(response, StreamingResponse)
+            and Header.ETAG not in response.headers
+        ):
+            response.headers[Header.ETAG] = self.format(make_etag(response.body))
+        return response
+
+
+def make_etag(body: bytes) -> str:
+    return blake2b(body, digest_size=8).hexdigest()
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an ETag against an `If-None-Match` list."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _opaque(etag)
+    return any(_opaque(tag) == opaque for tag in if_none_match.split(","))
+
+
+def is_not_modified(
+    request_headers: Headers, etag: str = None, last_modified: str = None
+) -> bool:
+    """
+    Evaluates `If-None-Match`, or `If-Modified-Since` when the former is
+    absent, against the validators of the current representation.
+    """
+    if_none_match = request_headers.get(Header.IF_NONE_MATCH)
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get(Header.IF_MODIFIED_SINCE)
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+            if_modified_since
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified(headers: Headers | dict[str, str]) -> Response:
+    kept = {name: headers[name] for name in _NOT_MODIFIED_HEADERS if name in headers}
+    return Response(Status.NOT_MODIFIED, b"", kept)
@@ -1,17 +1,21 @@
 from .handler import PreMiddleware, PostMiddleware, get_handler, RequestHandler
+from .middleware import Middleware
 
 
 class Controller:
     __route__ = None
-    def __init__(self, pre_middlewares: list[PreMiddleware] = None, post_middlewares: list[PostMiddleware] = None) -> None:
+    def __init__(self, pre_middlewares: list[PreMiddleware] = None, post_middlewares: list[PostMiddleware] = None, middlewares: list[Middleware] = None) -> None:
         self.pre_middlewares = pre_middlewares or []
         self.post_middlewares = post_middlewares or []
+        self.middlewares = middlewares or []
 
     def get_handlers(self) -> list[RequestHandler]:
         endpoints = []
         for name, element in vars(self.__class__).items():
             ep = get_handler(element)
             if ep is not None:
+                # The class attribute is shared by every instance and application
+                ep = ep.copy()
                 if self.__route__:
                     controller = self.__route__.strip("/")
                     path = ep.path.strip("/")
@@ -23,5 +27,6 @@ class Controller:
                 ep.callback = getattr(self, name)
                 ep.add_post_middlewares(self.post_middlewares, 'after')
                 ep.add_pre_middlewares(self.pre_middlewares, 'before')
+                ep.add_middlewares(self.middlewares, 'before')
                 endpoints.append(ep)
         return endpoints
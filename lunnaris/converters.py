@@ -0,0 +1,67 @@
+from math import isfinite
+from typing import Any, Callable
+from uuid import UUID
+
+Converter = Callable[[str], Any]
+"""
+A converter takes a path segment and returns its typed value. It raises
+ValueError when the segment does not match, so the router can try the next
+candidate route.
+"""
+
+
+def convert_str(segment: str) -> str:
+    if not segment:
+        raise ValueError("Empty segment")
+    return segment
+
+
+def convert_int(segment: str) -> int:
+    digits = segment[1:] if segment[:1] == "-" else segment
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"Invalid int segment {segment}")
+    return int(segment)
+
+
+def convert_float(segment: str) -> float:
+    value = float(segment)
+    if not isfinite(value):
+        raise ValueError(f"Invalid float segment {segment}")
+    return value
+
+
+def convert_uuid(segment: str) -> UUID:
+    return UUID(segment)
+
+
+PATH = "path"
+"""The `path` converter matches the rest of the url, slashes included."""
+
+converters: dict[str, Converter] = {
+    "str": convert_str,
+    "int": convert_int,
+    "float": convert_float,
+    "uuid": convert_uuid,
+    PATH: convert_str,
+}
+
+
+def register_converter(name: str, converter: Converter):
+    converters[name] = converter
+
+
+def parse_segment(segment: str) -> tuple[str, str | None] | None:
+    """
+    Returns (name, converter name) for `{name}` or `{name:converter}`
+    segments and None for static segments. Untyped parameters have no
+    converter and are matched as raw strings.
+    """
+    if not (segment.startswith("{") and segment.endswith("}")):
+        return None
+
+    name, _, type_name = segment[1:-1].partition(":")
+    if not type_name:
+        return name, None
+    if type_name not in converters:
+        raise ValueError(f"Unknown path converter {type_name}")
+    return name, type_name
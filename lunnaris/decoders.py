@@ -0,0 +1,224 @@
+from dataclasses import MISSING, fields, is_dataclass
+from datetime import date, datetime, time
+from enum import Enum
+from functools import cache
+from types import NoneType, UnionType
+from typing import Any, Callable, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+from uuid import UUID
+
+from .codec import Codec, MsgspecBackend, msgspec
+from .exceptions import BadRequest, ValidationError
+
+T = TypeVar("T")
+
+INVALID = object()
+"""Returned by field decoders after recording an error."""
+
+FieldDecoder = Callable[[Any, str, list], Any]
+"""Takes (value, path, errors) and returns the converted value or INVALID."""
+
+
+def _passthrough(value: Any, path: str, errors: list) -> Any:
+    return value
+
+
+def _scalar(type_: type, accepts: tuple[type, ...], name: str) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if isinstance(value, accepts) and not (isinstance(value, bool) and bool not in accepts):
+            return type_(value)
+        errors.append((path, f"Expected {name}, got {type(value).__name__}"))
+        return INVALID
+
+    return decode
+
+
+def _parsed(type_: type, parse: Callable[[Any], Any]) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        try:
+            return parse(value)
+        except (TypeError, ValueError):
+            errors.append((path, f"Invalid {type_.__name__} {value!r}"))
+            return INVALID
+
+    return decode
+
+
+def _optional(inner: FieldDecoder) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if value is None:
+            return None
+        return inner(value, path, errors)
+
+    return decode
+
+
+def _union(options: list[FieldDecoder]) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        for option in options:
+            result = option(value, path, [])
+            if result is not INVALID:
+                return result
+        errors.append((path, f"Value {value!r} matches no allowed type"))
+        return INVALID
+
+    return decode
+
+
+def _sequence(item: FieldDecoder, container: type) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if not isinstance(value, list):
+            errors.append((path, f"Expected array, got {type(value).__name__}"))
+            return INVALID
+        result = [item(v, f"{path}[{i}]", errors) for i, v in enumerate(value)]
+        return result if container is list else container(result)
+
+    return decode
+
+
+def _mapping(item: FieldDecoder) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if not isinstance(value, dict):
+            errors.append((path, f"Expected object, got {type(value).__name__}"))
+            return INVALID
+        return {k: item(v, f"{path}.{k}", errors) for k, v in value.items()}
+
+    return decode
+
+
+def _dataclass(cls: type) -> FieldDecoder:
+    # Filled after the decoder is cached, so self referencing types resolve.
+    plan: list[tuple[str, FieldDecoder, bool, bool]] = []
+
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if not isinstance(value, dict):
+            errors.append((path, f"Expected object, got {type(value).__name__}"))
+            return INVALID
+
+        kwargs = {}
+        failed = len(errors)
+        for name, field_decoder, required, nullable in plan:
+            if name not in value:
+                if required:
+                    errors.append((f"{path}.{name}", "Missing field"))
+                continue
+            item = value[name]
+            if item is None and nullable:
+                kwargs[name] = None
+            else:
+                kwargs[name] = field_decoder(item, f"{path}.{name}", errors)
+
+        if len(errors) > failed:
+            return INVALID
+        return cls(**kwargs)
+
+    _decoders[cls] = decode
+    hints = get_type_hints(cls)
+    for field in fields(cls):
+        if not field.init:
+            continue
+        required = field.default is MISSING and field.default_factory is MISSING
+        decoder = field_decoder(hints.get(field.name, Any))
+        plan.append((field.name, decoder, required, field.default is None))
+    return decode
+
+
+def _constructor(cls: type) -> FieldDecoder:
+    def decode(value: Any, path: str, errors: list) -> Any:
+        if not isinstance(value, dict):
+            errors.append((path, f"Expected object, got {type(value).__name__}"))
+            return INVALID
+        try:
+            return cls(**value)
+        except TypeError as e:
+            errors.append((path, str(e)))
+            return INVALID
+
+    return decode
+
+
+_decoders: dict[Any, FieldDecoder] = {
+    Any: _passthrough,
+    int: _scalar(int, (int,), "int"),
+    float: _scalar(float, (int, float), "float"),
+    str: _scalar(str, (str,), "str"),
+    bool: _scalar(bool, (bool,), "bool"),
+    dict: _mapping(_passthrough),
+    list: _sequence(_passthrough, list),
+    UUID: _parsed(UUID, UUID),
+    datetime: _parsed(datetime, datetime.fromisoformat),
+    date: _parsed(date, date.fromisoformat),
+    time: _parsed(time, time.fromisoformat),
+}
+
+
+def field_decoder(type_: Any) -> FieldDecoder:
+    """Builds (once per annotation) the decoder converting plain data into `type_`."""
+    try:
+        return _decoders[type_]
+    except (KeyError, TypeError):
+        pass
+
+    origin = get_origin(type_)
+    args = get_args(type_)
+    if origin in (Union, UnionType):
+        options = [a for a in args if a is not NoneType]
+        inner = field_decoder(options[0]) if len(options) == 1 else _union(
+            [field_decoder(a) for a in options]
+        )
+        decoder = _optional(inner) if NoneType in args else inner
+    elif origin in (list, set, frozenset, tuple):
+        decoder = _sequence(field_decoder(args[0] if args else Any), origin)
+    elif origin is dict:
+        decoder = _mapping(field_decoder(args[1] if len(args) == 2 else Any))
+    elif is_dataclass(type_):
+        return _dataclass(type_)
+    elif isinstance(type_, type) and issubclass(type_, Enum):
+        decoder = _parsed(type_, type_)
+    elif isinstance(type_, type):
+        decoder = _constructor(type_)
+    else:
+        decoder = _passthrough
+
+    try:
+        _decoders[type_] = decoder
+    except TypeError:
+        pass
+    return decoder
+
+
+@cache
+def body_decoder(type_: Type[T], backend: Codec) -> Callable[[bytes | str], T]:
+    """
+    Compiles the function turning a body encoded with `backend` into `type_`,
+    raising `ValidationError` with the path of every invalid field. Dataclasses
+    are decoded and validated by msgspec in a single pass when it is the JSON
+    backend.
+    """
+    if isinstance(backend, MsgspecBackend) and is_dataclass(type_):
+        decoder = msgspec.json.Decoder(type_)
+
+        def decode_msgspec(body: bytes | str) -> T:
+            try:
+                return decoder.decode(body)
+            except msgspec.ValidationError as e:
+                raise ValidationError([("$", str(e))])
+            except msgspec.DecodeError as e:
+                raise BadRequest(f"Invalid JSON body: {e}")
+
+        return decode_msgspec
+
+    convert = field_decoder(type_)
+    loads = backend.loads
+
+    def decode(body: bytes | str) -> T:
+        try:
+            data = loads(body)
+        except Exception as e:
+            raise BadRequest(f"Invalid {backend.media_type} body: {e}")
+        errors = []
+        value = convert(data, "$", errors)
+        if errors:
+            raise ValidationError(errors)
+        return value
+
+    return decode
@@ -1,10 +1,24 @@
 import importlib
 from functools import cache
-from typing import Any, Callable, Type, Union, TypeVar
-from inspect import signature
+from threading import Lock
+from typing import Any, Callable, Hashable, Literal, Type, Union, TypeVar
+from inspect import (
+    isasyncgenfunction,
+    iscoroutinefunction,
+    isgeneratorfunction,
+    signature,
+)
+from .request import Request
 
 T = TypeVar("T")
 
+# Marks singletons that haven't been created yet, so falsy values are cached too
+_UNSET = object()
+
+
+class CircularDependency(ValueError):
+    pass
+
 
 @cache
 def lazy_import(path):
@@ -21,88 +35,402 @@ class Lazy:
         return lazy_import(self.path)
 
 
+type Scope = Literal["transient", "singleton", "request"]
+
+
 class Dependency:
-    def __init__(self, key: Union[Type[T], Callable], cached=False) -> None:
+    def __init__(
+        self, key: Union[Type[T], Callable], cached=False, scope: Scope = None
+    ) -> None:
         self.key = key() if isinstance(key, Lazy) else key
-        self.cached = cached
+        self.scope = scope or ("singleton" if cached else "transient")
+        self.cached = cached or self.scope == "singleton"
         self.annotations = {}
         self.defaults = {}
-        self.cached_value = None
+        self.cached_value = _UNSET
+        self.lock = Lock()
 
-        for name, param in signature(key).parameters.items():
+        for name, param in signature(self.key).parameters.items():
             if param.default != param.empty:  # Defaults before annotations
                 self.defaults[name] = param.default
             elif param.annotation != param.empty:
                 self.annotations[name] = param.annotation
 
+    @property
+    def factory(self) -> Callable:
+        return self.key
+
     def __call__(self, *args: Any, **kwds: Any) -> T:
         if self.cached:
-            if not self.cached_value:
-                self.cached_value = self.key(*args, **kwds)
-            return self.cached_value
-        return self.key(*args, **kwds)
+            return self.get_or_create(lambda: self.factory(*args, **kwds))
+        return self.factory(*args, **kwds)
+
+    def get_or_create(self, create: Callable[[], T]) -> T:
+        """Returns the singleton, creating it under the lock on first use."""
+        value = self.cached_value
+        if value is _UNSET:
+            with self.lock:
+                value = self.cached_value
+                if value is _UNSET:
+                    value = self.cached_value = create()
+        return value
 
 
 class Swappable(Dependency):
     def __init__(
-        self, key: Union[Type, Callable], replace: Union[Type, Callable], cached=False
+        self,
+        key: Union[Type, Callable],
+        replace: Union[Type, Callable],
+        cached=False,
+        scope: Scope = None,
     ) -> None:
-        super().__init__(replace, cached)
+        super().__init__(replace, cached, scope)
         self.key = key() if isinstance(key, Lazy) else key
         self.replace = replace() if isinstance(replace, Lazy) else replace
 
-    def __call__(self, **kwds: Any) -> Any:
-        if self.cached:
-            if not self.cached_value:
-                self.cached_value = self.replace(**kwds)
-            return self.cached_value
-        return self.replace(**kwds)
+    @property
+    def factory(self) -> Callable:
+        return self.replace
+
+
+class _ScopedProvider:
+    """
+    Precomputed resolution of a request scoped dependency: how its factory
+    is called and where each of its arguments comes from.
+    """
+
+    __slots__ = ("factory", "params", "kind", "is_async")
+
+    def __init__(self, factory: Callable, params: list, kind: str, is_async: bool):
+        self.factory = factory
+        # (name, key, getter): `key` is the dependency to resolve through the
+        # scope, None when `getter` builds the value on its own.
+        self.params = params
+        self.kind = kind
+        self.is_async = is_async
+
+
+class RequestScope:
+    """
+    Request scoped dependencies resolved for one request, each at most once,
+    and the teardown of generator providers, run in reverse order by
+    `close`/`aclose` once the response has been sent. Providers can take
+    the `Request` of the scope as a parameter.
+    """
+
+    def __init__(self, container: "DIContainer", request: Request = None) -> None:
+        self.container = container
+        self.request = request
+        # Providers taking a `Request` get the request of the scope
+        self.values: dict[Hashable, Any] = {} if request is None else {Request: request}
+        self.exits: list = []
+
+    def get(self, key: Hashable) -> Any:
+        if key in self.values:
+            return self.values[key]
+        provider = self.container.provider(key)
+        if provider is None:
+            return self.container.resolve(key)
+        if provider.is_async:
+            raise RuntimeError(f"Dependency {key} is async, use Application.run_async")
+
+        kwargs = {
+            name: self.get(dep) if dep is not None else getter()
+            for name, dep, getter in provider.params
+        }
+        value = provider.factory(**kwargs)
+        if provider.kind == "generator":
+            generator = value
+            value = next(generator)
+            self.exits.append(generator)
+        self.values[key] = value
+        return value
+
+    async def aget(self, key: Hashable) -> Any:
+        if key in self.values:
+            return self.values[key]
+        provider = self.container.provider(key)
+        if provider is None or not provider.is_async:
+            return self.get(key)
+
+        kwargs = {}
+        for name, dep, getter in provider.params:
+            kwargs[name] = await self.aget(dep) if dep is not None else getter()
+        value = provider.factory(**kwargs)
+        if provider.kind == "coroutine":
+            value = await value
+        elif provider.kind == "async_generator":
+            generator = value
+            value = await generator.__anext__()
+            self.exits.append(generator)
+        elif provider.kind == "generator":
+            generator = value
+            value = next(generator)
+            self.exits.append(generator)
+        self.values[key] = value
+        return value
+
+    def close(self):
+        exits, self.exits = self.exits, []
+        error = None
+        for generator in reversed(exits):
+            try:
+                _finish(generator)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    async def aclose(self):
+        exits, self.exits = self.exits, []
+        error = None
+        for generator in reversed(exits):
+            try:
+                if hasattr(generator, "__anext__"):
+                    await _afinish(generator)
+                else:
+                    _finish(generator)
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+
+def _finish(generator):
+    try:
+        next(generator)
+    except StopIteration:
+        return
+    generator.close()
+    raise RuntimeError("Dependency generators must yield only once")
+
+
+async def _afinish(generator):
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        return
+    await generator.aclose()
+    raise RuntimeError("Dependency generators must yield only once")
+
+
+def _circular(path: list, key: Hashable) -> CircularDependency:
+    cycle = path[path.index(key):] + [key]
+    return CircularDependency(
+        "Circular dependency: "
+        + " -> ".join(getattr(k, "__qualname__", str(k)) for k in cycle)
+    )
+
+
+def _build_factory(
+    key: Hashable, dep: Dependency, getters: tuple[tuple[str, Callable], ...]
+) -> Callable[[], Any]:
+    if dep.scope == "request":
+        def request_scoped():
+            raise ValueError(f"Dependency {key} is request scoped")
+
+        return request_scoped
+
+    create = dep.factory
+    if not getters:
+        build = create
+    else:
+        def build():
+            return create(**{name: getter() for name, getter in getters})
+
+    if not dep.cached:
+        return build
+
+    def singleton():
+        value = dep.cached_value
+        if value is _UNSET:
+            value = dep.get_or_create(build)
+        return value
+
+    return singleton
 
 
 class DIContainer:
     def __init__(self) -> None:
         self.__dependencies: dict[Type, Dependency] = {}
+        self.__providers: dict[Hashable, _ScopedProvider] = {}
+        self.__factories: dict[Hashable, Callable[[], Any]] = {}
+        # Keys in dependency order, as compiled
+        self.order: list[Hashable] = []
+
+    def __contains__(self, key) -> bool:
+        try:
+            return key in self.__dependencies
+        except TypeError:  # Unhashable annotations
+            return False
 
     def add_dependency(
         self,
         dep: Union[Type, Callable],
         replace: Union[Type, Callable] = None,
         cached: bool = False,
+        scope: Scope = None,
     ):
+        """
+        Registers `dep`, built by `replace` when given. Transient dependencies
+        are built on every resolution, singletons (or `cached`) once, and
+        request scoped ones once per request. Request scoped factories can be
+        generators or async generators: the code after `yield` runs after the
+        response has been sent.
+        """
         if replace:
-            self.__dependencies[dep] = Swappable(dep, replace, cached)
+            self.add(Swappable(dep, replace, cached, scope))
         else:
-            self.__dependencies[dep] = Dependency(dep, cached)
+            self.add(Dependency(dep, cached, scope))
 
     def add(self, dep: Dependency):
         self.__dependencies[dep.key] = dep
+        self._invalidate()
+
+    def add_instance(self, key: Union[Type[T], Callable], value: T):
+        """Registers an already built object as a cached dependency."""
+        dep = Dependency(lambda: value, cached=True)
+        dep.key = key
+        dep.cached_value = value
+        self.add(dep)
+
+    def _invalidate(self):
+        # Singletons live in their `Dependency`, so nothing built is lost.
+        self.__providers.clear()
+        self.__factories.clear()
+        self.order.clear()
 
     def resolve(self, key: Union[Type[T], Callable]) -> T:
+        factory = self.__factories.get(key)
+        if factory is None:
+            factory = self.factory(key)
+        return factory()
+
+    def compile(self):
+        """
+        Sorts the dependency graph and builds the factory of every key, so
+        resolving is a flat call of closures with no reflection. Raises
+        `CircularDependency` on cycles and `ValueError` on missing keys.
+        """
+        for key in self.__dependencies:
+            self.factory(key)
+
+    def factory(self, key: Hashable) -> Callable[[], Any]:
+        """Returns the factory of `key`, compiling it and its dependencies."""
+        factory = self.__factories.get(key)
+        if factory is None:
+            factory = self._compile(key, [])
+        return factory
+
+    def _compile(self, key: Hashable, path: list) -> Callable[[], Any]:
+        factory = self.__factories.get(key)
+        if factory is not None:
+            return factory
+        if key in path:
+            raise _circular(path, key)
+
         dep = self.__dependencies.get(key)
-        if not dep:
-            raise ValueError(f"Undefined dependency {dep}")
+        if dep is None:
+            raise ValueError(f"Undefined dependency {key}")
 
-        if dep.cached and dep.cached_value:
-            return dep.cached_value
+        # Dependencies are compiled first, depth first: a topological order.
+        path.append(key)
+        getters = []
+        for name, dep_key, getter in self._params(dep):
+            if dep_key is Request and dep.scope == "request":
+                continue  # Given by the request scope, never built
+            if dep_key is not None:
+                getter = self._compile(dep_key, path)
+            getters.append((name, getter))
+        path.pop()
 
-        values = {}  # Parameters dictionary
+        factory = _build_factory(key, dep, tuple(getters))
+        self.__factories[key] = factory
+        self.order.append(key)
+        return factory
 
+    def _params(self, dep: Dependency) -> list[tuple[str, Hashable, Callable]]:
+        """
+        Where each argument of `dep` comes from, as (name, key, getter):
+        `key` is the dependency to resolve, None when `getter` builds the
+        value on its own.
+        """
+        params = []
         for name, val in dep.defaults.items():
-            value = val
-            if isinstance(val, Lazy):  # Defered import
-                value = val()
-
-            if callable(value):  # Inject the result of callables
-                values[name] = (
-                    self.resolve(value) if value in self.__dependencies else value()
-                )
+            value = val() if isinstance(val, Lazy) else val  # Defered import
+            if callable(value) and value in self:
+                params.append((name, value, None))
+            elif callable(value):  # Inject the result of callables
+                params.append((name, None, value))
             else:
-                values[name] = value
+                params.append((name, None, lambda value=value: value))
+        for name, annotation in dep.annotations.items():
+            if isinstance(annotation, type) and issubclass(annotation, Request):
+                annotation = Request
+            params.append((name, annotation, None))
+        return params
+
+    def provider(self, key: Hashable) -> _ScopedProvider | None:
+        """
+        Returns the precomputed provider of a request scoped dependency, or
+        None for other scopes. Only the request scoped keys it depends on are
+        inspected, so their own dependencies may be registered later (e.g. by
+        startup hooks); the whole graph is checked by `compile`.
+        """
+        provider = self.__providers.get(key)
+        if provider is not None:
+            return provider
+        return self._provider(key, [])
+
+    def _provider(self, key: Hashable, path: list) -> _ScopedProvider | None:
+        provider = self.__providers.get(key)
+        if provider is not None:
+            return provider
+
+        dep = self.__dependencies.get(key)
+        if dep is None or dep.scope != "request":
+            return None
+        if key in path:
+            raise _circular(path, key)
+
+        params = self._params(dep)
+        factory = dep.factory
+        if isasyncgenfunction(factory):
+            kind = "async_generator"
+        elif iscoroutinefunction(factory):
+            kind = "coroutine"
+        elif isgeneratorfunction(factory):
+            kind = "generator"
+        else:
+            kind = "function"
+        path.append(key)
+        is_async = kind in ("async_generator", "coroutine")
+        for _, dep_key, _ in params:
+            if dep_key is not None:
+                dep_provider = self._provider(dep_key, path)
+                is_async = is_async or (dep_provider is not None and dep_provider.is_async)
+        path.pop()
+        provider = self.__providers[key] = _ScopedProvider(factory, params, kind, is_async)
+        return provider
+
+    def is_async(self, key: Hashable) -> bool:
+        """Whether resolving `key` in a request scope has to be awaited."""
+        provider = self.provider(key)
+        return provider is not None and provider.is_async
 
-        for name, annotations in dep.annotations.items():
-            values[name] = self.resolve(annotations)
+    def scope(self, request) -> RequestScope:
+        """Returns the scope of the request, creating it on first use."""
+        scope = request.dependencies
+        if scope is None:
+            scope = request.dependencies = RequestScope(self, request)
+        return scope
 
-        return dep(**values)
+    def warm(self):
+        """Compiles the graph and creates every cached dependency."""
+        self.compile()
+        for key, dep in self.__dependencies.items():
+            if dep.cached:
+                self.resolve(key)
 
     def resolve_inners(self, t: Type):
         values = {}
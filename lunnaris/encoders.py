@@ -0,0 +1,55 @@
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime, time
+from enum import Enum
+from functools import cache
+from typing import Any, Callable, get_type_hints
+from uuid import UUID
+
+PASSTHROUGH = frozenset((str, int, float, bool, type(None)))
+
+
+def encode_value(value: Any) -> Any:
+    """Converts a field value into plain JSON compatible data."""
+    t = type(value)
+    if t in PASSTHROUGH:
+        return value
+    if isinstance(value, Enum):
+        return encode_value(value.value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return dataclass_encoder(t)(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+@cache
+def dataclass_encoder(cls: type) -> Callable[[Any], dict]:
+    """
+    Generates, once per dataclass, a function returning the fields of an
+    instance as a dict of JSON compatible values. Unlike `dataclasses.asdict`
+    nothing is deep copied: fields annotated with a primitive type are read
+    as they are and the rest go through `encode_value`. Attributes are read
+    by name, so `slots=True` dataclasses are supported as well.
+    """
+    try:
+        hints = get_type_hints(cls)
+    except Exception:
+        hints = {}
+
+    items = []
+    for field in fields(cls):
+        if hints.get(field.name) in PASSTHROUGH:
+            items.append(f"        {field.name!r}: obj.{field.name},")
+        else:
+            items.append(f"        {field.name!r}: encode_value(obj.{field.name}),")
+
+    source = "\n".join(["def encode(obj):", "    return {", *items, "    }"])
+    namespace = {"encode_value": encode_value}
+    exec(compile(source, f"<dataclass encoder {cls.__qualname__}>", "exec"), namespace)
+    return namespace["encode"]
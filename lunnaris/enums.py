@@ -12,6 +12,8 @@ class MimeType(StrEnum):
     CSS = "text/css"
     JS = "application/javascript"
     JSON = "application/json"
+    MSGPACK = "application/msgpack"
+    CBOR = "application/cbor"
     PNG = "image/png"
     JPG = "image/jpeg"
     SVG = "image/svg+xml"
@@ -22,6 +24,33 @@ class MimeType(StrEnum):
     OTF = "font/otf"
     UNKNOWN = "application/octet-stream"
 
+    @classmethod
+    def from_path(cls, path: str) -> "MimeType":
+        _, dot, extension = str(path).rpartition(".")
+        if not dot:
+            return cls.UNKNOWN
+        return _MIME_EXTENSIONS.get(extension.lower(), cls.UNKNOWN)
+
+
+_MIME_EXTENSIONS = {
+    "html": MimeType.HTML,
+    "htm": MimeType.HTML,
+    "txt": MimeType.PLAIN,
+    "css": MimeType.CSS,
+    "js": MimeType.JS,
+    "mjs": MimeType.JS,
+    "json": MimeType.JSON,
+    "png": MimeType.PNG,
+    "jpg": MimeType.JPG,
+    "jpeg": MimeType.JPG,
+    "svg": MimeType.SVG,
+    "ico": MimeType.ICO,
+    "woff": MimeType.WOFF,
+    "woff2": MimeType.WOFF2,
+    "ttf": MimeType.TTF,
+    "otf": MimeType.OTF,
+}
+
 
 class Method(StrEnum):
     GET = "GET"
@@ -61,6 +90,10 @@ class Header(StrEnum):
     ETAG = "ETag"
     IF_MODIFIED_SINCE = "If-Modified-Since"
     IF_NONE_MATCH = "If-None-Match"
+    IF_RANGE = "If-Range"
+    RANGE = "Range"
+    CONTENT_RANGE = "Content-Range"
+    ACCEPT_RANGES = "Accept-Ranges"
     VARY = "Vary"
     CONTENT_ENCODING = "Content-Encoding"
     CONTENT_DISPOSITION = "Content-Disposition"
@@ -72,6 +105,7 @@ class Header(StrEnum):
     ACCESS_CONTROL_ALLOW_CREDENTIALS = "Access-Control-Allow-Credentials"
     ACCESS_CONTROL_REQUEST_METHOD = "Access-Control-Request-Method"
     ACCESS_CONTROL_REQUEST_HEADERS = "Access-Control-Request-Headers"
+    ALLOW = "Allow"
     AUTHORIZATION = "Authorization"
     WWW_AUTHENTICATE = "WWW-Authenticate"
 
@@ -2,12 +2,16 @@ class HttpException(Exception):
     code: int
     title: str
     message: bytes | str
+    headers: dict[str, str] | None
 
-    def __init__(self, title: str, code: int, message: str) -> None:
+    def __init__(
+        self, title: str, code: int, message: str, headers: dict[str, str] = None
+    ) -> None:
         super().__init__(f"{code} - {title}")
         self.code = code
         self.title = title or f"{code} - {self.title}"
         self.message = message
+        self.headers = headers
     
     def __repr__(self) -> str:
         if self.message:
@@ -19,8 +23,8 @@ class HttpException(Exception):
 
 
 class DefinedHttpException(HttpException):
-    def __init__(self, body: str = ""):
-        super().__init__(self.title, self.code, body)
+    def __init__(self, body: str = "", headers: dict[str, str] = None):
+        super().__init__(self.title, self.code, body, headers)
 
 
 class BadRequest(DefinedHttpException):
@@ -28,6 +32,14 @@ class BadRequest(DefinedHttpException):
     title = "Bad request"
 
 
+class ValidationError(BadRequest):
+    """Bad request listing every invalid field of the body by its path."""
+
+    def __init__(self, errors: list[tuple[str, str]]):
+        self.errors = errors
+        super().__init__("; ".join(f"{path}: {message}" for path, message in errors))
+
+
 class Unauthorized(DefinedHttpException):
     code = 401
     title = "Unauthorized"
@@ -43,6 +55,21 @@ class NotFound(DefinedHttpException):
     title = "Not found"
 
 
+class MethodNotAllowed(DefinedHttpException):
+    code = 405
+    title = "Method not allowed"
+
+
+class PayloadTooLarge(DefinedHttpException):
+    code = 413
+    title = "Payload too large"
+
+
+class UnsupportedMediaType(DefinedHttpException):
+    code = 415
+    title = "Unsupported media type"
+
+
 class InternalServerError(DefinedHttpException):
     code = 500
     title = "Internal server error"
@@ -56,3 +83,12 @@ class NotImplemented(DefinedHttpException):
 class BadGateway(DefinedHttpException):
     code = 502
     title = "Bad gateway"
+
+
+class ServiceUnavailable(DefinedHttpException):
+    code = 503
+    title = "Service unavailable"
+
+
+class ClientDisconnect(Exception):
+    pass
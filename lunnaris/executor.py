@@ -0,0 +1,91 @@
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, TypeVar
+
+from .exceptions import ServiceUnavailable
+
+T = TypeVar("T")
+
+
+class ThreadPool:
+    """
+    Bounded thread pool used to run blocking sync handlers off the event loop.
+
+    `max_workers` bounds the number of threads. When `max_queue` is set, calls
+    that would leave more than `max_queue` callbacks waiting for a free thread
+    are rejected with a 503 instead of piling up.
+    """
+
+    def __init__(self, max_workers: int = None, max_queue: int = None) -> None:
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.saturated = 0
+        self.__lock = Lock()
+        self.__executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="lunnaris"
+            )
+        return self.__executor
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self.__lock:
+            if self.active + self.queued >= self.max_workers:
+                if self.max_queue is not None and self.queued >= self.max_queue:
+                    self.rejected += 1
+                    raise ServiceUnavailable("Thread pool queue is full")
+                self.saturated += 1
+            self.queued += 1
+
+        try:
+            future = self.executor.submit(self._run_tracked, func, args, kwargs)
+        except Exception:
+            with self.__lock:
+                self.queued -= 1
+            raise
+        # Calls cancelled before a worker picks them up never reach
+        # `_run_tracked`, e.g. when the client disconnects while queued.
+        future.add_done_callback(self._discard_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _discard_cancelled(self, future: Future):
+        if future.cancelled():
+            with self.__lock:
+                self.queued -= 1
+
+    def _run_tracked(self, func: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        with self.__lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self.__lock:
+                self.active -= 1
+                self.completed += 1
+
+    def metrics(self) -> dict[str, int | float]:
+        with self.__lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self.active,
+                "queue_depth": self.queued,
+                "saturation": self.active / self.max_workers,
+                "saturated": self.saturated,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+    def shutdown(self, wait: bool = True):
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=wait)
+            self.__executor = None
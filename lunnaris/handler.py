@@ -1,9 +1,27 @@
-from inspect import signature
-from typing import Callable, Literal, Any
-
-
-from .request import ParamMapper, Request, ITypeMapper
-from .enums import Method
+from inspect import Parameter, signature
+from typing import Callable, Hashable, Literal, Any
+
+
+from .cache import CacheStore, ResponseCache
+from .codec import Codec, JsonBackend
+from .middleware import Middleware
+from .conditional import ETag, is_not_modified, not_modified
+from .request import (
+    Body,
+    ITypeMapper,
+    Json,
+    ParamMapper,
+    Query,
+    QueryParam,
+    Request,
+    is_compilable,
+)
+from .response import Response
+from .enums import Header, Method
+from .converters import parse_segment
+from .di import DIContainer
+from .executor import ThreadPool
+from .utils import is_async_callable
 
 
 # types
@@ -19,6 +37,9 @@ PostMiddleware is a type alias for a callable that takes one argument and return
 The argument and return type are the same. This is used to modify the response before it is sent.
 """
 
+# Both kinds of middleware can also be declared with `async def`, in which case
+# they are awaited when the request runs through `Application.run_async`.
+
 
 class RequestHandler:
     def __init__(
@@ -30,20 +51,217 @@ class RequestHandler:
         headers: dict[str, str] = None,
         pre_middleware: list[PreMiddleware] = None,
         post_middleware: list[PostMiddleware] = None,
+        run_in_threadpool: bool | None = None,
+        middleware: list[Middleware] = None,
     ):
         self.path = path
         self.method = method
         self.callback = callback
         self.status_code = status_code
-        self.headers = headers or {}
-        self.pre_middleware = pre_middleware or []
-        self.post_middleware = post_middleware or []
+        # Copies, so handlers never share the lists passed by the caller
+        self.headers = dict(headers or {})
+        self.pre_middleware = list(pre_middleware or [])
+        self.post_middleware = list(post_middleware or [])
+        self.middleware = list(middleware or [])
+        self.run_in_threadpool = run_in_threadpool
+        self.executor: ThreadPool | None = None
+        self.json_backend: JsonBackend | None = None
+        self.codecs: tuple[Codec, ...] | None = None
+        self.container: DIContainer | None = None
+        self.etag: ETag | None = None
+        self.cache: ResponseCache | None = None
+        # Compiled middleware chains, set by the application
+        self.chain: Callable[[Request], Any] | None = None
+        self.chain_async: Callable[[Request], Any] | None = None
+        self.buffers_body = True
+        self.frozen = False
+
+    @property
+    def callback(self) -> Callable:
+        return self._callback
+
+    @callback.setter
+    def callback(self, callback: Callable):
+        # Controllers rebind the callback to a bound method, so any plan
+        # built for the previous callable is stale.
+        self._callback = callback
+        self._plan = None
+
+    def compile(self):
+        """
+        Builds the binding plan of the callback: a flat list of
+        (name, extractor) pairs, where each extractor takes the request
+        and returns the value for that argument. The callback signature is
+        inspected only here, never per request.
+        """
+        self._plan, reads_body = self._compile_plan(self.callback)
+        self.is_async = is_async_callable(self.callback)
+        # Request scoped dependencies with async providers are resolved
+        # before the call, so extractors only read the request scope.
+        container = self.container
+        self._async_dependencies = tuple(
+            param.annotation
+            for param in signature(self.callback).parameters.values()
+            if container is not None
+            and param.default is param.empty
+            and param.annotation in container
+            and container.is_async(param.annotation)
+        )
+        # The version hook of an ETag is bound like the callback itself.
+        self._version_plan = None
+        self._version_async = False
+        version = self.etag.version if self.etag is not None else None
+        if version is not None:
+            self._version_plan, version_reads_body = self._compile_plan(version)
+            self._version_async = is_async_callable(version)
+            reads_body = reads_body or version_reads_body
+        # Async handlers may consume `Request.stream()` themselves, everything
+        # else expects `Request.body` to be in memory before the call.
+        self.buffers_body = reads_body or not self.is_async
+        self._pre_chain = [(m, is_async_callable(m)) for m in self.pre_middleware]
+        self._post_chain = [(m, is_async_callable(m)) for m in self.post_middleware]
+        self._async_middleware = any(
+            is_async for _, is_async in (*self._pre_chain, *self._post_chain)
+        )
+
+    def _compile_plan(self, callback: Callable) -> tuple[list, bool]:
+        plan = []
+        reads_body = False
+        # Typed segments are converted by the router while matching.
+        converted = {
+            param[0]
+            for param in map(parse_segment, self.path.strip("/").split("/"))
+            if param and param[1]
+        }
+        for name, param in signature(callback).parameters.items():
+            extractor = _build_extractor(
+                name,
+                param,
+                name in converted,
+                self.json_backend,
+                self.codecs,
+                self.container,
+            )
+            if extractor is not None:
+                plan.append((name, extractor))
+                reads_body = reads_body or getattr(param.default, "reads_body", False)
+        return plan, reads_body
 
     def __call__(self, request: Request):
-        req = self._process_pre_middleware(request)
+        return self.invoke(self.prepare(request))
+
+    def prepare(self, request: Request) -> Request:
+        """
+        Runs the pre-middlewares and returns the request the handler sees.
+        The response cache looks entries up after this, so pre-middlewares
+        such as authentication also run on cache hits.
+        """
+        if self._plan is None:
+            self.compile()
+        if (
+            self.is_async
+            or self._async_middleware
+            or self._version_async
+            or self._async_dependencies
+        ):
+            raise RuntimeError(
+                f"Handler for {self.method} {self.path} is async, use Application.run_async"
+            )
+        return self._process_pre_middleware(request)
+
+    def invoke(self, req: Request):
+        """Runs the handler on a request returned by `prepare`."""
+        tag = None
+        if self._version_plan is not None and req.method in (Method.GET, Method.HEAD):
+            tag = self._format_version(
+                self.etag.version(**self._process_kwargs(req, self._version_plan))
+            )
+            if tag is not None and is_not_modified(req.headers, tag):
+                return not_modified({Header.ETAG: tag})
+
         kwargs = self._process_callback_kwargs(req)
         res = self.callback(**kwargs)
-        return self._process_post_middleware(res)
+        return _with_etag(self._process_post_middleware(res), tag)
+
+    def copy(self) -> "RequestHandler":
+        """
+        Returns an unfrozen copy of the route declaration: path, callback,
+        middlewares, ETag policy and response cache settings. Applications
+        register copies, so the handler attached to a decorated function is
+        never configured or frozen by any of them.
+        """
+        handler = RequestHandler(
+            self.path,
+            self.method,
+            self.callback,
+            self.status_code,
+            self.headers,
+            self.pre_middleware,
+            self.post_middleware,
+            self.run_in_threadpool,
+            self.middleware,
+        )
+        handler.etag = self.etag
+        if self.cache is not None:
+            handler.cache = self.cache.copy()
+        return handler
+
+    def freeze(self):
+        """Compiles the handler and locks its middleware chains."""
+        self.compile()
+        self.pre_middleware = tuple(self.pre_middleware)
+        self.post_middleware = tuple(self.post_middleware)
+        self.middleware = tuple(self.middleware)
+        self.frozen = True
+
+    async def call_async(self, request: Request):
+        """
+        Runs the handler inside the event loop. Coroutine callbacks are awaited,
+        sync callbacks are dispatched to `executor` when one is assigned and
+        run inline otherwise.
+        """
+        return await self.invoke_async(await self.prepare_async(request))
+
+    async def prepare_async(self, request: Request) -> Request:
+        """Async version of `prepare`."""
+        if self._plan is None:
+            self.compile()
+        if self._async_middleware:
+            return await self._process_pre_middleware_async(request)
+        return self._process_pre_middleware(request)
+
+    async def invoke_async(self, req: Request):
+        """Async version of `invoke`."""
+        if self._async_dependencies:
+            scope = self.container.scope(req)
+            for key in self._async_dependencies:
+                await scope.aget(key)
+
+        tag = None
+        if self._version_plan is not None and req.method in (Method.GET, Method.HEAD):
+            version = self.etag.version(**self._process_kwargs(req, self._version_plan))
+            if self._version_async:
+                version = await version
+            tag = self._format_version(version)
+            if tag is not None and is_not_modified(req.headers, tag):
+                return not_modified({Header.ETAG: tag})
+
+        kwargs = self._process_callback_kwargs(req)
+        if self.is_async:
+            res = await self.callback(**kwargs)
+        elif self.executor is not None:
+            res = await self.executor.run(self.callback, **kwargs)
+        else:
+            res = self.callback(**kwargs)
+
+        if self._async_middleware:
+            res = await self._process_post_middleware_async(res)
+        else:
+            res = self._process_post_middleware(res)
+        return _with_etag(res, tag)
+
+    def _format_version(self, version: Any) -> str | None:
+        return None if version is None else self.etag.format(version)
 
     def _process_pre_middleware(self, request: Request) -> Request:
         req = request
@@ -70,61 +288,192 @@ class RequestHandler:
 
         return res
 
+    async def _process_pre_middleware_async(self, request: Request) -> Request:
+        req = request
+
+        for middleware, is_async in self._pre_chain:
+            temp = middleware(req)
+            if is_async:
+                temp = await temp
+            if temp:
+                req = temp
+
+        if req is None:
+            raise ValueError("Request can't be none")
+
+        return req
+
+    async def _process_post_middleware_async(self, response: Any) -> Any:
+        res = response
+        for middleware, is_async in self._post_chain:
+            temp = middleware(res)
+            if is_async:
+                temp = await temp
+            if temp:
+                res = temp
+
+        if res is None:
+            raise ValueError("Response can't be empty")
+
+        return res
+
     def _process_callback_kwargs(self, request: Request) -> dict:
-        kwargs = {}
-        params = signature(self.callback).parameters
-
-        for name, param in params.items():
-            if issubclass(param.annotation, Request):
-                kwargs[name] = request
-            elif isinstance(param.default, ITypeMapper):
-                if param.annotation != param.empty:
-                    kwargs[name] = param.default.map(request, param.annotation)
-            elif isinstance(param.default, ParamMapper):
-                if param.annotation != param.empty:
-                    kwargs[name] = param.default.map(request, param.annotation, name)
-            else:
-                arg = param.default
-                if name in request.params:
-                    arg = request.params[name]
-                    if param.annotation != param.empty:
-                        arg = param.annotation(arg)
-                kwargs[name] = arg
-
-        return kwargs
+        if self._plan is None:
+            self.compile()
+
+        return self._process_kwargs(request, self._plan)
+
+    def _process_kwargs(self, request: Request, plan: list) -> dict:
+        return {name: extract(request) for name, extract in plan}
 
     def add_pre_middlewares(
         self,
         middlewares: list[PreMiddleware],
         hint: Literal["before", "after"] = "before",
     ):
+        if self.frozen:
+            raise RuntimeError("Can't add middlewares to a frozen handler")
         if hint == "before":
             self.pre_middleware = middlewares + self.pre_middleware
         else:
             self.pre_middleware.extend(middlewares)
+        self._plan = None
 
     def add_post_middlewares(
         self,
         middlewares: list[PostMiddleware],
         hint: Literal["before", "after"] = "after",
     ):
+        if self.frozen:
+            raise RuntimeError("Can't add middlewares to a frozen handler")
         if hint == "before":
             self.post_middleware = middlewares + self.post_middleware
         else:
             self.post_middleware.extend(middlewares)
+        self._plan = None
+
+    def add_middlewares(
+        self,
+        middlewares: list[Middleware],
+        hint: Literal["before", "after"] = "before",
+    ):
+        """Adds outer ("before") or inner ("after") layers to the handler chain."""
+        if self.frozen:
+            raise RuntimeError("Can't add middlewares to a frozen handler")
+        if hint == "before":
+            self.middleware = list(middlewares) + self.middleware
+        else:
+            self.middleware.extend(middlewares)
+
+
+def _with_etag(result: Any, tag: str | None) -> Any:
+    """Attaches a version ETag to whatever the callback returned."""
+    if tag is None:
+        return result
+    if isinstance(result, Response):
+        result.headers[Header.ETAG] = tag
+        return result
+    if isinstance(result, tuple) and len(result) == 3:
+        body, status, headers = result
+        return body, status, {**headers, Header.ETAG: tag}
+    if isinstance(result, tuple) and len(result) == 2:
+        body, status = result
+        return body, status, {Header.ETAG: tag}
+    return result, 200, {Header.ETAG: tag}
+
+
+def _request_extractor(request: Request) -> Request:
+    return request
+
+
+def _build_extractor(
+    name: str,
+    param: Parameter,
+    converted: bool = False,
+    json_backend: JsonBackend = None,
+    codecs: tuple[Codec, ...] = None,
+    container: DIContainer = None,
+) -> Callable[[Request], Any] | None:
+    annotation = param.annotation
+    default = param.default
+
+    if isinstance(annotation, type) and issubclass(annotation, Request):
+        return _request_extractor
+
+    if isinstance(default, Json) and is_compilable(default):
+        if annotation is param.empty:
+            return None
+        return default.compile(annotation, json_backend)
+
+    if isinstance(default, Body) and is_compilable(default):
+        if annotation is param.empty:
+            return None
+        return default.compile(annotation, codecs)
+
+    if isinstance(default, Query) and is_compilable(default):
+        if annotation is param.empty:
+            return None
+        return default.compile(annotation)
+
+    if isinstance(default, QueryParam) and is_compilable(default):
+        if annotation is param.empty:
+            return None
+        return default.compile(annotation, name)
+
+    # Custom mappers, and built-ins whose `map` or `init_type` is overridden
+    if isinstance(default, ITypeMapper):
+        if annotation is param.empty:
+            return None
+        mapper = default
+        return lambda request: mapper.map(request, annotation)
+
+    if isinstance(default, ParamMapper):
+        if annotation is param.empty:
+            return None
+        mapper = default
+        return lambda request: mapper.map(request, annotation, name)
+
+    if container is not None and default is param.empty and annotation in container:
+        def extract_dependency(request: Request) -> Any:
+            return container.scope(request).get(annotation)
+
+        return extract_dependency
+
+    if annotation is param.empty or converted:
+        def extract_raw(request: Request) -> Any:
+            params = request.params
+            return params[name] if name in params else default
+
+        return extract_raw
+
+    def extract_converted(request: Request) -> Any:
+        params = request.params
+        return annotation(params[name]) if name in params else default
+
+    return extract_converted
 
 
 def request_handler(
     url: str,
     method: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     def decorator(func):
         func.__handler__ = RequestHandler(
-            url, method, func, status_code, headers, pre_middleware, post_middleware
+            url,
+            method,
+            func,
+            status_code,
+            headers,
+            pre_middleware,
+            post_middleware,
+            run_in_threadpool,
+            middleware,
         )
         return func
 
@@ -134,63 +483,154 @@ def request_handler(
 def get(
     url: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     return request_handler(
-        url, Method.GET, status_code, pre_middleware, post_middleware, headers
+        url,
+        Method.GET,
+        status_code,
+        pre_middleware,
+        post_middleware,
+        headers,
+        run_in_threadpool,
+        middleware,
     )
 
 
 def post(
     url: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     return request_handler(
-        url, Method.POST, status_code, pre_middleware, post_middleware, headers
+        url,
+        Method.POST,
+        status_code,
+        pre_middleware,
+        post_middleware,
+        headers,
+        run_in_threadpool,
+        middleware,
     )
 
 
 def put(
     url: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     return request_handler(
-        url, Method.PUT, status_code, pre_middleware, post_middleware, headers
+        url,
+        Method.PUT,
+        status_code,
+        pre_middleware,
+        post_middleware,
+        headers,
+        run_in_threadpool,
+        middleware,
     )
 
 
 def delete(
     url: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     return request_handler(
-        url, Method.DELETE, status_code, pre_middleware, post_middleware, headers
+        url,
+        Method.DELETE,
+        status_code,
+        pre_middleware,
+        post_middleware,
+        headers,
+        run_in_threadpool,
+        middleware,
     )
 
 
 def patch(
     url: str,
     status_code: int = 200,
-    pre_middleware: list[PreMiddleware] = [],
-    post_middleware: list[PostMiddleware] = [],
-    headers: dict[str, str] = {},
+    pre_middleware: list[PreMiddleware] = None,
+    post_middleware: list[PostMiddleware] = None,
+    headers: dict[str, str] = None,
+    run_in_threadpool: bool | None = None,
+    middleware: list[Middleware] = None,
 ):
     return request_handler(
-        url, Method.PATCH, status_code, pre_middleware, post_middleware, headers
+        url,
+        Method.PATCH,
+        status_code,
+        pre_middleware,
+        post_middleware,
+        headers,
+        run_in_threadpool,
+        middleware,
     )
 
 
+def etag(version: Callable[..., Any] = None, weak: bool = True):
+    """
+    Adds ETags and conditional GET support to a handler. Must be applied
+    above the route decorator:
+
+        @etag(lambda id: store.version(id))
+        @get("/items/{id:int}")
+        def item(id: int): ...
+
+    See `ETag` for how `version` is called.
+    """
+
+    def decorator(func):
+        handler = get_handler(func)
+        if handler is None:
+            raise ValueError("etag must be applied above a route decorator")
+        handler.etag = ETag(weak, version)
+        handler._plan = None
+        return func
+
+    return decorator
+
+
+def cache(
+    ttl: float = 60,
+    query: list[str] = None,
+    headers: list[str] = None,
+    store: CacheStore = None,
+    key: Callable[[Request], Hashable] = None,
+):
+    """
+    Caches the encoded responses of a GET handler for `ttl` seconds. Must be
+    applied above the route decorator. Without a `store`, the application
+    store is used. See `ResponseCache` for how entries are keyed.
+    """
+
+    def decorator(func):
+        handler = get_handler(func)
+        if handler is None:
+            raise ValueError("cache must be applied above a route decorator")
+        handler.cache = ResponseCache(ttl, query, headers, store, key)
+        return func
+
+    return decorator
+
+
 def get_handler(obj, default=None):
     handler = getattr(obj, "__handler__", default)
     if isinstance(handler, RequestHandler):
@@ -0,0 +1,102 @@
+import asyncio
+from typing import Awaitable, Callable
+from .executor import ThreadPool
+from .request import Request
+from .response import Response
+from .utils import is_async_callable
+
+
+# types
+type CallNext = Callable[[Request], Response | Awaitable[Response]]
+"""
+CallNext runs the rest of the chain (inner middlewares, then routing or the
+handler) and returns its response. Async middlewares await it.
+"""
+
+type Middleware = Callable[[Request, CallNext], Response | Awaitable[Response]]
+"""
+Middleware is a type alias for a callable that takes the request and the
+`call_next` callable and returns a response. It can return a response of its
+own without calling `call_next` to short-circuit the rest of the chain, e.g.
+to reject unauthenticated requests.
+
+Middlewares can be declared with `async def`. Sync middlewares also run in
+`Application.run_async`: there they are called in the application thread
+pool with a blocking `call_next`, so they can inspect the response and read
+`request.body` like under `Application.run`. Each one holds a worker thread
+while the rest of the chain runs. Async middlewares must
+`await request.read()` before touching `request.body`.
+"""
+
+
+def _reject_async(middleware: Middleware) -> Callable[[Request], Response]:
+    def layer(request: Request) -> Response:
+        raise RuntimeError(
+            f"Middleware {middleware.__qualname__} is async, use Application.run_async"
+        )
+
+    return layer
+
+
+def _layer(middleware: Middleware, call_next: CallNext) -> Callable[[Request], Response]:
+    def layer(request: Request) -> Response:
+        return middleware(request, call_next)
+
+    return layer
+
+
+def _sync_layer_async(
+    middleware: Middleware, call_next: CallNext, executor: ThreadPool
+) -> Callable[[Request], Awaitable[Response]]:
+    async def layer(request: Request) -> Response:
+        loop = asyncio.get_running_loop()
+
+        async def run_next(req: Request) -> Response:
+            return await call_next(req)
+
+        def call_next_blocking(req: Request) -> Response:
+            # Runs the async rest of the chain on the loop from the worker
+            return asyncio.run_coroutine_threadsafe(run_next(req), loop).result()
+
+        # The body is read only if the middleware asks for it
+        request.bind_loop(loop)
+        return await executor.run(middleware, request, call_next_blocking)
+
+    return layer
+
+
+def compose(
+    middlewares: list[Middleware], endpoint: Callable[[Request], Response]
+) -> Callable[[Request], Response]:
+    """
+    Nests `middlewares` around `endpoint` into a single callable, the first
+    middleware being the outermost layer. Used by `Application.run`, so
+    async middlewares raise when called.
+    """
+    call = endpoint
+    for middleware in reversed(middlewares):
+        if is_async_callable(middleware):
+            call = _reject_async(middleware)
+        else:
+            call = _layer(middleware, call)
+    return call
+
+
+def compose_async(
+    middlewares: list[Middleware],
+    endpoint: Callable[[Request], Awaitable[Response]],
+    executor: ThreadPool = None,
+) -> Callable[[Request], Awaitable[Response]]:
+    """
+    Like `compose`, for `Application.run_async`: every layer returns an
+    awaitable. Async middlewares are called directly, without an extra frame,
+    sync ones in `executor` (a pool of their own when not given).
+    """
+    call = endpoint
+    for middleware in reversed(middlewares):
+        if is_async_callable(middleware):
+            call = _layer(middleware, call)
+        else:
+            executor = executor or ThreadPool()
+            call = _sync_layer_async(middleware, call, executor)
+    return call
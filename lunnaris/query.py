@@ -0,0 +1,225 @@
+from dataclasses import MISSING, fields
+from datetime import date, datetime, time
+from functools import cache
+from types import NoneType, UnionType
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, Callable, Union, get_args, get_origin, get_type_hints
+from urllib.parse import unquote_plus
+
+from .exceptions import BadRequest
+
+MAX_QUERY_LENGTH = 64 * 1024
+"""Longest query string accepted, in characters."""
+
+MAX_QUERY_PARAMS = 1000
+"""Most `&` separated pairs accepted in a query string."""
+
+_SEQUENCES = (list, set, frozenset, tuple)
+
+
+class QueryParams(Mapping[str, str]):
+    """
+    Immutable multi-dict of query params. Indexing returns the last value of
+    a key, `getlist` every value in order.
+    """
+
+    __slots__ = ("_items", "_dict")
+
+    def __init__(
+        self, items: Mapping[str, Any] | Iterable[tuple[str, str]] = None
+    ) -> None:
+        if items is None:
+            pairs = []
+        elif isinstance(items, QueryParams):
+            pairs = items._items
+        elif isinstance(items, Mapping):
+            pairs = [
+                (key, value)
+                for key, values in items.items()
+                for value in (values if isinstance(values, (list, tuple)) else (values,))
+            ]
+        else:
+            pairs = list(items)
+        self._items: list[tuple[str, str]] = pairs
+        self._dict: dict[str, str] = dict(pairs)
+
+    def __getitem__(self, key: str) -> str:
+        return self._dict[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._dict
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._dict)
+
+    def __len__(self) -> int:
+        return len(self._dict)
+
+    def __repr__(self) -> str:
+        return f"QueryParams({self._items!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._dict.get(key, default)
+
+    def getlist(self, key: str) -> list[str]:
+        return [value for name, value in self._items if name == key]
+
+    def multi_items(self) -> list[tuple[str, str]]:
+        return list(self._items)
+
+
+def parse_query_string(
+    query_string: bytes | str,
+    max_length: int | None = MAX_QUERY_LENGTH,
+    max_params: int | None = MAX_QUERY_PARAMS,
+) -> QueryParams:
+    """
+    Parses an `application/x-www-form-urlencoded` query string, keeping
+    repeated keys and blank values. Raises `BadRequest` when the string is
+    longer than `max_length` or has more than `max_params` pairs.
+    """
+    if isinstance(query_string, bytes):
+        query_string = query_string.decode("latin-1")
+    if not query_string:
+        return QueryParams()
+    if max_length is not None and len(query_string) > max_length:
+        raise BadRequest(f"Query string exceeds {max_length} characters")
+
+    items = query_string.split("&")
+    if max_params is not None and len(items) > max_params:
+        raise BadRequest(f"Query string exceeds {max_params} parameters")
+
+    pairs = []
+    for item in items:
+        if not item:
+            continue
+        name, _, value = item.partition("=")
+        # Most pairs need no decoding at all
+        if "%" in item or "+" in item:
+            name = unquote_plus(name)
+            value = unquote_plus(value)
+        if name:
+            pairs.append((name, value))
+    return QueryParams(pairs)
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "1", "yes", "on"):
+        return True
+    if lowered in ("false", "0", "no", "off", ""):
+        return False
+    raise ValueError(f"Invalid bool {value!r}")
+
+
+_converters: dict[Any, Callable[[str], Any]] = {
+    Any: str,
+    str: str,
+    int: int,
+    float: float,
+    bool: _parse_bool,
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+}
+
+
+@cache
+def query_converter(type_: Any) -> Callable[[str], Any]:
+    """
+    Builds (once per annotation) the function converting a query value into
+    `type_`. It raises ValueError or TypeError on invalid values.
+    """
+    if type_ in _converters:
+        return _converters[type_]
+
+    origin = get_origin(type_)
+    if origin in (Union, UnionType):
+        options = [query_converter(a) for a in get_args(type_) if a is not NoneType]
+        if len(options) == 1:
+            return options[0]
+
+        def convert_union(value: str) -> Any:
+            for option in options:
+                try:
+                    return option(value)
+                except (TypeError, ValueError):
+                    pass
+            raise ValueError(f"Value {value!r} matches no allowed type")
+
+        return convert_union
+    # Enums and other classes are built from the raw string
+    if isinstance(type_, type):
+        return type_
+    return str
+
+
+def _item_type(type_: Any) -> Any | None:
+    """The item type of sequence annotations, None for single values."""
+    origin = get_origin(type_)
+    if origin in _SEQUENCES or type_ in _SEQUENCES:
+        args = get_args(type_)
+        return args[0] if args else Any
+    return None
+
+
+def value_extractor(
+    type_: Any, name: str
+) -> Callable[[QueryParams, list], Any]:
+    """
+    Compiles the extraction of the `name` param as `type_` out of the parsed
+    query. The extractor takes (query, errors) and records conversion errors
+    instead of raising; sequence annotations collect every value of the key.
+    """
+    item_type = _item_type(type_)
+    path = f"query.{name}"
+
+    if item_type is not None:
+        convert = query_converter(item_type)
+        container = get_origin(type_) or type_
+
+        def extract_many(query: QueryParams, errors: list) -> Any:
+            result = []
+            for value in query.getlist(name):
+                try:
+                    result.append(convert(value))
+                except (TypeError, ValueError):
+                    errors.append((path, f"Invalid value {value!r}"))
+            return result if container is list else container(result)
+
+        return extract_many
+
+    convert = query_converter(type_)
+
+    def extract(query: QueryParams, errors: list) -> Any:
+        value = query[name]
+        try:
+            return convert(value)
+        except (TypeError, ValueError):
+            errors.append((path, f"Invalid value {value!r}"))
+            return None
+
+    return extract
+
+
+def dataclass_fields(cls: type) -> list[tuple[str, Callable, Any]]:
+    """
+    (name, extractor, missing) for every init field of a dataclass. `missing`
+    is `MISSING` for required fields, the container type for sequences
+    without a default (they take no values) and None when the dataclass
+    default applies.
+    """
+    hints = get_type_hints(cls)
+    plan = []
+    for field in fields(cls):
+        if not field.init:
+            continue
+        type_ = hints.get(field.name, Any)
+        missing = None
+        if field.default is MISSING and field.default_factory is MISSING:
+            if _item_type(type_) is None:
+                missing = MISSING
+            else:
+                missing = get_origin(type_) or type_
+        plan.append((field.name, value_extractor(type_, field.name), missing))
+    return plan
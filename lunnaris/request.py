@@ -1,15 +1,71 @@
-import json
+import asyncio
 from abc import ABC, abstractmethod
-from types import MappingProxyType
-from typing import Any, Type, Generic, TypeVar
+from types import MappingProxyType, SimpleNamespace
+from dataclasses import MISSING, is_dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Type, Generic, TypeVar, get_origin
+from .codec import Codec, JsonBackend, default_json_backend
+from .decoders import body_decoder
 from .enums import MimeType, Method, Header
+from .exceptions import ClientDisconnect, PayloadTooLarge, UnsupportedMediaType, ValidationError
+from .query import QueryParams, dataclass_fields, parse_query_string, value_extractor
 from .types import Headers
 
 
 T = TypeVar("T")
 
+_EMPTY = MappingProxyType({})
+_UNREAD = object()
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def parse_cookies(cookie: str) -> dict[str, str]:
+    cookies: dict[str, str] = {}
+    for item in cookie.split(";"):
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if sep and name:
+            value = value.strip()
+            if len(value) > 1 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            cookies[name] = value
+    return cookies
+
 
 class Request:
+    """
+    HTTP request. Requests built by the ASGI layer through `from_scope` keep
+    the raw scope values: headers, query params and cookies are decoded on
+    first access and kept on the instance.
+
+    Middlewares attach per-request data to `state`, e.g. `req.state.user`.
+    """
+
+    __slots__ = (
+        "method",
+        "path",
+        "params",
+        "max_body_size",
+        "dependencies",
+        "_state",
+        "_headers",
+        "_raw_headers",
+        "_query",
+        "_query_string",
+        "_cookies",
+        "_json",
+        "_body",
+        "_receive",
+        "_streamed",
+        "_loop",
+    )
+
     def __init__(
         self,
         method: str,
@@ -18,13 +74,161 @@ class Request:
         body: bytes | str | None = None,
         query: dict[str, str] = None,
         params: dict[str, str] = None,
+        receive: Callable[[], Awaitable[dict]] = None,
+        max_body_size: int = None,
     ):
         self.method = method
         self.path = path
-        self.headers = headers if isinstance(headers, Headers) else Headers(headers or {}, True)
-        self.body = body
-        self.query = MappingProxyType(query or {})
+        self._headers = headers if isinstance(headers, Headers) else Headers(headers or {}, True)
+        self._raw_headers = None
+        self._query = QueryParams(query)
+        self._query_string = None
+        self._cookies = None
+        self._json = _UNREAD
         self.params = MappingProxyType(params or {})
+        self.max_body_size = max_body_size
+        self._body = body
+        self._receive = receive
+        self._streamed = False
+        self._loop = None
+        # Request scoped dependencies, created on first use
+        self.dependencies = None
+        self._state = None
+
+    @classmethod
+    def from_scope(
+        cls,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]] = None,
+        max_body_size: int = None,
+    ) -> "Request":
+        """Builds a request from an ASGI HTTP scope without decoding anything."""
+        request = cls.__new__(cls)
+        request.method = scope["method"]
+        request.path = scope["path"]
+        request._headers = None
+        request._raw_headers = scope["headers"]
+        request._query = None
+        request._query_string = scope.get("query_string", b"")
+        request._cookies = None
+        request._json = _UNREAD
+        request.params = _EMPTY
+        request.max_body_size = max_body_size
+        request._body = None
+        request._receive = receive
+        request._streamed = False
+        request._loop = None
+        request.dependencies = None
+        request._state = None
+        return request
+
+    @property
+    def state(self) -> SimpleNamespace:
+        """Free-form data attached by middlewares, created on first access."""
+        state = self._state
+        if state is None:
+            state = self._state = SimpleNamespace()
+        return state
+
+    @property
+    def headers(self) -> Headers:
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = Headers.from_asgi(self._raw_headers)
+        return headers
+
+    @headers.setter
+    def headers(self, headers: dict[str, str] | Headers):
+        self._headers = headers if isinstance(headers, Headers) else Headers(headers, True)
+
+    @property
+    def query(self) -> QueryParams:
+        query = self._query
+        if query is None:
+            query = self._query = parse_query_string(self._query_string)
+        return query
+
+    @query.setter
+    def query(self, query: dict[str, str] | QueryParams):
+        self._query = QueryParams(query)
+
+    @property
+    def cookies(self) -> MappingProxyType:
+        cookies = self._cookies
+        if cookies is None:
+            cookies = self._cookies = MappingProxyType(
+                parse_cookies(self.headers.get(Header.COOKIE, ""))
+            )
+        return cookies
+
+    def json(self, backend: JsonBackend = None) -> Any:
+        """Decodes the JSON body once; later calls return the same value."""
+        if self._json is _UNREAD:
+            self._json = (backend or default_json_backend()).loads(self.body)
+        return self._json
+
+    @property
+    def body(self) -> bytes | str | None:
+        if self._body is None and self._receive is not None:
+            if self._loop is None or _in_event_loop():
+                raise RuntimeError("Request body has not been read, await request.read() first")
+            # Sync code in a worker thread reads it through the event loop
+            return asyncio.run_coroutine_threadsafe(self.read(), self._loop).result()
+        return self._body
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Lets sync code running in worker threads read `body`: the first
+        access reads it on `loop` and blocks until it is done.
+        """
+        self._loop = loop
+
+    @body.setter
+    def body(self, body: bytes | str | None):
+        self._body = body
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """
+        Yields the body chunks as the server delivers them. A body that is
+        already in memory is yielded as a single chunk. Raises `PayloadTooLarge`
+        as soon as the declared or received size goes over `max_body_size`.
+        """
+        if self._body is not None or self._receive is None:
+            if self._body:
+                yield self._body if isinstance(self._body, bytes) else self._body.encode()
+            return
+
+        if self._streamed:
+            raise RuntimeError("Request body has already been consumed")
+        self._streamed = True
+
+        limit = self.max_body_size
+        if limit is not None:
+            length = self.headers.get(Header.CONTENT_LENGTH)
+            if length is not None and length.isdigit() and int(length) > limit:
+                raise PayloadTooLarge(f"Body exceeds {limit} bytes")
+
+        size = 0
+        more_body = True
+        while more_body:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                raise ClientDisconnect()
+
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if chunk:
+                size += len(chunk)
+                if limit is not None and size > limit:
+                    raise PayloadTooLarge(f"Body exceeds {limit} bytes")
+                yield chunk
+
+    async def read(self) -> bytes | str:
+        """Reads the whole body once and keeps it as `body`."""
+        if self._body is None and self._receive is not None:
+            chunks = [chunk async for chunk in self.stream()]
+            self._body = b"".join(chunks)
+        return self._body
 
     def get_body(self):
         if self.method.lower() == Method.GET.lower():
@@ -35,6 +239,7 @@ class Request:
 
 class ITypeMapper(Generic[T], ABC):
     content_type: str
+    reads_body: bool = False
 
     def __init__(self, *args, **kwargs):
         pass
@@ -55,8 +260,15 @@ class ParamMapper(Generic[T], ABC):
 
 class Json(ITypeMapper[T]):
     content_type = MimeType.JSON.lower()
+    reads_body = True
 
-    def map(self, request: Request, type_: Type[T]) -> T:
+    def map(self, request: Request, type_: Type[T], backend: JsonBackend = None) -> T:
+        backend = backend or default_json_backend()
+        if type(self).init_type is ITypeMapper.init_type:
+            return self.compile(type_, backend)(request)
+        return self.init_type(backend.loads(self.read_body(request)), type_)
+
+    def read_body(self, request: Request) -> bytes | str:
         content_type: str = request.headers.get(Header.CONTENT_TYPE.lower(), "").lower()
 
         if self.content_type not in content_type:
@@ -67,29 +279,147 @@ class Json(ITypeMapper[T]):
         if not body:
             raise ValueError("Empty body")
 
-        return self.init_type(json.loads(body), type_)
+        return body
+
+    def compile(self, type_: Type[T], backend: JsonBackend = None) -> Callable[[Request], T]:
+        """
+        Builds the extractor of a `type_` body. The decoder for the type is
+        compiled here, once per handler, and converts and validates nested
+        fields in a single pass over the decoded data.
+        """
+        decode = body_decoder(type_, backend or default_json_backend())
+        read_body = self.read_body
+
+        def extract(request: Request) -> T:
+            return decode(read_body(request))
+
+        return extract
+
+
+class Body(ITypeMapper[T]):
+    """
+    Decodes the body with the codec matching its `Content-Type` among the
+    codecs of the application, JSON and any binary codec registered on it.
+    """
+
+    reads_body = True
+
+    def map(self, request: Request, type_: Type[T], codecs: tuple[Codec, ...] = None) -> T:
+        return self.compile(type_, codecs)(request)
+
+    def compile(
+        self, type_: Type[T], codecs: tuple[Codec, ...] = None
+    ) -> Callable[[Request], T]:
+        codecs = codecs or (default_json_backend(),)
+        decoders = {codec.media_type: body_decoder(type_, codec) for codec in codecs}
+
+        def extract(request: Request) -> T:
+            content_type = request.headers.get(Header.CONTENT_TYPE.lower(), "")
+            decode = decoders.get(content_type.partition(";")[0].strip().lower())
+            if decode is None:
+                raise UnsupportedMediaType(f"Unsupported content type {content_type}")
+
+            body = request.get_body()
+
+            if not body:
+                raise ValueError("Empty body")
+
+            return decode(body)
+
+        return extract
 
 
 class Query(ITypeMapper[T]):
-    def __init__(self, default: dict[str, str] = {}):
-        self.default = default
+    """
+    Builds the whole query into the annotated type. Dataclass fields are
+    converted to their annotated types (sequences take every value of the
+    key), other types are called with the query values as keyword arguments.
+    """
+
+    def __init__(self, default: dict[str, Any] = None):
+        self.default = default or {}
 
     def map(self, request: Request, type_: Type[T]) -> T:
-        query_data = {**self.default}
-        query_data.update(request.query)
-        return type_(**query_data)
+        if type(self).init_type is ITypeMapper.init_type:
+            return self.compile(type_)(request)
+        return self.init_type({**self.default, **request.query}, type_)
+
+    def compile(self, type_: Type[T]) -> Callable[[Request], T]:
+        defaults = self.default
+        if not is_dataclass(type_):
+            def extract(request: Request) -> T:
+                return type_(**{**defaults, **request.query})
+
+            return extract
+
+        plan = dataclass_fields(type_)
+
+        def extract_dataclass(request: Request) -> T:
+            query = request.query
+            kwargs = {}
+            errors = []
+            for name, extract_value, missing in plan:
+                if name in query:
+                    kwargs[name] = extract_value(query, errors)
+                elif name in defaults:
+                    kwargs[name] = defaults[name]
+                elif missing is MISSING:
+                    errors.append((f"query.{name}", "Missing parameter"))
+                elif missing is not None:
+                    kwargs[name] = missing()
+            if errors:
+                raise ValidationError(errors)
+            return type_(**kwargs)
+
+        return extract_dataclass
 
 
 class QueryParam(ParamMapper[T]):
+    """
+    Extracts the query param named like the argument, converted to the
+    annotated type. Sequence annotations (`list[int]`) take every value of
+    the param. Without a default the param is required.
+    """
+
     def __init__(self, default=None) -> None:
         self.default = default
 
     def map(self, req: Request, type_: Type[T], param_name: str) -> T:
-        if param_name not in req.query:
-            if self.default is None:
-                raise ValueError(f"Parameter {param_name} not found in request")
-            if isinstance(self.default, type_):
-                return self.default
-            else:
-                raise ValueError(f"Invalid default value for {param_name}")
-        return type_(req.query[param_name])
+        return self.compile(type_, param_name)(req)
+
+    def compile(self, type_: Type[T], param_name: str) -> Callable[[Request], T]:
+        default = self.default
+        origin = get_origin(type_) or type_
+        if default is not None and isinstance(origin, type) and not isinstance(default, origin):
+            raise ValueError(f"Invalid default value for {param_name}")
+
+        extract_value = value_extractor(type_, param_name)
+
+        def extract(request: Request) -> T:
+            query = request.query
+            if param_name not in query:
+                if default is None:
+                    raise ValidationError([(f"query.{param_name}", "Missing parameter")])
+                return default
+            errors = []
+            value = extract_value(query, errors)
+            if errors:
+                raise ValidationError(errors)
+            return value
+
+        return extract
+
+
+def is_compilable(mapper: ITypeMapper | ParamMapper) -> bool:
+    """
+    Whether a built-in mapper can be compiled into a per-handler extractor.
+    Subclasses overriding `map` or `init_type` are called through `map`, so
+    their hooks keep running.
+    """
+    cls = type(mapper)
+    for base in (Json, Body, Query, QueryParam):
+        if isinstance(mapper, base):
+            return cls.map is base.map and getattr(cls, "init_type", None) is getattr(
+                base, "init_type", None
+            )
+    return False
@@ -1,5 +1,24 @@
+import os
+from email.utils import formatdate
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable
+from .enums import Header, MimeType, Status
+from .exceptions import ServiceUnavailable
+from .executor import ThreadPool
 from .types import Headers
 
+_DONE = object()
+
+
+async def _offload(executor: ThreadPool | None, func: Callable[..., Any], *args: Any) -> Any:
+    """Runs `func` in `executor`, or inline without one or when it is full."""
+    if executor is None:
+        return func(*args)
+    try:
+        return await executor.run(func, *args)
+    except ServiceUnavailable:
+        # The response has started already, so a full pool shouldn't abort it.
+        return func(*args)
+
 
 class Response:
     def __init__(
@@ -16,3 +35,197 @@ class Response:
             self.headers = headers
         else:
             self.headers = Headers({"content-type": "text/html"})
+
+
+class StreamingResponse(Response):
+    """
+    Response whose body is produced chunk by chunk from a sync or async
+    iterable of `bytes` or `str`. The ASGI layer sends every chunk as soon as
+    it is produced, so the body is never held in memory as a whole.
+
+    Sync iterators may block (e.g. a database cursor), so when `iter_chunks`
+    is given an executor every chunk is pulled in a worker thread. Lists and
+    tuples are iterated inline.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        content: Iterable[bytes | str] | AsyncIterable[bytes | str],
+        headers: dict[str, str] | Headers = None,
+    ):
+        super().__init__(status_code, b"", headers)
+        self.content = content
+
+    async def iter_chunks(self, executor: ThreadPool = None) -> AsyncIterator[bytes]:
+        content = self.content
+        if hasattr(content, "__aiter__"):
+            try:
+                async for chunk in content:
+                    if chunk:
+                        yield chunk if isinstance(chunk, bytes) else chunk.encode()
+            finally:
+                if hasattr(content, "aclose"):
+                    await content.aclose()
+        elif executor is None or isinstance(content, (list, tuple)):
+            try:
+                for chunk in content:
+                    if chunk:
+                        yield chunk if isinstance(chunk, bytes) else chunk.encode()
+            finally:
+                if hasattr(content, "close"):
+                    content.close()
+        else:
+            iterator = iter(content)
+            try:
+                while (chunk := await _offload(executor, next, iterator, _DONE)) is not _DONE:
+                    if chunk:
+                        yield chunk if isinstance(chunk, bytes) else chunk.encode()
+            finally:
+                if hasattr(content, "close"):
+                    await _offload(executor, content.close)
+
+
+class FileResponse(StreamingResponse):
+    """
+    Streams a file from disk in `chunk_size` reads. When the ASGI server
+    supports the `http.response.pathsend` or `http.response.zerocopysend`
+    extensions, the file is handed to the server instead. Otherwise the
+    file is opened and read in the executor given to `iter_chunks`.
+
+    Single `Range` requests (honouring `If-Range`) are answered with partial
+    content through `apply_range`.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        status_code: int = 200,
+        headers: dict[str, str] | Headers = None,
+        media_type: str = None,
+        filename: str = None,
+        chunk_size: int = None,
+    ):
+        self.path = os.fspath(path)
+        stat = os.stat(self.path)
+        self.size = stat.st_size
+        self.range: tuple[int, int] | None = None
+        if chunk_size:
+            self.chunk_size = chunk_size
+
+        file_headers = {
+            Header.CONTENT_TYPE: media_type or MimeType.from_path(self.path),
+            Header.CONTENT_LENGTH: str(self.size),
+            Header.LAST_MODIFIED: formatdate(stat.st_mtime, usegmt=True),
+            Header.ETAG: f'"{stat.st_mtime_ns:x}-{self.size:x}"',
+            Header.ACCEPT_RANGES: "bytes",
+        }
+        if filename:
+            file_headers[Header.CONTENT_DISPOSITION] = f'attachment; filename="{filename}"'
+
+        super().__init__(status_code, (), Headers(file_headers))
+        if headers:
+            self.headers.update(Headers(dict(headers)).dict())
+
+    def apply_range(self, request_headers: Headers):
+        value = request_headers.get(Header.RANGE)
+        if not value or self.status_code != Status.OK:
+            return
+
+        if_range = request_headers.get(Header.IF_RANGE)
+        if if_range and not _if_range_matches(if_range.strip(), self.headers):
+            return
+
+        byte_range = _parse_range(value, self.size)
+        if byte_range is None:
+            return
+
+        if byte_range is _UNSATISFIABLE:
+            self.status_code = Status.RANGE_NOT_SATISFIABLE
+            self.range = (0, -1)
+            self.headers[Header.CONTENT_RANGE] = f"bytes */{self.size}"
+            self.headers[Header.CONTENT_LENGTH] = "0"
+            return
+
+        start, end = byte_range
+        self.status_code = Status.PARTIAL_CONTENT
+        self.range = byte_range
+        self.headers[Header.CONTENT_RANGE] = f"bytes {start}-{end}/{self.size}"
+        self.headers[Header.CONTENT_LENGTH] = str(end - start + 1)
+
+    @property
+    def offset(self) -> int:
+        return self.range[0] if self.range else 0
+
+    @property
+    def count(self) -> int:
+        if self.range:
+            return self.range[1] - self.range[0] + 1
+        return self.size
+
+    async def iter_chunks(self, executor: ThreadPool = None) -> AsyncIterator[bytes]:
+        remaining = self.count
+        if remaining <= 0:
+            return
+
+        # Disk reads may block, so with an executor they run in a worker thread
+        file = await _offload(executor, open, self.path, "rb")
+        try:
+            file.seek(self.offset)
+            while remaining > 0:
+                chunk = await _offload(executor, file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+
+_UNSATISFIABLE = object()
+
+
+def _if_range_matches(if_range: str, headers: Headers) -> bool:
+    """
+    `If-Range` requires a strong comparison (RFC 9110, 13.1.5): weak entity
+    tags, on either side, never match.
+    """
+    if if_range.startswith(("W/", '"')):
+        etag = headers.get(Header.ETAG)
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+    return if_range == headers.get(Header.LAST_MODIFIED)
+
+
+def _parse_range(value: str, size: int):
+    """
+    Parses a single `bytes=` range into inclusive (start, end) offsets.
+    Returns None when the header should be ignored (malformed or multiple
+    ranges) and `_UNSATISFIABLE` when no byte of the file is selected.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                return _UNSATISFIABLE
+            return max(size - suffix, 0), size - 1
+
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+
+    if start > end:
+        return None
+    if start >= size:
+        return _UNSATISFIABLE
+    return start, min(end, size - 1)
@@ -1,10 +1,16 @@
+from collections import OrderedDict
+from types import MappingProxyType
+from .converters import PATH, Converter, converters, parse_segment
 from .handler import RequestHandler
 
 class RouteNode:
     def __init__(self):
         self.children = {}  # Inicializa children como un diccionario de instancia
+        self.params: list[RouteNode] = []  # Parameter children, tried in order
         self.is_terminal = False
         self.param_name = None
+        self.param_type: str | None = None
+        self.converter: Converter | None = None
         self.handler = {}  # Inicializa handler como un diccionario de instancia
 
     def __str__(self) -> str:
@@ -13,21 +19,51 @@ class RouteNode:
     def __repr__(self) -> str:
         return str(self)
 
+
+def _param_priority(node: RouteNode) -> int:
+    # Typed segments are tried before raw strings, `path` always goes last
+    # since it swallows the rest of the url.
+    if node.param_type == PATH:
+        return 2
+    if node.param_type in (None, "str"):
+        return 1
+    return 0
+
+
 class RouteMatcher:
-    def __init__(self):
+    def __init__(self, cache_size: int = 0):
         self.root = RouteNode()
+        # Routes without parameters resolve with a single dict lookup on the
+        # normalized path before walking the trie.
+        self.static_routes: dict[str, dict[str, RequestHandler]] = {}
+        # Recent dynamic resolutions, least recently used first.
+        self.cache_size = cache_size
+        self.cache: OrderedDict[str, tuple | None] = OrderedDict()
+        self.frozen = False
 
     def add_route(self, handler: RequestHandler):
+        if self.frozen:
+            raise RuntimeError("Can't add routes to a frozen router")
         current_node: RouteNode = self.root
-        segments = handler.path.strip("/").split("/")
-
-        for segment in segments:
-            if segment.startswith("{") and segment.endswith("}"):
-                param_name = segment[1:-1]
-                if "{param}" not in current_node.children:
-                    current_node.children["{param}"] = RouteNode()
-                current_node = current_node.children["{param}"]
-                current_node.param_name = param_name
+        path = handler.path.strip("/")
+        segments = path.split("/")
+        self.cache.clear()
+
+        for i, segment in enumerate(segments):
+            param = parse_segment(segment)
+            if param:
+                param_name, param_type = param
+                if param_type == PATH and i != len(segments) - 1:
+                    raise ValueError(f"Path parameter {param_name} must be the last segment")
+                node = current_node.children.get(segment)
+                if node is None:
+                    node = current_node.children[segment] = RouteNode()
+                    node.param_name = param_name
+                    node.param_type = param_type
+                    node.converter = converters[param_type] if param_type else None
+                    current_node.params.append(node)
+                    current_node.params.sort(key=_param_priority)
+                current_node = node
             else:
                 if segment not in current_node.children:
                     current_node.children[segment] = RouteNode()
@@ -36,26 +72,104 @@ class RouteMatcher:
         current_node.is_terminal = True
         current_node.handler[handler.method] = handler
 
-    def match(self, path: str, method: str):
-        current_node: RouteNode = self.root
-        segments = path.strip("/").split("/")
-        params = {}
+        if "{" not in path:
+            self.static_routes[path] = current_node.handler
 
-        for segment in segments:
-            if segment in current_node.children:
-                current_node = current_node.children[segment]
-            elif "{param}" in current_node.children:
-                current_node = current_node.children["{param}"]
-                params[current_node.param_name] = segment
-            else:
-                return None
+    def freeze(self):
+        """Makes the route table read only."""
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            node.handler = MappingProxyType(node.handler)
+            node.children = MappingProxyType(node.children)
+            node.params = tuple(node.params)
+            nodes.extend(node.children.values())
+
+        self.static_routes = MappingProxyType(
+            {path: MappingProxyType(methods) for path, methods in self.static_routes.items()}
+        )
+        self.frozen = True
 
-        if current_node.is_terminal and method in current_node.handler:
+    def match(self, path: str, method: str):
+        resolved = self.resolve(path)
+        if resolved is None:
+            return None
+
+        methods, params = resolved
+        if method in methods:
             return (
-                current_node.handler[method],
+                methods[method],
                 params,
             )  # Devolvemos la función asociada y los parámetros
         return None
 
+    def resolve(self, path: str) -> tuple[dict[str, RequestHandler], dict] | None:
+        """
+        Returns the method table of the route matching `path` together with
+        its parameters, or None when no route matches. The caller picks the
+        handler, so a method mismatch can be told apart from an unknown path.
+        """
+        normalized = path.strip("/")
+        methods = self.static_routes.get(normalized)
+        if methods is not None:
+            return methods, {}
+
+        if not self.cache_size:
+            return self._resolve(normalized)
+
+        if normalized in self.cache:
+            self.cache.move_to_end(normalized)
+            resolved = self.cache[normalized]
+        else:
+            resolved = self._resolve(normalized)
+            self.cache[normalized] = resolved
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        if resolved is None:
+            return None
+        return resolved[0], dict(resolved[1])
+
+    def _resolve(self, normalized: str):
+        params = {}
+        current_node = self._walk(self.root, normalized.split("/"), 0, params)
+        if current_node is None:
+            return None
+        return current_node.handler, params
+
+    def _walk(self, node: RouteNode, segments: list[str], i: int, params: dict):
+        if i == len(segments):
+            return node if node.is_terminal else None
+
+        segment = segments[i]
+        child = node.children.get(segment)
+        if child is not None and child.param_name is None:
+            found = self._walk(child, segments, i + 1, params)
+            if found:
+                return found
+
+        for child in node.params:
+            if child.param_type == PATH:
+                if segment and child.is_terminal:
+                    params[child.param_name] = "/".join(segments[i:])
+                    return child
+                continue
+
+            if child.converter is None:
+                value = segment
+            else:
+                try:
+                    value = child.converter(segment)
+                except ValueError:
+                    continue
+
+            params[child.param_name] = value
+            found = self._walk(child, segments, i + 1, params)
+            if found:
+                return found
+            del params[child.param_name]
+
+        return None
+
     def __str__(self) -> str:
         return str(self.root.children)
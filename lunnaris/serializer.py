@@ -1,6 +1,17 @@
-from dataclasses import asdict, is_dataclass
-import json
-from typing import Type, Callable, Any, Union, Protocol
+from dataclasses import is_dataclass
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Protocol,
+    Type,
+    Union,
+)
+from .codec import Codec, JsonBackend, default_json_backend
+from .encoders import dataclass_encoder
 
 
 class ExtendedSerializer(Protocol):
@@ -13,56 +24,183 @@ class ExtendedSerializer(Protocol):
 
 SerializerCallback = Callable[[Any], Union[str, dict]]
 
+PRIMITIVES = (str, dict, bytes, int, float, bool)
+SERIALIZED = (str, dict)
+
+_MISS = object()
+
+
+def _identity(obj: Any) -> Any:
+    return obj
+
+
+def _type_encoder(callback: SerializerCallback) -> Callable[[Any], Any]:
+    def encode(obj: Any) -> Any:
+        serialized = callback(obj)
+        return serialized if isinstance(serialized, SERIALIZED) else _MISS
+
+    return encode
+
+
+def _extended_encoder(extended_serializer: ExtendedSerializer) -> Callable[[Any], Any]:
+    def encode(obj: Any) -> Any:
+        if extended_serializer.match(obj):
+            result = extended_serializer.serialize(obj)
+            if isinstance(result, SERIALIZED):
+                return result
+        return _MISS
+
+    return encode
+
 
 class Serializer:
     def __init__(
         self,
         types: dict[Type, SerializerCallback] = None,
         extended_serializers: list[ExtendedSerializer] = None,
+        json_backend: JsonBackend = None,
     ):
         self.__types: dict[Type, SerializerCallback] = types or {}
         self.extended_serializers = extended_serializers or []
+        self.json_backend = json_backend or default_json_backend()
+        # Exact type -> encoder resolved by the last full lookup for that type
+        self.__dispatch: dict[Type, Callable[[Any], Any]] = {}
 
     def serialize(self, obj: Any) -> tuple[str, str]:
+        body, content_type = self.encode(obj)
+        return body.decode(), content_type
+
+    def encode(self, obj: Any, codec: Codec = None) -> tuple[bytes, str]:
+        """
+        Serializes `obj` straight to the bytes sent in the response. Lists and
+        dicts are written with `codec`, JSON by default.
+        """
+        codec = codec or self.json_backend
         if isinstance(obj, list):
-            return json.dumps([self._serialize_single(o) for o in obj]), "application/json"
+            serialize_single = self._serialize_single
+            return (
+                codec.dumps([serialize_single(o) for o in obj]),
+                codec.media_type,
+            )
         else:
             serialized = self._serialize_single(obj)
             if isinstance(serialized, (str, bytes, int, float, bool)):
                 if isinstance(serialized, bytes):
-                    serialized = serialized.decode()
-                return str(serialized), "text/html"
+                    return serialized, "text/html"
+                return str(serialized).encode(), "text/html"
             elif isinstance(serialized, dict):
-                return json.dumps(serialized), "application/json"
+                return codec.dumps(serialized), codec.media_type
 
         raise TypeError(f"Could not serialize {obj}")
 
+    def iter_encode(self, items: Iterable[Any], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Encodes `items` as a JSON array one element at a time, yielding chunks
+        of about `chunk_size` bytes. Only one chunk is held in memory, so it can
+        back a streaming response for arbitrarily large collections.
+        """
+        encoder = _ArrayEncoder(self, chunk_size)
+        for item in items:
+            chunk = encoder.add(item)
+            if chunk:
+                yield chunk
+        yield encoder.close()
+
+    async def aiter_encode(
+        self, items: AsyncIterable[Any], chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Same as `iter_encode` for async iterables."""
+        encoder = _ArrayEncoder(self, chunk_size)
+        async for item in items:
+            chunk = encoder.add(item)
+            if chunk:
+                yield chunk
+        yield encoder.close()
+
     def add_serializer(self, t: Type, callback: SerializerCallback):
-        print("Some type", t)
         self.__types[t] = callback
+        self.__dispatch.clear()
 
     def add_object_serializer(self, object_serializer: ExtendedSerializer):
         self.extended_serializers.append(object_serializer)
+        self.__dispatch.clear()
 
     def _serialize_single(self, obj: Any) -> Union[str, dict, int, float, bool]:
-        if isinstance(obj, (str, dict, bytes, int, float, bool)):
+        encode = self.__dispatch.get(type(obj))
+        if encode is not None:
+            serialized = encode(obj)
+            if serialized is not _MISS:
+                return serialized
+            return self._resolve_single(obj, dispatch={})
+        return self._resolve_single(obj)
+
+    def _resolve_single(
+        self, obj: Any, dispatch: dict[Type, Callable[[Any], Any]] = None
+    ) -> Union[str, dict, int, float, bool]:
+        """
+        Full lookup through primitives, dataclasses, registered types and
+        extended serializers. The encoder that succeeds is cached for the exact
+        type of `obj`, so later objects of that type skip the lookup. Extended
+        serializers are expected to match on the type, when the cached one
+        rejects an object the full lookup runs again for that object only.
+        """
+        if dispatch is None:
+            dispatch = self.__dispatch
+        t = type(obj)
+        if isinstance(obj, PRIMITIVES):
+            dispatch[t] = _identity
             return obj  # Directly return primitive types without converting them to strings
-        elif is_dataclass(obj):
-            return asdict(obj)
+        elif is_dataclass(obj) and not isinstance(obj, type):
+            encode = dispatch[t] = dataclass_encoder(t)
+            return encode(obj)
         else:
             for obj_type, callback in self.__types.items():
                 if isinstance(obj, obj_type):
                     serialized = callback(obj)
-                    if isinstance(serialized, (str, dict)):
+                    if isinstance(serialized, SERIALIZED):
+                        dispatch[t] = _type_encoder(callback)
                         return serialized
-            
+
             for extended_serializer in self.extended_serializers:
                 if extended_serializer.match(obj):
                     result = extended_serializer.serialize(obj)
-                    if isinstance(result, (str, dict)):
+                    if isinstance(result, SERIALIZED):
+                        dispatch[t] = _extended_encoder(extended_serializer)
                         return result
-                    
+
             raise TypeError(f"Could not serialize {obj}")
 
     def __str__(self) -> str:
         return str(self.__types)
+
+
+class _ArrayEncoder:
+    def __init__(self, serializer: Serializer, chunk_size: int) -> None:
+        self.dumps = serializer.json_backend.dumps
+        self.serialize_single = serializer._serialize_single
+        self.chunk_size = chunk_size
+        self.parts = [b"["]
+        self.size = 1
+        self.empty = True
+
+    def add(self, item: Any) -> bytes | None:
+        if self.empty:
+            self.empty = False
+        else:
+            self.parts.append(b",")
+        encoded = self.dumps(self.serialize_single(item))
+        self.parts.append(encoded)
+        self.size += len(encoded) + 1
+        if self.size < self.chunk_size:
+            return None
+        return self.flush()
+
+    def flush(self) -> bytes:
+        chunk = b"".join(self.parts)
+        self.parts = []
+        self.size = 0
+        return chunk
+
+    def close(self) -> bytes:
+        self.parts.append(b"]")
+        return self.flush()
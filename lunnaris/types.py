@@ -3,6 +3,17 @@ class Headers:
         self.__headers = {k.lower(): v for k, v in headers.items()}
         self.__frozen = frozen
 
+    @classmethod
+    def from_asgi(cls, raw: list[tuple[bytes, bytes]], frozen=True) -> "Headers":
+        """
+        Builds headers from ASGI `(name, value)` byte pairs. Servers already
+        send names lowercased, so they aren't lowercased again.
+        """
+        headers = cls.__new__(cls)
+        headers.__headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in raw}
+        headers.__frozen = frozen
+        return headers
+
     def __getitem__(self, key):
         return self.__headers[key.lower()]
 
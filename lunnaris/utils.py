@@ -0,0 +1,10 @@
+from functools import partial
+from inspect import iscoroutinefunction
+from typing import Any
+
+
+def is_async_callable(obj: Any) -> bool:
+    while isinstance(obj, partial):
+        obj = obj.func
+
+    return iscoroutinefunction(obj) or iscoroutinefunction(getattr(obj, "__call__", None))
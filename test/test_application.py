@@ -1,6 +1,10 @@
-from unittest import TestCase
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase
 from lunnaris.application import Application, Serializer
-from lunnaris.handler import get
+from lunnaris.conditional import ETag
+from lunnaris.controller import Controller
+from lunnaris.handler import cache, get, get_handler, post
 from lunnaris.request import Request
 from lunnaris.response import Response
 from lunnaris.routes import RouteMatcher
@@ -101,7 +105,7 @@ class TestApplication(TestCase):
 
         self.assertIsInstance(res, Response)
         self.assertEqual(res.status_code, 200)
-        self.assertEqual(res.body, b'{"name": "John Doe"}')
+        self.assertEqual(json.loads(res.body), {"name": "John Doe"})
         self.assertEqual(res.headers["Content-Type"], "application/json")
 
     def test_custom_serialization(self):
@@ -131,4 +135,203 @@ class TestApplication(TestCase):
         self.assertIsInstance(res, Response)
         self.assertEqual(res.status_code, 200)
         self.assertEqual(res.body, b'<name>John Doe</name>')
-        self.assertEqual(res.headers["Content-Type"], "text/html")
\ No newline at end of file
+        self.assertEqual(res.headers["Content-Type"], "text/html")
+
+    def test_typed_path_param(self):
+        @get("/items/{id:int}")
+        def handler(id: int):
+            return str(id + 1)
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        self.assertEqual(app.run(Request("GET", "/items/41")).body, b"42")
+        self.assertEqual(app.run(Request("GET", "/items/x")).status_code, 404)
+
+
+class TestApplicationAsync(IsolatedAsyncioTestCase):
+    async def test_async_handler(self):
+        @get("/")
+        async def handler():
+            await asyncio.sleep(0)
+            return {"name": "John Doe"}
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        res = await app.run_async(Request("GET", "/"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(json.loads(res.body), {"name": "John Doe"})
+
+    async def test_sync_handler(self):
+        @get("/")
+        def handler():
+            return "Hello, world!"
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        res = await app.run_async(Request("GET", "/"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.body, b"Hello, world!")
+
+    async def test_async_middlewares(self):
+        calls = []
+
+        async def pre(req):
+            calls.append("pre")
+            return req
+
+        async def post(res):
+            calls.append("post")
+            return res.upper()
+
+        @get("/", pre_middleware=[pre], post_middleware=[post])
+        async def handler():
+            calls.append("handler")
+            return "hello"
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        res = await app.run_async(Request("GET", "/"))
+
+        self.assertEqual(res.body, b"HELLO")
+        self.assertEqual(calls, ["pre", "handler", "post"])
+
+    async def test_sync_run_rejects_async_handler(self):
+        @get("/")
+        async def handler():
+            return "hello"
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        res = app.run(Request("GET", "/"))
+
+        self.assertEqual(res.status_code, 500)
+
+
+class TestMethodDispatch(TestCase):
+    def setUp(self):
+        @get("/items")
+        def list_items():
+            return "items"
+
+        @post("/items")
+        def create_item():
+            return "created"
+
+        self.app = Application()
+        self.app.add_function_handler(list_items)
+        self.app.add_function_handler(create_item)
+
+    def test_method_not_allowed(self):
+        res = self.app.run(Request("DELETE", "/items"))
+
+        self.assertEqual(res.status_code, 405)
+        self.assertEqual(res.headers["Allow"], "GET, HEAD, OPTIONS, POST")
+
+    def test_unknown_path_is_not_found(self):
+        res = self.app.run(Request("DELETE", "/other"))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_head_uses_get_handler_without_body(self):
+        res = self.app.run(Request("HEAD", "/items"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.body, b"")
+        self.assertEqual(res.headers["Content-Length"], "5")
+
+    def test_options(self):
+        res = self.app.run(
+            Request("OPTIONS", "/items", headers={"Access-Control-Request-Method": "POST"})
+        )
+
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(res.headers["Allow"], "GET, HEAD, OPTIONS, POST")
+        self.assertEqual(
+            res.headers["Access-Control-Allow-Methods"], "GET, HEAD, OPTIONS, POST"
+        )
+
+
+class TestFreeze(IsolatedAsyncioTestCase):
+    async def test_startup_freezes_and_runs_warmups(self):
+        @get("/")
+        def handler():
+            return "hello"
+
+        class Cache:
+            instances = 0
+
+            def __init__(self):
+                Cache.instances += 1
+
+        warmed = []
+
+        async def warmup(app):
+            warmed.append((await app.run_async(Request("GET", "/"))).body)
+
+        app = Application()
+        app.container.add_dependency(Cache, cached=True)
+        app.add_function_handler(handler)
+        app.add_warmup(warmup)
+
+        await app.startup()
+
+        self.assertTrue(app.frozen)
+        self.assertEqual(Cache.instances, 1)
+        self.assertEqual(warmed, [b"hello"])
+        self.assertIsInstance(app.handlers[0].pre_middleware, tuple)
+        self.assertFalse(get_handler(handler).frozen)
+
+    async def test_apps_built_from_the_same_handlers(self):
+        @cache()
+        @get("/")
+        def handler():
+            return "hello"
+
+        class Items(Controller):
+            __route__ = "/items"
+
+            @get("")
+            def items(self):
+                return "items"
+
+        def create_app():
+            app = Application(pre_middlewares=[lambda req: None], etag=ETag())
+            app.add_function_handler(handler)
+            app.add_controller(Items)
+            return app
+
+        first = create_app()
+        await first.startup()
+        second = create_app()
+        await second.startup()
+
+        for app in (first, second):
+            self.assertEqual((await app.run_async(Request("GET", "/"))).body, b"hello")
+            self.assertEqual((await app.run_async(Request("GET", "/items"))).body, b"items")
+            self.assertEqual(len(app.handlers[0].pre_middleware), 1)
+            self.assertEqual(app.handlers[0].cache.misses, 1)
+            self.assertIs(app.handlers[0].container, app.container)
+        self.assertIsNot(first.handlers[0].cache, second.handlers[0].cache)
+        original = get_handler(handler)
+        self.assertFalse(original.frozen)
+        self.assertIsNone(original.etag)
+        self.assertEqual(original.pre_middleware, [])
+        self.assertEqual(get_handler(Items.items).path, "")
+
+    async def test_frozen_application_rejects_handlers(self):
+        @get("/")
+        def handler():
+            return "hello"
+
+        app = Application()
+        app.freeze()
+
+        with self.assertRaisesRegex(RuntimeError, "frozen"):
+            app.add_function_handler(handler)
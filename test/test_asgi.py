@@ -0,0 +1,287 @@
+import json
+import os
+import tempfile
+import threading
+from unittest import IsolatedAsyncioTestCase
+from lunnaris import asgi
+from lunnaris.application import Application
+from lunnaris.handler import get, post
+from lunnaris.request import Request
+from lunnaris.response import FileResponse, StreamingResponse
+
+
+def http_scope(method="GET", path="/", headers=None, query_string=b""):
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()],
+        "query_string": query_string,
+    }
+
+
+class ASGICall:
+    def __init__(self, *chunks: bytes):
+        self.received = [
+            {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+            for i, chunk in enumerate(chunks or (b"",))
+        ]
+        self.sent = []
+
+    async def receive(self):
+        return self.received.pop(0)
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    @property
+    def status(self):
+        return self.sent[0]["status"]
+
+    @property
+    def body(self):
+        return b"".join(m.get("body", b"") for m in self.sent[1:])
+
+
+class TestASGIRequestBody(IsolatedAsyncioTestCase):
+    async def test_sync_handler_gets_buffered_body(self):
+        @post("/")
+        def handler(req: Request):
+            return req.body
+
+        app = Application()
+        app.add_function_handler(handler)
+        call = ASGICall(b"hello ", b"world")
+
+        await asgi.create_asgi_app(app)(http_scope("POST"), call.receive, call.send)
+
+        self.assertEqual(call.status, 200)
+        self.assertEqual(call.body, b"hello world")
+
+    async def test_async_handler_streams_body(self):
+        @post("/")
+        async def handler(req: Request):
+            return str([len(chunk) async for chunk in req.stream()])
+
+        app = Application()
+        app.add_function_handler(handler)
+        call = ASGICall(b"abc", b"de")
+
+        await asgi.create_asgi_app(app)(http_scope("POST"), call.receive, call.send)
+
+        self.assertEqual(call.body, b"[3, 2]")
+
+    async def test_oversize_body_is_rejected(self):
+        @post("/")
+        def handler(req: Request):
+            return req.body
+
+        app = Application(max_body_size=4)
+        app.add_function_handler(handler)
+        call = ASGICall(b"abc", b"de")
+
+        await asgi.create_asgi_app(app)(http_scope("POST"), call.receive, call.send)
+
+        self.assertEqual(call.status, 413)
+
+
+class TestASGIStreamingResponse(IsolatedAsyncioTestCase):
+    async def run_handler(self, handler):
+        app = Application()
+        app.add_function_handler(handler)
+        call = ASGICall()
+        await asgi.create_asgi_app(app)(http_scope(), call.receive, call.send)
+        return call
+
+    async def test_sync_iterable(self):
+        @get("/")
+        def handler():
+            return StreamingResponse(200, (f"{i}\n" for i in range(3)))
+
+        call = await self.run_handler(handler)
+
+        self.assertEqual(
+            [(m["body"], m["more_body"]) for m in call.sent[1:]],
+            [(b"0\n", True), (b"1\n", True), (b"2\n", True), (b"", False)],
+        )
+
+    async def test_sync_iterable_runs_in_threadpool(self):
+        threads = []
+
+        def rows():
+            for i in range(2):
+                threads.append(threading.current_thread())
+                yield f"{i},"
+
+        @get("/")
+        def handler():
+            return StreamingResponse(200, rows())
+
+        call = await self.run_handler(handler)
+
+        self.assertEqual(call.body, b"0,1,")
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_async_iterable(self):
+        async def rows():
+            for i in range(2):
+                yield f"{i},"
+
+        @get("/")
+        def handler():
+            return StreamingResponse(200, rows(), {"content-type": "text/csv"})
+
+        call = await self.run_handler(handler)
+
+        self.assertEqual(call.status, 200)
+        self.assertIn([b"content-type", b"text/csv"], call.sent[0]["headers"])
+        self.assertEqual(call.body, b"0,1,")
+
+
+class TestASGIFileResponse(IsolatedAsyncioTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "wb") as file:
+            file.write(b"0123456789")
+
+        @get("/file")
+        def handler():
+            return FileResponse(self.path)
+
+        self.app = Application()
+        self.app.add_function_handler(handler)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    async def request(self, headers=None, extensions=None):
+        scope = http_scope(path="/file", headers=headers)
+        if extensions:
+            scope["extensions"] = extensions
+        call = ASGICall()
+        await asgi.create_asgi_app(self.app)(scope, call.receive, call.send)
+        return call
+
+    async def test_streams_range(self):
+        call = await self.request({"range": "bytes=3-4"})
+
+        self.assertEqual(call.status, 206)
+        self.assertEqual(call.body, b"34")
+
+    async def test_uses_pathsend(self):
+        call = await self.request(extensions={"http.response.pathsend": {}})
+
+        self.assertEqual(call.sent[1], {"type": "http.response.pathsend", "path": self.path})
+
+    async def test_uses_zerocopysend_for_ranges(self):
+        call = await self.request(
+            {"range": "bytes=3-4"},
+            {"http.response.pathsend": {}, "http.response.zerocopysend": {}},
+        )
+
+        message = call.sent[1]
+        self.assertEqual(message["type"], "http.response.zerocopysend")
+        self.assertEqual((message["offset"], message["count"]), (3, 2))
+
+
+class TestASGILifespan(IsolatedAsyncioTestCase):
+    async def run_lifespan(self, app):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await asgi.create_asgi_app(app)({"type": "lifespan"}, receive, send)
+        return sent
+
+    async def test_startup_freezes_application(self):
+        app = Application()
+
+        sent = await self.run_lifespan(app)
+
+        self.assertTrue(app.frozen)
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+
+    async def test_failed_startup(self):
+        def warmup(app):
+            raise ValueError("boom")
+
+        app = Application()
+        app.add_warmup(warmup)
+
+        sent = await self.run_lifespan(app)
+
+        self.assertEqual(sent, ["lifespan.startup.failed"])
+
+    async def test_startup_and_shutdown_hooks(self):
+        class Pool:
+            def __init__(self):
+                self.closed = False
+
+        class Repository:
+            def __init__(self, pool: Pool):
+                self.pool = pool
+
+        app = Application()
+        app.container.add_dependency(Repository, cached=True)
+
+        @app.on_startup(provides=Pool)
+        async def open_pool():
+            return Pool()
+
+        @app.on_shutdown
+        def close_pool(pool: Pool):
+            pool.closed = True
+
+        sent = await self.run_lifespan(app)
+        repository = app.container.resolve(Repository)
+
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+        self.assertIs(repository.pool, app.container.resolve(Pool))
+        self.assertTrue(repository.pool.closed)
+
+    async def test_failed_shutdown(self):
+        app = Application()
+
+        @app.on_shutdown
+        def close():
+            raise ValueError("boom")
+
+        sent = await self.run_lifespan(app)
+
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.failed"])
+
+
+class TestASGIStreamedCollections(IsolatedAsyncioTestCase):
+    async def test_generator_result_is_streamed(self):
+        @get("/")
+        def handler():
+            return ({"id": i} for i in range(3))
+
+        app = Application()
+        app.add_function_handler(handler)
+        call = ASGICall()
+
+        await asgi.create_asgi_app(app)(http_scope(), call.receive, call.send)
+
+        self.assertIn([b"content-type", b"application/json"], call.sent[0]["headers"])
+        self.assertTrue(call.sent[1]["more_body"])
+        self.assertEqual(json.loads(call.body), [{"id": 0}, {"id": 1}, {"id": 2}])
+
+    async def test_large_list_is_streamed(self):
+        @get("/")
+        def handler():
+            return list(range(10))
+
+        app = Application(stream_threshold=5)
+        app.add_function_handler(handler)
+        call = ASGICall()
+
+        await asgi.create_asgi_app(app)(http_scope(), call.receive, call.send)
+
+        self.assertTrue(call.sent[1]["more_body"])
+        self.assertEqual(json.loads(call.body), list(range(10)))
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.application import Application
+from lunnaris.cache import CachedResponse, MemoryStore
+from lunnaris.exceptions import Unauthorized
+from lunnaris.handler import cache, get
+from lunnaris.request import Request
+
+
+def entry(body: bytes) -> CachedResponse:
+    return CachedResponse(200, body, {})
+
+
+class TestMemoryStore(TestCase):
+    def test_evicts_least_recently_used(self):
+        store = MemoryStore(max_entries=2)
+        store.set("a", entry(b"a"), 60)
+        store.set("b", entry(b"b"), 60)
+        store.get("a")
+        store.set("c", entry(b"c"), 60)
+
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNone(store.get("b"))
+        self.assertIsNotNone(store.get("c"))
+
+    def test_byte_limit(self):
+        store = MemoryStore(max_bytes=10)
+        store.set("a", entry(b"x" * 6), 60)
+        store.set("b", entry(b"x" * 6), 60)
+        store.set("c", entry(b"x" * 11), 60)
+
+        self.assertIsNone(store.get("a"))
+        self.assertIsNone(store.get("c"))
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.size, 6)
+
+    def test_expired_entries(self):
+        store = MemoryStore()
+        store.set("a", entry(b"a"), 0)
+
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.size, 0)
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        @cache(ttl=60, query=["page"], headers=["Accept-Language"])
+        @get("/items")
+        def items(request: Request):
+            self.calls += 1
+            return {"page": request.query.get("page"), "call": self.calls}
+
+        self.app = Application()
+        self.app.add_function_handler(items)
+
+    def run_app(self, query=None, headers=None, method="GET"):
+        res = self.app.run(Request(method, "/items", headers=headers, query=query or {}))
+        return json.loads(res.body) if res.body else res
+
+    def test_hits_skip_the_handler(self):
+        self.assertEqual(self.run_app({"page": "1"}), {"page": "1", "call": 1})
+        self.assertEqual(self.run_app({"page": "1", "other": "x"}), {"page": "1", "call": 1})
+        self.assertEqual(self.run_app({"page": "2"}), {"page": "2", "call": 2})
+        self.assertEqual(self.calls, 2)
+
+    def test_vary_headers_are_part_of_the_key(self):
+        self.run_app(headers={"accept-language": "en"})
+        self.run_app(headers={"accept-language": "es"})
+        self.run_app(headers={"accept-language": "en"})
+
+        self.assertEqual(self.calls, 2)
+
+    def test_head_shares_get_entries(self):
+        self.run_app()
+        res = self.run_app(method="HEAD")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.calls, 1)
+
+    def test_uncacheable_responses(self):
+        @cache()
+        @get("/private")
+        def private():
+            self.calls += 1
+            return "secret", 200, {"Cache-Control": "private"}
+
+        self.app.add_function_handler(private)
+        self.app.run(Request("GET", "/private"))
+        self.app.run(Request("GET", "/private"))
+
+        self.assertEqual(self.calls, 2)
+
+
+class TestCacheWithPreMiddlewares(IsolatedAsyncioTestCase):
+    def setUp(self):
+        def auth(request: Request):
+            if "authorization" not in request.headers:
+                raise Unauthorized("Missing credentials")
+
+        @cache()
+        @get("/me")
+        def me():
+            return {"secret": "data"}
+
+        self.app = Application(pre_middlewares=[auth])
+        self.app.add_function_handler(me)
+        self.authorized = {"authorization": "Bearer token"}
+
+    def test_hits_run_pre_middlewares(self):
+        res = self.app.run(Request("GET", "/me", headers=self.authorized))
+        self.assertEqual(res.status_code, 200)
+
+        res = self.app.run(Request("GET", "/me"))
+        self.assertEqual(res.status_code, 401)
+        self.assertNotIn(b"secret", res.body)
+
+    async def test_async_hits_run_pre_middlewares(self):
+        res = await self.app.run_async(Request("GET", "/me", headers=self.authorized))
+        self.assertEqual(res.status_code, 200)
+
+        res = await self.app.run_async(Request("GET", "/me"))
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(self.app.handlers[0].cache.hits, 0)
+
+
+class TestCoalescing(IsolatedAsyncioTestCase):
+    def test_threads_run_sync_handler_once(self):
+        calls = 0
+
+        @cache()
+        @get("/slow")
+        def slow():
+            nonlocal calls
+            calls += 1
+            time.sleep(0.01)
+            return "done"
+
+        app = Application()
+        app.add_function_handler(slow)
+
+        with ThreadPoolExecutor(4) as pool:
+            responses = list(pool.map(lambda _: app.run(Request("GET", "/slow")), range(4)))
+
+        self.assertEqual(calls, 1)
+        self.assertEqual({res.body for res in responses}, {b"done"})
+
+    async def test_concurrent_misses_run_handler_once(self):
+        calls = 0
+
+        @cache()
+        @get("/slow")
+        async def slow():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"calls": calls}
+
+        app = Application()
+        handler = app.add_function_handler(slow)
+
+        responses = await asyncio.gather(
+            *(app.run_async(Request("GET", "/slow")) for _ in range(5))
+        )
+
+        self.assertEqual(calls, 1)
+        self.assertEqual([json.loads(res.body) for res in responses], [{"calls": 1}] * 5)
+        self.assertEqual(
+            handler.cache.metrics(), {"hits": 0, "misses": 1, "coalesced": 4}
+        )
+
+    async def test_errors_are_not_shared(self):
+        calls = 0
+
+        @cache()
+        @get("/fail")
+        async def fail():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        app = Application()
+        app.add_function_handler(fail)
+
+        responses = await asyncio.gather(
+            *(app.run_async(Request("GET", "/fail")) for _ in range(3))
+        )
+
+        self.assertEqual([res.status_code for res in responses], [500] * 3)
+        self.assertEqual(calls, 3)
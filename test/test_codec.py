@@ -0,0 +1,166 @@
+import asyncio
+from ast import literal_eval
+from unittest import TestCase, skipIf
+from lunnaris import codec
+from lunnaris.application import Application
+from lunnaris.codec import MsgPackCodec, StdlibJson, default_json_backend, negotiate
+from lunnaris.handler import get, post
+from lunnaris.request import Body, Json, Request
+from lunnaris.response import StreamingResponse
+
+
+class RecordingBackend(StdlibJson):
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj):
+        self.calls.append("dumps")
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.calls.append("loads")
+        return super().loads(data)
+
+
+class TestJsonBackend(TestCase):
+    def test_stdlib_backend(self):
+        backend = StdlibJson()
+        self.assertEqual(backend.dumps({"a": [1, 2]}), b'{"a": [1, 2]}')
+        self.assertEqual(backend.loads(b'{"a": [1, 2]}'), {"a": [1, 2]})
+
+    def test_default_backend_prefers_installed_libraries(self):
+        expected = "orjson" if codec.orjson else "msgspec" if codec.msgspec else "json"
+        self.assertEqual(default_json_backend().name, expected)
+
+    def test_application_uses_backend_both_ways(self):
+        class Item:
+            def __init__(self, name):
+                self.name = name
+
+        @post("/")
+        def handler(item: Item = Json()):
+            return {"name": item.name}
+
+        backend = RecordingBackend()
+        app = Application(json_backend=backend)
+        app.add_function_handler(handler)
+
+        res = app.run(
+            Request("POST", "/", headers={"content-type": "application/json"}, body=b'{"name": "a"}')
+        )
+
+        self.assertEqual(res.body, b'{"name": "a"}')
+        self.assertEqual(backend.calls, ["loads", "dumps"])
+
+
+class ReprCodec:
+    """Stand-in binary codec so negotiation can be tested without msgpack."""
+
+    name = "repr"
+    media_type = "application/x-repr"
+
+    def dumps(self, obj):
+        return repr(obj).encode()
+
+    def loads(self, data):
+        return literal_eval(data.decode())
+
+
+class TestNegotiation(TestCase):
+    def setUp(self):
+        self.json = StdlibJson()
+        self.repr = ReprCodec()
+        self.codecs = (self.json, self.repr)
+
+    def test_defaults_to_first_codec(self):
+        self.assertIs(negotiate(None, self.codecs), self.json)
+        self.assertIs(negotiate("*/*", self.codecs), self.json)
+        self.assertIs(negotiate("text/html", self.codecs), self.json)
+
+    def test_picks_highest_quality(self):
+        accept = "application/json;q=0.5, application/x-repr"
+        self.assertIs(negotiate(accept, self.codecs), self.repr)
+        accept = "application/json, application/x-repr;q=0.9"
+        self.assertIs(negotiate(accept, self.codecs), self.json)
+
+    def test_vary_is_merged_with_handler_headers(self):
+        @get("/")
+        def handler():
+            return {"a": 1}, 200, {"Vary": "Cookie"}
+
+        app = Application(json_backend=self.json, codecs=[self.repr])
+        app.add_function_handler(handler)
+
+        res = app.run(Request("GET", "/"))
+        self.assertEqual(res.headers["vary"], "Cookie, Accept")
+
+    def test_streamed_bodies_are_negotiated(self):
+        @get("/list")
+        def items():
+            return [1, 2, 3]
+
+        @get("/rows")
+        def rows():
+            return (i for i in range(3))
+
+        @get("/arows")
+        async def arows():
+            for i in range(3):
+                yield i
+
+        app = Application(json_backend=self.json, codecs=[self.repr], stream_threshold=2)
+        for handler in (items, rows, arows):
+            app.add_function_handler(handler)
+
+        async def body(res):
+            return b"".join([chunk async for chunk in res.iter_chunks()])
+
+        accept = {"accept": "application/x-repr"}
+        for path in ("/list", "/rows", "/arows"):
+            res = asyncio.run(app.run_async(Request("GET", path, headers=accept)))
+            self.assertEqual(res.headers["content-type"], "application/x-repr")
+            self.assertEqual(res.headers["vary"], "Accept")
+            if isinstance(res, StreamingResponse):
+                self.assertEqual(asyncio.run(body(res)), b"[0, 1, 2]")
+            else:
+                self.assertEqual(res.body, b"[1, 2, 3]")
+
+            res = asyncio.run(app.run_async(Request("GET", path)))
+            self.assertIsInstance(res, StreamingResponse)
+            self.assertEqual(res.headers["content-type"], "application/json")
+            self.assertEqual(res.headers["vary"], "Accept")
+
+    def test_application_negotiates_response_and_body(self):
+        @post("/")
+        def handler(item: dict = Body()):
+            return {"echo": item}
+
+        app = Application(json_backend=self.json, codecs=[self.repr])
+        app.add_function_handler(handler)
+
+        res = app.run(
+            Request(
+                "POST",
+                "/",
+                headers={"content-type": "application/x-repr", "accept": "application/x-repr"},
+                body=b"{'a': 1}",
+            )
+        )
+        self.assertEqual(res.body, b"{'echo': {'a': 1}}")
+        self.assertEqual(res.headers["content-type"], "application/x-repr")
+        self.assertEqual(res.headers["vary"], "Accept")
+
+        res = app.run(
+            Request("POST", "/", headers={"content-type": "application/json"}, body=b'{"a": 1}')
+        )
+        self.assertEqual(res.body, b'{"echo": {"a": 1}}')
+
+        res = app.run(Request("POST", "/", headers={"content-type": "text/csv"}, body=b"a"))
+        self.assertEqual(res.status_code, 415)
+
+    @skipIf(codec.msgpack is None, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        msgpack = MsgPackCodec()
+        self.assertEqual(msgpack.loads(msgpack.dumps({"a": [1, "b"]})), {"a": [1, "b"]})
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.application import Application
+from lunnaris.compression import Compression, GzipEncoder, select_encoder
+from lunnaris.executor import ThreadPool
+from lunnaris.handler import get
+from lunnaris.request import Request
+from lunnaris.response import FileResponse, Response, StreamingResponse
+from lunnaris.types import Headers
+
+
+class FakeEncoder(GzipEncoder):
+    name = "fake"
+
+
+GZIP = Headers({"accept-encoding": "gzip, deflate"})
+
+
+class TestSelectEncoder(TestCase):
+    def setUp(self):
+        self.gzip = GzipEncoder()
+        self.fake = FakeEncoder()
+        self.encoders = (self.fake, self.gzip)
+
+    def test_no_header_or_identity(self):
+        self.assertIsNone(select_encoder(None, self.encoders))
+        self.assertIsNone(select_encoder("identity", self.encoders))
+
+    def test_server_preference_breaks_ties(self):
+        self.assertIs(select_encoder("gzip, fake", self.encoders), self.fake)
+        self.assertIs(select_encoder("*", self.encoders), self.fake)
+
+    def test_quality_values(self):
+        self.assertIs(select_encoder("gzip, fake;q=0.5", self.encoders), self.gzip)
+        self.assertIs(select_encoder("fake;q=0, *", self.encoders), self.gzip)
+        self.assertIsNone(select_encoder("gzip;q=0, fake;q=0", self.encoders))
+
+
+class TestCompression(TestCase):
+    def setUp(self):
+        self.compression = Compression([GzipEncoder()], minimum_size=100)
+
+    def test_compresses_large_bodies(self):
+        body = json.dumps([{"id": i} for i in range(100)]).encode()
+        res = self.compression.compress(
+            GZIP,
+            Response(200, body, {"content-type": "application/json", "etag": '"abc"'}),
+        )
+
+        self.assertEqual(gzip.decompress(res.body), body)
+        self.assertEqual(res.headers["content-encoding"], "gzip")
+        self.assertEqual(res.headers["vary"], "Accept-Encoding")
+        self.assertEqual(res.headers["etag"], 'W/"abc"')
+
+    def test_skips_small_and_precompressed_bodies(self):
+        small = Response(200, b"x" * 10, {"content-type": "text/plain"})
+        image = Response(200, b"x" * 1000, {"content-type": "image/png"})
+        encoded = Response(
+            200, b"x" * 1000, {"content-type": "text/plain", "content-encoding": "br"}
+        )
+
+        for response in (small, image, encoded):
+            res = self.compression.compress(GZIP, response)
+            self.assertIs(res, response)
+            self.assertNotIn("vary", res.headers)
+
+    def test_vary_is_set_when_client_does_not_accept_encoding(self):
+        res = self.compression.compress(
+            Headers({}), Response(200, b"x" * 1000, {"content-type": "text/plain", "vary": "Accept"})
+        )
+
+        self.assertEqual(res.body, b"x" * 1000)
+        self.assertEqual(res.headers["vary"], "Accept, Accept-Encoding")
+        self.assertNotIn("content-encoding", res.headers)
+
+    def test_application_compresses_responses(self):
+        @get("/")
+        def handler():
+            return "hello " * 100
+
+        app = Application(compression=self.compression)
+        app.add_function_handler(handler)
+
+        res = app.run(Request("GET", "/", headers={"accept-encoding": "gzip"}))
+        self.assertEqual(gzip.decompress(res.body), b"hello " * 100)
+
+        res = app.run(Request("GET", "/"))
+        self.assertEqual(res.body, b"hello " * 100)
+
+
+class TestStreamingCompression(IsolatedAsyncioTestCase):
+    async def read(self, response: StreamingResponse) -> list[bytes]:
+        return [chunk async for chunk in response.iter_chunks()]
+
+    async def test_streams_are_compressed_incrementally(self):
+        compression = Compression([GzipEncoder()])
+        chunks = [b"a" * 1000, b"b" * 1000, b"c" * 1000]
+        response = StreamingResponse(200, iter(chunks), {"content-type": "text/plain"})
+
+        res = compression.compress(GZIP, response)
+        compressed = await self.read(res)
+
+        self.assertGreater(len(compressed), 2)
+        self.assertEqual(gzip.decompress(b"".join(compressed)), b"".join(chunks))
+        self.assertEqual(res.headers["content-encoding"], "gzip")
+
+    async def test_file_responses_drop_length_and_ranges(self):
+        fd, path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "wb") as file:
+            file.write(b"0123456789" * 100)
+        try:
+            res = Compression([GzipEncoder()]).compress(GZIP, FileResponse(path))
+            body = b"".join(await self.read(res))
+        finally:
+            os.remove(path)
+
+        self.assertEqual(gzip.decompress(body), b"0123456789" * 100)
+        self.assertNotIn("content-length", res.headers)
+        self.assertNotIn("accept-ranges", res.headers)
+
+    async def test_large_bodies_are_compressed_in_the_thread_pool(self):
+        executor = ThreadPool(max_workers=1)
+        compression = Compression([GzipEncoder()], offload_size=1000)
+        body = b"x" * 5000
+        try:
+            res = await compression.compress_async(
+                GZIP, Response(200, body, {"content-type": "text/plain"}), executor
+            )
+        finally:
+            executor.shutdown()
+
+        self.assertEqual(gzip.decompress(res.body), body)
+        self.assertEqual(executor.completed, 1)
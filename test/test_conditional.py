@@ -0,0 +1,178 @@
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.application import Application
+from lunnaris.compression import Compression, GzipEncoder
+from lunnaris.conditional import ETag, etag_matches, is_not_modified
+from lunnaris.handler import etag, get
+from lunnaris.request import Request
+from lunnaris.response import FileResponse
+from lunnaris.types import Headers
+
+
+class TestValidators(TestCase):
+    def test_weak_comparison(self):
+        self.assertTrue(etag_matches('"a", W/"b"', '"b"'))
+        self.assertTrue(etag_matches('W/"a"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+
+    def test_if_none_match_takes_precedence(self):
+        headers = Headers({
+            "if-none-match": '"b"',
+            "if-modified-since": "Wed, 21 Oct 2015 07:28:00 GMT",
+        })
+        self.assertFalse(
+            is_not_modified(headers, '"a"', "Wed, 21 Oct 2015 07:28:00 GMT")
+        )
+
+    def test_if_modified_since(self):
+        headers = Headers({"if-modified-since": "Wed, 21 Oct 2015 07:28:00 GMT"})
+        self.assertTrue(is_not_modified(headers, None, "Tue, 20 Oct 2015 07:28:00 GMT"))
+        self.assertFalse(is_not_modified(headers, None, "Thu, 22 Oct 2015 07:28:00 GMT"))
+        self.assertFalse(is_not_modified(Headers({"if-modified-since": "nope"}), None, "x"))
+
+
+class TestBodyETag(TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        @get("/")
+        def handler():
+            self.calls += 1
+            return {"name": "John Doe"}
+
+        self.app = Application(etag=ETag(weak=False))
+        self.app.add_function_handler(handler)
+
+    def test_etag_from_body_hash(self):
+        res = self.app.run(Request("GET", "/"))
+        tag = res.headers["etag"]
+
+        self.assertTrue(tag.startswith('"'))
+        self.assertEqual(self.app.run(Request("GET", "/")).headers["etag"], tag)
+
+        res = self.app.run(Request("GET", "/", headers={"if-none-match": tag}))
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.body, b"")
+        self.assertEqual(res.headers["etag"], tag)
+        self.assertNotIn("content-type", res.headers)
+        self.assertEqual(self.calls, 3)
+
+    def test_mismatch_returns_body(self):
+        res = self.app.run(Request("GET", "/", headers={"if-none-match": '"other"'}))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res.body, b"")
+
+    def test_not_modified_keeps_compression_headers(self):
+        app = Application(
+            etag=ETag(weak=False), compression=Compression([GzipEncoder()], minimum_size=0)
+        )
+        app.add_function_handler(get("/")(lambda: {"name": "John Doe"}))
+        headers = {"accept-encoding": "gzip"}
+
+        ok = app.run(Request("GET", "/", headers=headers))
+        res = app.run(
+            Request("GET", "/", headers={**headers, "if-none-match": ok.headers["etag"]})
+        )
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["vary"], ok.headers["vary"])
+        self.assertEqual(res.headers["etag"], ok.headers["etag"])
+
+    def test_file_responses_use_their_validators(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+
+        @get("/file")
+        def handler():
+            return FileResponse(path)
+
+        app = Application()
+        app.add_function_handler(handler)
+        try:
+            tag = app.run(Request("GET", "/file")).headers["etag"]
+            res = app.run(Request("GET", "/file", headers={"if-none-match": tag}))
+        finally:
+            os.remove(path)
+
+        self.assertEqual(res.status_code, 304)
+
+
+class TestVersionETag(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.versions = {1: 3}
+        self.calls = []
+
+        @etag(lambda id: self.versions.get(id))
+        @get("/items/{id:int}")
+        def item(id: int):
+            self.calls.append(id)
+            return {"id": id}
+
+        self.app = Application()
+        self.app.add_function_handler(item)
+
+    def test_handler_is_skipped_when_version_matches(self):
+        res = self.app.run(Request("GET", "/items/1"))
+        self.assertEqual(res.headers["etag"], 'W/"3"')
+
+        res = self.app.run(Request("GET", "/items/1", headers={"if-none-match": 'W/"3"'}))
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.calls, [1])
+
+        self.versions[1] = 4
+        res = self.app.run(Request("GET", "/items/1", headers={"if-none-match": 'W/"3"'}))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["etag"], 'W/"4"')
+
+    async def test_version_not_modified_keeps_compression_headers(self):
+        @etag(lambda: "v1", weak=False)
+        @get("/")
+        def handler():
+            return {"name": "John Doe" * 100}
+
+        app = Application(compression=Compression([GzipEncoder()]))
+        app.add_function_handler(handler)
+        headers = {"accept-encoding": "gzip"}
+
+        ok = await app.run_async(Request("GET", "/", headers=headers))
+        res = await app.run_async(
+            Request("GET", "/", headers={**headers, "if-none-match": ok.headers["etag"]})
+        )
+
+        self.assertEqual(ok.headers["etag"], 'W/"v1"')
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.headers["vary"], ok.headers["vary"])
+        self.assertEqual(res.headers["etag"], ok.headers["etag"])
+
+    def test_missing_version_falls_back_to_body_hash(self):
+        res = self.app.run(Request("GET", "/items/2", headers={"if-none-match": 'W/"3"'}))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.calls, [2])
+        self.assertNotEqual(res.headers["etag"], 'W/"3"')
+
+    async def test_async_version(self):
+        async def version(id: int):
+            return "v1"
+
+        @etag(version)
+        @get("/things/{id:int}")
+        async def thing(id: int):
+            return str(id)
+
+        app = Application()
+        app.add_function_handler(thing)
+
+        res = await app.run_async(Request("GET", "/things/1", headers={"if-none-match": 'W/"v1"'}))
+        self.assertEqual(res.status_code, 304)
+
+        res = await app.run_async(Request("HEAD", "/things/1"))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers["etag"], 'W/"v1"')
+
+    def test_etag_requires_route_decorator(self):
+        with self.assertRaises(ValueError):
+            etag()(lambda: None)
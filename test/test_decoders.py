@@ -0,0 +1,91 @@
+from dataclasses import dataclass, field
+from datetime import date
+from enum import Enum
+from typing import Optional
+from unittest import TestCase
+from lunnaris.application import Application
+from lunnaris.codec import StdlibJson
+from lunnaris.decoders import body_decoder
+from lunnaris.exceptions import BadRequest, ValidationError
+from lunnaris.handler import post
+from lunnaris.request import Json, Request
+
+
+class Role(Enum):
+    ADMIN = "admin"
+    USER = "user"
+
+
+@dataclass
+class Address:
+    city: str
+    zip: Optional[str] = None
+
+
+@dataclass
+class Client:
+    name: str
+    age: int
+    role: Role
+    born: date
+    addresses: list[Address] = field(default_factory=list)
+    id: int = None
+
+
+class TestBodyDecoder(TestCase):
+    def decode(self, body):
+        return body_decoder(Client, StdlibJson())(body)
+
+    def test_decodes_nested_dataclasses(self):
+        client = self.decode(
+            b'{"name": "John", "age": 22, "role": "admin", "born": "2000-01-02",'
+            b' "addresses": [{"city": "Quito"}], "id": null}'
+        )
+
+        self.assertEqual(
+            client,
+            Client("John", 22, Role.ADMIN, date(2000, 1, 2), [Address("Quito")]),
+        )
+
+    def test_reports_every_invalid_field(self):
+        with self.assertRaises(ValidationError) as ctx:
+            self.decode(
+                b'{"name": 1, "role": "root", "born": "2000-01-02",'
+                b' "addresses": [{"city": "Quito"}, {"zip": "1"}]}'
+            )
+
+        self.assertEqual(
+            sorted(path for path, _ in ctx.exception.errors),
+            ["$.addresses[1].city", "$.age", "$.name", "$.role"],
+        )
+        self.assertEqual(ctx.exception.code, 400)
+
+    def test_rejects_bool_for_int(self):
+        with self.assertRaises(ValidationError):
+            self.decode(b'{"name": "a", "age": true, "role": "user", "born": "2000-01-02"}')
+
+    def test_invalid_json(self):
+        with self.assertRaises(BadRequest):
+            self.decode(b"{")
+
+
+class TestJsonValidation(TestCase):
+    def test_invalid_body_is_bad_request(self):
+        @post("/")
+        def handler(client: Client = Json()):
+            return client.name
+
+        app = Application()
+        app.add_function_handler(handler)
+
+        res = app.run(
+            Request(
+                "POST",
+                "/",
+                headers={"content-type": "application/json"},
+                body=b'{"name": "a", "age": "x", "role": "user", "born": "2000-01-02"}',
+            )
+        )
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn(b"$.age", res.body)
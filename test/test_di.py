@@ -1,5 +1,17 @@
-from unittest import TestCase
-from lunnaris.di import Dependency, Lazy, DIContainer, Swappable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.application import Application
+from lunnaris.di import (
+    CircularDependency,
+    Dependency,
+    Lazy,
+    DIContainer,
+    RequestScope,
+    Swappable,
+)
+from lunnaris.handler import get
+from lunnaris.request import Request
 
 
 class TestLazy(TestCase):
@@ -256,3 +268,293 @@ class TestDI(TestCase):
 
         with self.assertRaisesRegex(ValueError, "Undefined dependency"):
             di.resolve(Type2)
+
+    def test_di_container_resolves_instance(self):
+        class Type1:
+            def __init__(self, param1: int):
+                pass
+
+        class Type2:
+            def __init__(self, param1: Type1) -> None:
+                self.type1 = param1
+
+        instance = Type1(1)
+        di = DIContainer()
+        di.add_instance(Type1, instance)
+        di.add_dependency(Type2)
+
+        self.assertIs(di.resolve(Type1), instance)
+        self.assertIs(di.resolve(Type2).type1, instance)
+
+
+class TestRequestScope(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.events = []
+
+        class Settings:
+            pass
+
+        class Session:
+            def __init__(self, settings: Settings):
+                self.settings = settings
+
+        def session(settings: Settings):
+            self.events.append("open")
+            yield Session(settings)
+            self.events.append("close")
+
+        self.Settings = Settings
+        self.Session = Session
+        self.session = session
+        self.container = DIContainer()
+        self.container.add_dependency(Settings, cached=True)
+        self.container.add_dependency(Session, session, scope="request")
+
+    def test_resolved_once_per_request(self):
+        Session = self.Session
+
+        class Repository:
+            def __init__(self, session: Session):
+                self.session = session
+
+        self.container.add_dependency(Repository, scope="request")
+        first = RequestScope(self.container)
+        second = RequestScope(self.container)
+
+        repository = first.get(Repository)
+
+        self.assertIs(repository.session, first.get(Session))
+        self.assertIsNot(second.get(Session), first.get(Session))
+        self.assertIs(first.get(Session).settings, second.get(Session).settings)
+        self.assertEqual(self.events, ["open", "open"])
+
+        first.close()
+        self.assertEqual(self.events, ["open", "open", "close"])
+
+    def test_request_scoped_dependencies_are_not_resolved_globally(self):
+        with self.assertRaisesRegex(ValueError, "request scoped"):
+            self.container.resolve(self.Session)
+
+    async def test_async_generator_providers(self):
+        class Connection:
+            pass
+
+        async def connection():
+            self.events.append("connect")
+            yield Connection()
+            self.events.append("disconnect")
+
+        self.container.add_dependency(Connection, connection, scope="request")
+        scope = RequestScope(self.container)
+
+        self.assertTrue(self.container.is_async(Connection))
+        self.assertFalse(self.container.is_async(self.Session))
+        with self.assertRaisesRegex(RuntimeError, "async"):
+            scope.get(Connection)
+
+        value = await scope.aget(Connection)
+        self.assertIs(await scope.aget(Connection), value)
+        scope.get(self.Session)
+
+        await scope.aclose()
+        self.assertEqual(self.events, ["connect", "open", "close", "disconnect"])
+
+    async def test_injected_into_handlers(self):
+        Session = self.Session
+
+        class Connection:
+            pass
+
+        async def connection():
+            self.events.append("connect")
+            yield Connection()
+            self.events.append("disconnect")
+
+        @get("/")
+        async def handler(session: Session, connection: Connection, request: Request):
+            self.events.append("handler")
+            return str(session is request.dependencies.get(Session))
+
+        app = Application()
+        app.container.add_dependency(self.Settings, cached=True)
+        app.container.add_dependency(Session, self.session, scope="request")
+        app.container.add_dependency(Connection, connection, scope="request")
+        app.add_function_handler(handler)
+
+        req = Request("GET", "/")
+        res = await app.run_async(req)
+        self.assertEqual(res.body, b"True")
+        self.assertEqual(self.events, ["connect", "open", "handler"])
+
+        await app.teardown_async(req)
+        self.assertEqual(self.events, ["connect", "open", "handler", "close", "disconnect"])
+
+    def test_sync_run_tears_down(self):
+        Session = self.Session
+
+        @get("/")
+        def handler(session: Session):
+            self.events.append("handler")
+            return "ok"
+
+        app = Application()
+        app.container.add_dependency(self.Settings, cached=True)
+        app.container.add_dependency(Session, self.session, scope="request")
+        app.add_function_handler(handler)
+
+        self.assertEqual(app.run(Request("GET", "/")).body, b"ok")
+        self.assertEqual(self.events, ["open", "handler", "close"])
+
+
+    async def test_dependencies_registered_at_startup(self):
+        class Pool:
+            pass
+
+        class Session:
+            def __init__(self, pool: Pool):
+                self.pool = pool
+
+        def session(pool: Pool):
+            yield Session(pool)
+
+        @get("/")
+        def handler(session: Session):
+            return str(isinstance(session.pool, Pool))
+
+        app = Application()
+        app.on_startup(Pool, provides=Pool)
+        app.container.add_dependency(Session, session, scope="request")
+        app.add_function_handler(handler)
+        await app.startup()
+
+        req = Request("GET", "/")
+        self.assertEqual((await app.run_async(req)).body, b"True")
+        await app.teardown_async(req)
+
+    async def test_providers_take_the_request(self):
+        class User:
+            def __init__(self, name: str):
+                self.name = name
+
+        def current_user(req: Request):
+            return User(req.headers.get("x-user"))
+
+        @get("/")
+        def handler(user: User):
+            return user.name
+
+        app = Application()
+        app.container.add_dependency(User, current_user, scope="request")
+        app.add_function_handler(handler)
+        await app.startup()
+
+        res = await app.run_async(Request("GET", "/", headers={"x-user": "john"}))
+        self.assertEqual(res.body, b"john")
+
+    def test_request_scoped_cycles_are_detected(self):
+        class A:
+            pass
+
+        class B:
+            pass
+
+        def a(b: B):
+            return A()
+
+        def b(a: A):
+            return B()
+
+        self.container.add_dependency(A, a, scope="request")
+        self.container.add_dependency(B, b, scope="request")
+
+        with self.assertRaisesRegex(CircularDependency, "A -> .*B -> .*A"):
+            self.container.is_async(A)
+
+class TestCompiledGraph(TestCase):
+    def test_dependencies_are_compiled_in_topological_order(self):
+        class Type1:
+            pass
+
+        class Type2:
+            def __init__(self, param1: Type1):
+                pass
+
+        class Type3:
+            def __init__(self, param1: Type2, param2: Type1):
+                pass
+
+        di = DIContainer()
+        di.add_dependency(Type3)
+        di.add_dependency(Type2)
+        di.add_dependency(Type1)
+        di.compile()
+
+        self.assertEqual(di.order, [Type1, Type2, Type3])
+        self.assertIsInstance(di.resolve(Type3), Type3)
+
+    def test_cycles_are_detected(self):
+        class Type1:
+            def __init__(self, param1: "Type3"):
+                pass
+
+        class Type2:
+            def __init__(self, param1: Type1):
+                pass
+
+        class Type3:
+            def __init__(self, param1: Type2):
+                pass
+
+        Type1.__init__.__annotations__["param1"] = Type3
+        di = DIContainer()
+        di.add_dependency(Type1)
+        di.add_dependency(Type2)
+        di.add_dependency(Type3)
+
+        with self.assertRaisesRegex(CircularDependency, "Type1 -> .*Type3 -> .*Type2 -> .*Type1"):
+            di.resolve(Type1)
+        self.assertTrue(issubclass(CircularDependency, ValueError))
+
+    def test_falsy_singletons_are_cached(self):
+        calls = []
+
+        def empty() -> list:
+            calls.append(1)
+            return []
+
+        di = DIContainer()
+        di.add_dependency(empty, cached=True)
+
+        self.assertIs(di.resolve(empty), di.resolve(empty))
+        self.assertEqual(calls, [1])
+
+    def test_singletons_are_created_once_across_threads(self):
+        created = []
+
+        class Pool:
+            def __init__(self):
+                time.sleep(0.01)
+                created.append(self)
+
+        di = DIContainer()
+        di.add_dependency(Pool, cached=True)
+
+        with ThreadPoolExecutor(8) as executor:
+            pools = set(executor.map(lambda _: di.resolve(Pool), range(8)))
+
+        self.assertEqual(len(created), 1)
+        self.assertEqual(pools, set(created))
+
+    def test_adding_dependencies_recompiles(self):
+        class Type1:
+            pass
+
+        class Type2(Type1):
+            pass
+
+        di = DIContainer()
+        di.add_dependency(Type1)
+        self.assertIsInstance(di.resolve(Type1), Type1)
+
+        di.add_dependency(Type1, Type2)
+        self.assertIsInstance(di.resolve(Type1), Type2)
@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from enum import Enum
+from unittest import TestCase
+from uuid import UUID
+from lunnaris.encoders import dataclass_encoder, encode_value
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Address:
+    city: str
+    tags: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Client:
+    id: int
+    name: str
+    color: Color
+    created: datetime
+    key: UUID
+    address: Address
+    history: list[Address]
+    extra: dict
+
+
+@dataclass(slots=True)
+class Slotted:
+    id: int
+    day: date
+
+
+class TestDataclassEncoder(TestCase):
+    def test_encodes_nested_values(self):
+        client = Client(
+            1,
+            "John Doe",
+            Color.RED,
+            datetime(2024, 1, 2, 3, 4, 5),
+            UUID("12345678-1234-5678-1234-567812345678"),
+            Address("Quito", ["home"]),
+            [Address("Lima")],
+            {"since": date(2020, 1, 1)},
+        )
+
+        self.assertEqual(
+            dataclass_encoder(Client)(client),
+            {
+                "id": 1,
+                "name": "John Doe",
+                "color": "red",
+                "created": "2024-01-02T03:04:05",
+                "key": "12345678-1234-5678-1234-567812345678",
+                "address": {"city": "Quito", "tags": ["home"]},
+                "history": [{"city": "Lima", "tags": []}],
+                "extra": {"since": "2020-01-01"},
+            },
+        )
+
+    def test_encoder_is_built_once_per_class(self):
+        self.assertIs(dataclass_encoder(Address), dataclass_encoder(Address))
+
+    def test_slots_dataclass(self):
+        self.assertEqual(
+            encode_value(Slotted(1, date(2024, 5, 6))), {"id": 1, "day": "2024-05-06"}
+        )
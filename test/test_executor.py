@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+from lunnaris.application import Application
+from lunnaris.exceptions import ServiceUnavailable
+from lunnaris.executor import ThreadPool
+from lunnaris.handler import get
+from lunnaris.request import Request
+
+
+class TestThreadPool(IsolatedAsyncioTestCase):
+    async def test_runs_in_worker_thread(self):
+        pool = ThreadPool(max_workers=2)
+        thread = await pool.run(threading.current_thread)
+
+        self.assertIsNot(thread, threading.current_thread())
+        self.assertEqual(pool.metrics()["completed"], 1)
+        pool.shutdown()
+
+    async def test_metrics_report_saturation(self):
+        pool = ThreadPool(max_workers=1)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        metrics = pool.metrics()
+        release.set()
+        await asyncio.gather(first, second)
+
+        self.assertEqual(metrics["active"], 1)
+        self.assertEqual(metrics["queue_depth"], 1)
+        self.assertEqual(metrics["saturation"], 1.0)
+        self.assertEqual(pool.metrics()["saturated"], 1)
+        pool.shutdown()
+
+    async def test_rejects_when_queue_is_full(self):
+        pool = ThreadPool(max_workers=1, max_queue=0)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        with self.assertRaises(ServiceUnavailable):
+            await pool.run(release.wait)
+        release.set()
+        await first
+        pool.shutdown()
+
+    async def test_cancelled_queued_call_leaves_the_queue(self):
+        pool = ThreadPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        second.cancel()
+        await asyncio.sleep(0)
+
+        self.assertEqual(pool.metrics()["queue_depth"], 0)
+        third = asyncio.ensure_future(pool.run(release.wait))
+        release.set()
+        await asyncio.gather(first, third)
+        self.assertTrue(second.cancelled())
+        self.assertEqual(pool.metrics()["completed"], 2)
+        pool.shutdown()
+
+
+class TestThreadPoolOffload(IsolatedAsyncioTestCase):
+    async def test_handler_opt_in(self):
+        @get("/", run_in_threadpool=True)
+        def handler():
+            return threading.current_thread().name
+
+        app = Application()
+        app.add_function_handler(handler)
+        res = await app.run_async(Request("GET", "/"))
+
+        self.assertTrue(res.body.startswith(b"lunnaris"))
+        app.executor.shutdown()
+
+    async def test_application_default_and_handler_opt_out(self):
+        @get("/")
+        def offloaded():
+            return threading.current_thread().name
+
+        @get("/inline", run_in_threadpool=False)
+        def inline():
+            return threading.current_thread().name
+
+        app = Application(run_in_threadpool=True)
+        app.add_function_handler(offloaded)
+        app.add_function_handler(inline)
+
+        res = await app.run_async(Request("GET", "/"))
+        self.assertTrue(res.body.startswith(b"lunnaris"))
+
+        res = await app.run_async(Request("GET", "/inline"))
+        self.assertEqual(res.body, threading.current_thread().name.encode())
+        app.executor.shutdown()
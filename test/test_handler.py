@@ -1,6 +1,6 @@
 from unittest import TestCase
 from lunnaris.handler import RequestHandler, get_handler, get, post, patch, put, delete, request_handler
-from lunnaris.request import Query, QueryParam, Request
+from lunnaris.request import Json, Query, QueryParam, Request
 
 
 class TestRequestHandler(TestCase):
@@ -173,4 +173,49 @@ class TestRequestHandler(TestCase):
         self.assertEqual(handler.method, "GET")
         self.assertEqual(handler.status_code, 200)
         self.assertEqual(handler.headers, {})
-        self.assertEqual(res, "q=3")
\ No newline at end of file
+        self.assertEqual(res, "q=3")
+
+    def test_mapper_subclass_hooks_are_kept(self):
+        class UpperJson(Json):
+            def init_type(self, data, type_):
+                return type_(data).upper()
+
+        class PrefixedQuery(Query):
+            def map(self, request, type_):
+                return {f"q_{k}": v for k, v in request.query.items()}
+
+        @post("path")
+        def path(body: str = UpperJson(), q: dict = PrefixedQuery()):
+            return body, q
+
+        handler = get_handler(path)
+        handler.compile()
+        req = Request(
+            "POST", "path", headers={"content-type": "application/json"},
+            body='"abc"', query={"a": "1"},
+        )
+
+        self.assertEqual(handler(req), ("ABC", {"q_a": "1"}))
+
+    def test_compiled_plan_binds_request_and_params(self):
+        @get("path/{id}")
+        def path(req: Request, id: int, q: int = QueryParam()):
+            return req, id, q
+
+        handler = get_handler(path)
+        handler.compile()
+        req = Request("GET", "path/3", query={"q": "4"}, params={"id": "3"})
+
+        self.assertEqual(handler(req), (req, 3, 4))
+
+    def test_rebinding_callback_recompiles_plan(self):
+        @get("path")
+        def path(a: int):
+            return a
+
+        handler = get_handler(path)
+        handler.compile()
+        handler.callback = lambda b: b
+        res = handler(Request("GET", "path", params={"b": "x"}))
+
+        self.assertEqual(res, "x")
@@ -0,0 +1,261 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.application import Application
+from lunnaris.asgi import create_asgi_app
+from lunnaris.controller import Controller
+from lunnaris.handler import get, get_handler, post
+from lunnaris.middleware import compose, compose_async
+from lunnaris.request import Request
+from lunnaris.response import Response
+
+
+def tracing(calls: list, name: str):
+    def middleware(request, call_next):
+        calls.append(f"{name} in")
+        response = call_next(request)
+        calls.append(f"{name} out")
+        return response
+
+    return middleware
+
+
+def auth(request, call_next):
+    if request.headers.get("authorization") != "secret":
+        return Response(401, b"Unauthorized", {"content-type": "text/plain"})
+    return call_next(request)
+
+
+class TestCompose(TestCase):
+    def test_first_middleware_is_outermost(self):
+        calls = []
+        chain = compose(
+            [tracing(calls, "a"), tracing(calls, "b")],
+            lambda request: calls.append("endpoint") or Response(200, b""),
+        )
+
+        chain(Request("GET", "/"))
+
+        self.assertEqual(calls, ["a in", "b in", "endpoint", "b out", "a out"])
+
+    def test_empty_chain_is_the_endpoint(self):
+        def endpoint(request):
+            return Response(200, b"")
+
+        self.assertIs(compose([], endpoint), endpoint)
+        self.assertIs(compose_async([], endpoint), endpoint)
+
+
+class TestApplicationMiddleware(TestCase):
+    def setUp(self):
+        @get("/")
+        def handler():
+            return "hello"
+
+        self.handler = handler
+
+    def test_global_middlewares_wrap_routing(self):
+        calls = []
+        app = Application(middlewares=[tracing(calls, "global")])
+        app.add_function_handler(self.handler)
+
+        res = app.run(Request("GET", "/missing"))
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(calls, ["global in", "global out"])
+
+    def test_short_circuit(self):
+        app = Application(middlewares=[auth])
+        app.add_function_handler(self.handler)
+
+        self.assertEqual(app.run(Request("GET", "/")).status_code, 401)
+        res = app.run(Request("GET", "/", headers={"authorization": "secret"}))
+        self.assertEqual(res.body, b"hello")
+
+    def test_middlewares_can_change_responses(self):
+        app = Application()
+
+        @app.add_middleware
+        def server_header(request, call_next):
+            response = call_next(request)
+            response.headers["server"] = "lunnaris"
+            return response
+
+        app.add_function_handler(self.handler)
+
+        self.assertEqual(app.run(Request("GET", "/")).headers["server"], "lunnaris")
+        self.assertEqual(app.run(Request("GET", "/x")).headers["server"], "lunnaris")
+
+    def test_errors_raised_by_middlewares_are_handled(self):
+        def broken(request, call_next):
+            raise ValueError("broken")
+
+        app = Application(middlewares=[broken])
+        app.add_function_handler(self.handler)
+
+        self.assertEqual(app.run(Request("GET", "/")).status_code, 500)
+
+    def test_handler_and_controller_middlewares(self):
+        calls = []
+
+        class Items(Controller):
+            __route__ = "items"
+
+            def __init__(self):
+                super().__init__(middlewares=[tracing(calls, "controller")])
+
+            @get("", middleware=[tracing(calls, "handler")])
+            def list_items(self):
+                calls.append("list")
+                return "items"
+
+        app = Application(middlewares=[tracing(calls, "global")])
+        app.add_controller(Items)
+        app.freeze()
+
+        app.run(Request("GET", "/items"))
+
+        self.assertEqual(
+            calls,
+            [
+                "global in",
+                "controller in",
+                "handler in",
+                "list",
+                "handler out",
+                "controller out",
+                "global out",
+            ],
+        )
+
+    def test_sync_run_rejects_async_middlewares(self):
+        async def middleware(request, call_next):
+            return await call_next(request)
+
+        app = Application(middlewares=[middleware])
+        app.add_function_handler(self.handler)
+
+        self.assertEqual(app.run(Request("GET", "/")).status_code, 500)
+
+    def test_handlers_do_not_share_default_lists(self):
+        @get("/a")
+        def a():
+            pass
+
+        @get("/b")
+        def b():
+            pass
+
+        get_handler(a).add_pre_middlewares([print], "after")
+        get_handler(a).add_middlewares([auth], "after")
+
+        self.assertEqual(get_handler(b).pre_middleware, [])
+        self.assertEqual(get_handler(b).middleware, [])
+
+
+class TestAsyncMiddleware(IsolatedAsyncioTestCase):
+    async def test_sync_and_async_middlewares(self):
+        calls = []
+
+        async def timing(request, call_next):
+            calls.append("timing in")
+            response = await call_next(request)
+            calls.append("timing out")
+            response.headers["x-timing"] = "1"
+            return response
+
+        def passthrough(request, call_next):
+            calls.append("passthrough")
+            return call_next(request)
+
+        @get("/")
+        async def handler():
+            calls.append("handler")
+            return "hello"
+
+        app = Application(middlewares=[timing, passthrough, auth])
+        app.add_function_handler(handler)
+        await app.startup()
+
+        res = await app.run_async(Request("GET", "/", headers={"authorization": "secret"}))
+        self.assertEqual(res.body, b"hello")
+        self.assertEqual(res.headers["x-timing"], "1")
+        self.assertEqual(calls, ["timing in", "passthrough", "handler", "timing out"])
+
+        res = await app.run_async(Request("GET", "/"))
+        self.assertEqual(res.status_code, 401)
+
+    async def test_body_is_available_to_middlewares(self):
+        seen = []
+
+        def signature(request, call_next):
+            seen.append(request.body)
+            return call_next(request)
+
+        async def audit(request, call_next):
+            seen.append(await request.read())
+            return await call_next(request)
+
+        @post("/", middleware=[signature])
+        async def handler(request: Request):
+            return b"".join([chunk async for chunk in request.stream()])
+
+        app = Application(middlewares=[signature, audit])
+        app.add_function_handler(handler)
+        chunks = [
+            {"type": "http.request", "body": b"ab", "more_body": True},
+            {"type": "http.request", "body": b"c", "more_body": False},
+        ]
+
+        async def receive():
+            return chunks.pop(0)
+
+        res = await app.run_async(Request("POST", "/", receive=receive))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.body, b"abc")
+        self.assertEqual(seen, [b"abc", b"abc", b"abc"])
+
+    async def test_sync_middlewares_inspect_responses_over_asgi(self):
+        def timing(request, call_next):
+            response = call_next(request)
+            response.headers["x-timing"] = "1"
+            return response
+
+        @get("/")
+        async def handler():
+            return "hello"
+
+        app = Application(middlewares=[timing])
+        app.add_function_handler(handler)
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}
+        await create_asgi_app(app)(scope, receive, send)
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn([b"x-timing", b"1"], sent[0]["headers"])
+        self.assertEqual(sent[1]["body"], b"hello")
+
+    async def test_sync_middlewares_do_not_buffer_unread_bodies(self):
+        def passthrough(request, call_next):
+            return call_next(request)
+
+        async def receive():
+            raise AssertionError("The body shouldn't be read")
+
+        app = Application(middlewares=[passthrough])
+        res = await app.run_async(Request("POST", "/missing", receive=receive))
+
+        self.assertEqual(res.status_code, 404)
+
+    async def test_frozen_application_rejects_middlewares(self):
+        app = Application()
+        app.freeze()
+
+        with self.assertRaisesRegex(RuntimeError, "frozen"):
+            app.add_middleware(auth)
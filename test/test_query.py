@@ -0,0 +1,125 @@
+from dataclasses import dataclass, field
+from typing import Optional
+from unittest import TestCase
+from lunnaris.application import Application
+from lunnaris.exceptions import BadRequest, ValidationError
+from lunnaris.handler import get
+from lunnaris.query import QueryParams, parse_query_string
+from lunnaris.request import Query, QueryParam, Request
+
+
+class TestParseQueryString(TestCase):
+    def test_percent_decoding(self):
+        query = parse_query_string(b"q=caf%C3%A9+au+lait&a%26b=1%3D2")
+
+        self.assertEqual(query["q"], "café au lait")
+        self.assertEqual(query["a&b"], "1=2")
+
+    def test_equals_in_value(self):
+        self.assertEqual(parse_query_string("token=abc==")["token"], "abc==")
+
+    def test_repeated_keys(self):
+        query = parse_query_string("tag=a&tag=b&page=1&tag=c")
+
+        self.assertEqual(query["tag"], "c")
+        self.assertEqual(query.getlist("tag"), ["a", "b", "c"])
+        self.assertEqual(query.getlist("missing"), [])
+        self.assertEqual(len(query), 2)
+
+    def test_blank_values_and_empty_pairs(self):
+        query = parse_query_string("a=&b&&=x&c=1")
+
+        self.assertEqual(dict(query), {"a": "", "b": "", "c": "1"})
+
+    def test_length_limit(self):
+        with self.assertRaises(BadRequest):
+            parse_query_string("a=" + "x" * 100, max_length=50)
+
+    def test_param_limit(self):
+        payload = "&".join(f"k{i}=v" for i in range(11))
+
+        with self.assertRaises(BadRequest):
+            parse_query_string(payload, max_params=10)
+        self.assertEqual(len(parse_query_string(payload, max_params=None)), 11)
+
+    def test_query_params_from_mapping(self):
+        query = QueryParams({"a": "1", "b": ["2", "3"]})
+
+        self.assertEqual(query.multi_items(), [("a", "1"), ("b", "2"), ("b", "3")])
+        self.assertEqual(query["b"], "3")
+
+
+@dataclass
+class Filters:
+    name: str
+    limit: int = 10
+    tags: list[str] = field(default_factory=list)
+
+
+class TestTypedQuery(TestCase):
+    def test_query_param_conversion(self):
+        def extract(type_, query):
+            return QueryParam().compile(type_, "v")(Request("GET", "", query=query))
+
+        self.assertEqual(extract(int, {"v": "3"}), 3)
+        self.assertIs(extract(bool, {"v": "yes"}), True)
+        self.assertIs(extract(bool, {"v": "0"}), False)
+        self.assertEqual(extract(list[int], {"v": ["1", "2"]}), [1, 2])
+        self.assertEqual(extract(Optional[int], {"v": "5"}), 5)
+
+    def test_query_param_errors(self):
+        extract = QueryParam().compile(int, "v")
+
+        with self.assertRaisesRegex(ValidationError, "query.v: Invalid value 'x'"):
+            extract(Request("GET", "", query={"v": "x"}))
+        with self.assertRaisesRegex(ValidationError, "query.v: Missing parameter"):
+            extract(Request("GET", "", query={}))
+
+    def test_query_param_default(self):
+        extract = QueryParam(7).compile(int, "v")
+
+        self.assertEqual(extract(Request("GET", "", query={})), 7)
+
+    def test_query_dataclass(self):
+        extract = Query().compile(Filters)
+        req = Request("GET", "", query={"name": "a", "limit": "5", "tags": ["x", "y"]})
+
+        self.assertEqual(extract(req), Filters("a", 5, ["x", "y"]))
+        self.assertEqual(extract(Request("GET", "", query={"name": "b"})), Filters("b"))
+
+    def test_query_dataclass_errors(self):
+        extract = Query().compile(Filters)
+
+        with self.assertRaises(ValidationError) as ctx:
+            extract(Request("GET", "", query={"limit": "x"}))
+        self.assertEqual(
+            ctx.exception.errors,
+            [("query.name", "Missing parameter"), ("query.limit", "Invalid value 'x'")],
+        )
+
+    def test_invalid_param_is_a_bad_request(self):
+        @get("/items")
+        def items(page: int = QueryParam(1), tag: list[str] = QueryParam([])):
+            return {"page": page, "tags": tag}
+
+        app = Application()
+        app.add_function_handler(items)
+
+        ok = app.run(Request.from_scope({
+            "type": "http", "method": "GET", "path": "/items",
+            "query_string": b"page=2&tag=a&tag=b", "headers": [],
+        }))
+        bad = app.run(Request("GET", "/items", query={"page": "two"}))
+
+        self.assertEqual(ok.status_code, 200)
+        self.assertIn(b'"tags"', ok.body)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_parsed_query_is_cached(self):
+        req = Request.from_scope({
+            "type": "http", "method": "GET", "path": "/",
+            "query_string": b"a=1&a=2", "headers": [],
+        })
+
+        self.assertIs(req.query, req.query)
+        self.assertEqual(req.query.getlist("a"), ["1", "2"])
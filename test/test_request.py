@@ -1,4 +1,5 @@
-from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.exceptions import PayloadTooLarge
 from lunnaris.request import Json, Request, Query
 
 
@@ -14,6 +15,49 @@ class TestRequest(TestCase):
         with self.assertRaisesRegex(ValueError, "GET"):
             req.get_body()
 
+    def test_json_is_decoded_once(self):
+        req = Request("POST", "", body='{"name":"John Doe"}')
+
+        self.assertEqual(req.json(), {"name": "John Doe"})
+        self.assertIs(req.json(), req.json())
+
+    def test_cookies(self):
+        req = Request("GET", "", headers={"cookie": 'session=abc; theme="dark"; flag'})
+
+        self.assertEqual(dict(req.cookies), {"session": "abc", "theme": "dark"})
+
+
+class TestRequestFromScope(TestCase):
+    def setUp(self):
+        self.scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/items",
+            "headers": [(b"content-type", b"text/plain"), (b"cookie", b"id=1")],
+            "query_string": b"page=2&size=10",
+        }
+
+    def test_properties_are_decoded_on_first_access(self):
+        req = Request.from_scope(self.scope)
+
+        self.assertIsNone(req._headers)
+        self.assertIsNone(req._query)
+        self.assertEqual(req.headers["Content-Type"], "text/plain")
+        self.assertIs(req.headers, req.headers)
+        self.assertEqual(dict(req.query), {"page": "2", "size": "10"})
+        self.assertIs(req.query, req.query)
+        self.assertEqual(req.cookies["id"], "1")
+        self.assertEqual(dict(req.params), {})
+
+    def test_slots(self):
+        req = Request.from_scope(self.scope)
+
+        self.assertFalse(hasattr(req, "__dict__"))
+        req.state.user = "john"
+        self.assertEqual(req.state.user, "john")
+        self.assertIs(req.state, req.state)
+        self.assertEqual(vars(Request("GET", "/").state), {})
+
 
 class TestJsonTypeMatcher(TestCase):
     def test_parse_json_from_request(self):
@@ -116,4 +160,54 @@ class TestQueryMatcher(TestCase):
 
         self.assertIsInstance(actual, Client)
         self.assertEqual(expected.age, actual.age)
-        self.assertEqual(expected.name, actual.name)
\ No newline at end of file
+        self.assertEqual(expected.name, actual.name)
+
+def make_receive(*chunks: bytes):
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    return receive
+
+
+class TestRequestBodyStream(IsolatedAsyncioTestCase):
+    async def test_stream_yields_chunks(self):
+        req = Request("POST", "", receive=make_receive(b"ab", b"cd", b"ef"))
+
+        chunks = [chunk async for chunk in req.stream()]
+
+        self.assertEqual(chunks, [b"ab", b"cd", b"ef"])
+
+    async def test_read_joins_chunks_once(self):
+        req = Request("POST", "", receive=make_receive(b"ab", b"cd"))
+
+        self.assertEqual(await req.read(), b"abcd")
+        self.assertEqual(await req.read(), b"abcd")
+        self.assertEqual(req.body, b"abcd")
+
+    async def test_body_requires_read(self):
+        req = Request("POST", "", receive=make_receive(b"ab"))
+
+        with self.assertRaisesRegex(RuntimeError, "read"):
+            req.body
+
+    async def test_rejects_declared_oversize_body_without_reading(self):
+        async def receive():
+            raise AssertionError("Body should not be read")
+
+        req = Request(
+            "POST", "", headers={"content-length": "11"}, receive=receive, max_body_size=10
+        )
+
+        with self.assertRaises(PayloadTooLarge):
+            await req.read()
+
+    async def test_rejects_streamed_oversize_body(self):
+        req = Request("POST", "", receive=make_receive(b"12345", b"67890", b"1"), max_body_size=10)
+
+        with self.assertRaises(PayloadTooLarge):
+            await req.read()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from lunnaris.executor import ThreadPool
+from lunnaris.response import FileResponse
+from lunnaris.types import Headers
+
+
+class TestFileResponse(IsolatedAsyncioTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "wb") as file:
+            file.write(b"0123456789")
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    async def read(self, response: FileResponse) -> bytes:
+        return b"".join([chunk async for chunk in response.iter_chunks()])
+
+    async def test_streams_whole_file_in_chunks(self):
+        response = FileResponse(self.path, chunk_size=4)
+
+        chunks = [chunk async for chunk in response.iter_chunks()]
+
+        self.assertEqual(chunks, [b"0123", b"4567", b"89"])
+        self.assertEqual(response.headers["content-type"], "application/json")
+        self.assertEqual(response.headers["content-length"], "10")
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+
+    async def test_reads_in_executor(self):
+        pool = ThreadPool(max_workers=1)
+        response = FileResponse(self.path, chunk_size=4)
+
+        chunks = [chunk async for chunk in response.iter_chunks(pool)]
+        pool.shutdown()
+
+        self.assertEqual(chunks, [b"0123", b"4567", b"89"])
+        # open and every read
+        self.assertEqual(pool.metrics()["completed"], 4)
+
+    async def test_range(self):
+        response = FileResponse(self.path)
+        response.apply_range(Headers({"range": "bytes=2-5"}))
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.headers["content-range"], "bytes 2-5/10")
+        self.assertEqual(response.headers["content-length"], "4")
+        self.assertEqual(await self.read(response), b"2345")
+
+    async def test_suffix_and_open_ranges(self):
+        response = FileResponse(self.path)
+        response.apply_range(Headers({"range": "bytes=-3"}))
+        self.assertEqual(await self.read(response), b"789")
+
+        response = FileResponse(self.path)
+        response.apply_range(Headers({"range": "bytes=8-"}))
+        self.assertEqual(await self.read(response), b"89")
+
+    async def test_unsatisfiable_range(self):
+        response = FileResponse(self.path)
+        response.apply_range(Headers({"range": "bytes=20-30"}))
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response.headers["content-range"], "bytes */10")
+        self.assertEqual(await self.read(response), b"")
+
+    async def test_if_range_mismatch_serves_whole_file(self):
+        response = FileResponse(self.path)
+        response.apply_range(Headers({"range": "bytes=2-5", "if-range": '"stale"'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await self.read(response), b"0123456789")
+
+    async def test_if_range_weak_etag_never_matches(self):
+        response = FileResponse(self.path)
+        etag = response.headers["etag"]
+        response.apply_range(Headers({"range": "bytes=2-5", "if-range": f"W/{etag}"}))
+        self.assertEqual(response.status_code, 200)
+
+        response = FileResponse(self.path, headers={"etag": 'W/"v1"'})
+        response.apply_range(Headers({"range": "bytes=2-5", "if-range": 'W/"v1"'}))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_if_range_match(self):
+        response = FileResponse(self.path)
+        etag = response.headers["etag"]
+        response.apply_range(Headers({"range": "bytes=0-0", "if-range": etag}))
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(await self.read(response), b"0")
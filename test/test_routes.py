@@ -0,0 +1,113 @@
+from unittest import TestCase
+from uuid import UUID
+from lunnaris.handler import RequestHandler
+from lunnaris.routes import RouteMatcher
+
+
+def handler(path, method="GET"):
+    return RequestHandler(path, method, lambda: None)
+
+
+class TestRouteMatcher(TestCase):
+    def test_static_route(self):
+        router = RouteMatcher()
+        h = handler("/clients")
+        router.add_route(h)
+
+        self.assertEqual(router.match("/clients/", "GET"), (h, {}))
+        self.assertEqual(router.static_routes["clients"], {"GET": h})
+        self.assertIsNone(router.match("/clients", "POST"))
+
+    def test_dynamic_route(self):
+        router = RouteMatcher()
+        h = handler("/clients/{id}")
+        router.add_route(h)
+
+        self.assertEqual(router.match("/clients/3", "GET"), (h, {"id": "3"}))
+        self.assertEqual(router.static_routes, {})
+
+    def test_cached_dynamic_route(self):
+        router = RouteMatcher(cache_size=1)
+        h = handler("/clients/{id}")
+        router.add_route(h)
+
+        first = router.match("/clients/3", "GET")
+        first[1]["id"] = "changed"
+        self.assertEqual(router.match("/clients/3", "GET"), (h, {"id": "3"}))
+        router.match("/clients/4", "GET")
+        self.assertEqual(list(router.cache), ["clients/4"])
+
+    def test_adding_route_clears_cache(self):
+        router = RouteMatcher(cache_size=8)
+        router.add_route(handler("/clients/{id}"))
+        self.assertIsNone(router.match("/clients/3/orders", "GET"))
+
+        h = handler("/clients/{id}/orders")
+        router.add_route(h)
+
+        self.assertEqual(router.match("/clients/3/orders", "GET"), (h, {"id": "3"}))
+
+
+class TestTypedRoutes(TestCase):
+    def test_int_segment(self):
+        router = RouteMatcher()
+        h = handler("/clients/{id:int}")
+        router.add_route(h)
+
+        self.assertEqual(router.match("/clients/3", "GET"), (h, {"id": 3}))
+        self.assertIsNone(router.match("/clients/abc", "GET"))
+
+    def test_mismatch_falls_through_to_sibling(self):
+        router = RouteMatcher()
+        by_id = handler("/clients/{id:int}")
+        by_slug = handler("/clients/{slug:str}")
+        router.add_route(by_slug)
+        router.add_route(by_id)
+
+        self.assertEqual(router.match("/clients/3", "GET"), (by_id, {"id": 3}))
+        self.assertEqual(router.match("/clients/john", "GET"), (by_slug, {"slug": "john"}))
+
+    def test_backtracks_into_deeper_sibling(self):
+        router = RouteMatcher()
+        orders = handler("/clients/{id:int}/orders")
+        profile = handler("/clients/{name}/profile")
+        router.add_route(orders)
+        router.add_route(profile)
+
+        self.assertEqual(router.match("/clients/3/profile", "GET"), (profile, {"name": "3"}))
+
+    def test_uuid_segment(self):
+        router = RouteMatcher()
+        h = handler("/items/{key:uuid}")
+        router.add_route(h)
+        key = UUID("12345678-1234-5678-1234-567812345678")
+
+        self.assertEqual(router.match(f"/items/{key}", "GET"), (h, {"key": key}))
+        self.assertIsNone(router.match("/items/123", "GET"))
+
+    def test_path_segment(self):
+        router = RouteMatcher()
+        h = handler("/static/{rest:path}")
+        router.add_route(h)
+
+        self.assertEqual(router.match("/static/css/site.css", "GET"), (h, {"rest": "css/site.css"}))
+        self.assertIsNone(router.match("/static", "GET"))
+
+    def test_unknown_converter(self):
+        with self.assertRaisesRegex(ValueError, "Unknown path converter"):
+            RouteMatcher().add_route(handler("/items/{id:nope}"))
+
+
+class TestResolve(TestCase):
+    def test_returns_method_table(self):
+        router = RouteMatcher()
+        get_ = handler("/clients/{id:int}")
+        delete = handler("/clients/{id:int}", "DELETE")
+        router.add_route(get_)
+        router.add_route(delete)
+
+        self.assertEqual(
+            router.resolve("/clients/3"), ({"GET": get_, "DELETE": delete}, {"id": 3})
+        )
+        self.assertIsNone(router.match("/clients/3", "POST"))
+        self.assertIsNone(router.resolve("/users"))
@@ -1,10 +1,12 @@
-from unittest import TestCase
+import json
+from unittest import IsolatedAsyncioTestCase, TestCase
+from lunnaris.codec import StdlibJson
 from lunnaris.serializer import Serializer, ExtendedSerializer
 
 
 class TestSerializer(TestCase):
     def test_serialize(self):
-        serializer = Serializer()
+        serializer = Serializer(json_backend=StdlibJson())
         self.assertEqual(serializer.serialize("test"), ("test", "text/html"))
         self.assertEqual(serializer.serialize(1), ("1", "text/html"))
         self.assertEqual(serializer.serialize(1.0), ("1.0", "text/html"))
@@ -59,3 +61,77 @@ class TestSerializer(TestCase):
         serializer.add_object_serializer(TestSerializer())
         with self.assertRaises(TypeError):
             serializer.serialize(object())
+
+    def test_dispatch_cache_is_invalidated(self):
+        class DummyClass:
+            pass
+
+        serializer = Serializer(json_backend=StdlibJson())
+        serializer.add_serializer(DummyClass, lambda x: "first")
+        self.assertEqual(serializer.serialize([DummyClass()]), ('["first"]', "application/json"))
+
+        serializer.add_serializer(DummyClass, lambda x: "second")
+        self.assertEqual(serializer.serialize([DummyClass()]), ('["second"]', "application/json"))
+
+    def test_dispatch_cache_falls_back_on_mismatch(self):
+        class Value:
+            def __init__(self, value):
+                self.value = value
+
+        class Positive(ExtendedSerializer):
+            def match(self, obj):
+                return obj.value > 0
+
+            def serialize(self, obj):
+                return "positive"
+
+        class Other(ExtendedSerializer):
+            def match(self, obj):
+                return True
+
+            def serialize(self, obj):
+                return "other"
+
+        serializer = Serializer(json_backend=StdlibJson())
+        serializer.add_object_serializer(Positive())
+        serializer.add_object_serializer(Other())
+
+        self.assertEqual(
+            serializer.serialize([Value(1), Value(-1), Value(2)]),
+            ('["positive", "other", "positive"]', "application/json"),
+        )
+
+
+    def test_encode_returns_bytes(self):
+        serializer = Serializer(json_backend=StdlibJson())
+        self.assertEqual(serializer.encode("test"), (b"test", "text/html"))
+        self.assertEqual(serializer.encode(b"\xff"), (b"\xff", "text/html"))
+        self.assertEqual(serializer.encode({"a": 1}), (b'{"a": 1}', "application/json"))
+
+
+class TestIterEncode(TestCase):
+    def test_encodes_json_array_in_chunks(self):
+        serializer = Serializer(json_backend=StdlibJson())
+
+        chunks = list(serializer.iter_encode(({"id": i} for i in range(4)), chunk_size=20))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b"".join(chunks)), [{"id": i} for i in range(4)])
+
+    def test_empty_iterable(self):
+        serializer = Serializer(json_backend=StdlibJson())
+
+        self.assertEqual(b"".join(serializer.iter_encode(iter([]))), b"[]")
+
+
+class TestAsyncIterEncode(IsolatedAsyncioTestCase):
+    async def test_encodes_async_iterable(self):
+        async def rows():
+            for i in range(3):
+                yield i
+
+        serializer = Serializer(json_backend=StdlibJson())
+
+        chunks = [chunk async for chunk in serializer.aiter_encode(rows(), chunk_size=1)]
+
+        self.assertEqual(b"".join(chunks), b"[0,1,2]")